@@ -1,6 +1,7 @@
 import pathlib
 import importlib
 import contextlib
+import dataclasses
 from typing import List, Dict, Any, Union
 
 from ..base import BaseConfig
@@ -9,10 +10,9 @@ from ..df.types import DataFlow, Input, Operation, Stage, FailedToLoadOperation
 from ..df.exceptions import DefinitionNotFoundInDataFlow
 from ..df.memory import (
     MemoryOrchestrator,
-    MemoryInputSet,
-    MemoryInputSetConfig,
     StringInputSetContext,
 )
+from ..df.profile import OrchestratorProfiler
 from ..configloader.configloader import BaseConfigLoader
 from ..configloader.json import JSONConfigLoader
 from ..source.source import SubsetSources, Sources
@@ -32,6 +32,23 @@ from ..base import config, field
 from ..high_level.dataflow import run as run_dataflow
 
 
+def profiled(
+    orchestrator: BaseOrchestrator, profiler: OrchestratorProfiler
+) -> BaseOrchestrator:
+    """
+    Copy of an orchestrator which records where time is spent with profiler
+    """
+    if "profiler" not in {
+        field.name for field in dataclasses.fields(orchestrator.config)
+    }:
+        raise ValueError(
+            f"{orchestrator.__class__.__qualname__} does not support profiling"
+        )
+    return orchestrator.__class__(
+        dataclasses.replace(orchestrator.config, profiler=profiler)
+    )
+
+
 @config
 class MergeConfig:
     dataflows: List[pathlib.Path] = field("DataFlows to merge")
@@ -197,6 +214,10 @@ class RunCMDConfig:
     config: List[str] = field(
         "configs", action=ParseInputsAction, default_factory=lambda: [],
     )
+    profile: pathlib.Path = field(
+        "Write a Chrome trace of where the run spent its time to this file",
+        default=None,
+    )
 
 
 class RunCMD(SourcesCMD):
@@ -206,6 +227,10 @@ class RunCMD(SourcesCMD):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.orchestrator = self.orchestrator.withconfig(self.extra_config)
+        self.profiler = None
+        if self.profile is not None:
+            self.profiler = OrchestratorProfiler()
+            self.orchestrator = profiled(self.orchestrator, self.profiler)
 
 
 @config
@@ -225,63 +250,55 @@ class RunAllRecords(RunCMD):
         async for record in sctx.records():
             yield record
 
-    async def run_dataflow(self, orchestrator, sources, dataflow):
-        # Orchestrate the running of these operations
-        async with orchestrator(dataflow) as octx, sources() as sctx:
-            # Add our inputs to the input network with the context being the
-            # record key
-            inputs = []
-            async for record in self.records(sctx):
-                # Skip running DataFlow if record already has features
-                existing_features = record.features()
-                if self.caching and all(
-                    map(
-                        lambda cached: cached in existing_features,
-                        self.caching,
-                    )
-                ):
-                    continue
+    async def ctx_inputs(self, sctx, dataflow):
+        """
+        Yield the context and inputs for each record the dataflow should be
+        run on. The orchestrator pulls from this as it starts new contexts.
+        """
+        async for record in self.records(sctx):
+            # Skip running DataFlow if record already has features
+            existing_features = record.features()
+            if self.caching and all(
+                map(
+                    lambda cached: cached in existing_features,
+                    self.caching,
+                )
+            ):
+                continue
 
-                record_inputs = []
-                for value, def_name in self.inputs:
-                    record_inputs.append(
-                        Input(
-                            value=value,
-                            definition=dataflow.definitions[def_name],
-                        )
+            record_inputs = []
+            for value, def_name in self.inputs:
+                record_inputs.append(
+                    Input(
+                        value=value,
+                        definition=dataflow.definitions[def_name],
                     )
-                if self.record_def:
-                    record_inputs.append(
-                        Input(
-                            value=record.key,
-                            definition=dataflow.definitions[self.record_def],
-                        )
-                    )
-
-                if self.passcmd:
-                    record_inputs.append(
-                        Input(
-                            value=self,
-                            definition=DFFMLCLICMD,
-                        )
+                )
+            if self.record_def:
+                record_inputs.append(
+                    Input(
+                        value=record.key,
+                        definition=dataflow.definitions[self.record_def],
                     )
+                )
 
-                # TODO(p1) When OrchestratorContext is fixed to accept an
-                # asyncgenerator we won't have to build a list
-                inputs.append(
-                    MemoryInputSet(
-                        MemoryInputSetConfig(
-                            ctx=StringInputSetContext(record.key),
-                            inputs=record_inputs,
-                        )
+            if self.passcmd:
+                record_inputs.append(
+                    Input(
+                        value=self,
+                        definition=DFFMLCLICMD,
                     )
                 )
 
-            if not inputs:
-                return
+            # Add our inputs to the input network with the context being the
+            # record key
+            yield StringInputSetContext(record.key), record_inputs
 
+    async def run_dataflow(self, orchestrator, sources, dataflow):
+        # Orchestrate the running of these operations
+        async with orchestrator(dataflow) as octx, sources() as sctx:
             async for ctx, results in octx.run(
-                *inputs, strict=not self.no_strict
+                self.ctx_inputs(sctx, dataflow), strict=not self.no_strict
             ):
                 ctx_str = (await ctx.handle()).as_string()
                 # TODO(p4) Make a RecordInputSetContext which would let us
@@ -294,12 +311,16 @@ class RunAllRecords(RunCMD):
                     await sctx.update(record)
 
     async def run(self):
-        async with self.orchestrator as orchestrator, self.sources as sources:
-            async for record in self.run_dataflow(
-                orchestrator, sources, self.dataflow
-            ):
-                if not self.no_echo:
-                    yield record
+        try:
+            async with self.orchestrator as orchestrator, self.sources as sources:
+                async for record in self.run_dataflow(
+                    orchestrator, sources, self.dataflow
+                ):
+                    if not self.no_echo:
+                        yield record
+        finally:
+            if self.profiler is not None:
+                self.profiler.save(self.profile)
         if self.no_echo:
             yield CMDOutputOverride
 
@@ -375,6 +396,10 @@ class RunSingleConfig:
     config: List[str] = field(
         "configs", action=ParseInputsAction, default_factory=lambda: [],
     )
+    profile: pathlib.Path = field(
+        "Write a Chrome trace of where the run spent its time to this file",
+        default=None,
+    )
 
 
 class RunSingle(CMD):
@@ -383,6 +408,10 @@ class RunSingle(CMD):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.orchestrator = self.orchestrator.withconfig(self.extra_config)
+        self.profiler = None
+        if self.profile is not None:
+            self.profiler = OrchestratorProfiler()
+            self.orchestrator = profiled(self.orchestrator, self.profiler)
 
     async def get_dataflow(self, dataflow_path):
         if isinstance(dataflow_path, DataFlow):
@@ -447,14 +476,18 @@ class RunSingle(CMD):
             )
             # TODO We have an issue with ``links``
 
-        async for ctx, results in run_dataflow(
-            dataflow,
-            list(self.input_objects(dataflow)),
-            orchestrator=self.orchestrator,
-            strict=not self.no_strict,
-        ):
-            if not self.no_echo:
-                yield results
+        try:
+            async for ctx, results in run_dataflow(
+                dataflow,
+                list(self.input_objects(dataflow)),
+                orchestrator=self.orchestrator,
+                strict=not self.no_strict,
+            ):
+                if not self.no_echo:
+                    yield results
+        finally:
+            if self.profiler is not None:
+                self.profiler.save(self.profile)
         if self.no_echo:
             yield CMDOutputOverride
 
@@ -496,14 +529,18 @@ class RunContexts(RunSingle):
             for ctx_string in self.contexts
         }
 
-        async for ctx, result in run_dataflow(
-            dataflow,
-            dataflow_inputs,
-            orchestrator=self.orchestrator,
-            strict=not self.no_strict,
-        ):
-            if not self.no_echo:
-                yield {(await ctx.handle()).as_string(): result}
+        try:
+            async for ctx, result in run_dataflow(
+                dataflow,
+                dataflow_inputs,
+                orchestrator=self.orchestrator,
+                strict=not self.no_strict,
+            ):
+                if not self.no_echo:
+                    yield {(await ctx.handle()).as_string(): result}
+        finally:
+            if self.profiler is not None:
+                self.profiler.save(self.profile)
         if self.no_echo:
             yield CMDOutputOverride
 
@@ -147,6 +147,19 @@ class BaseDatabaseContext(
         except:
             await self.update(table_name, data, conditions=[])
 
+    async def insert_or_update_many(
+        self, table_name: str, data: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Inserts or updates each row in ``data``, in order.
+
+        The default implementation calls :py:meth:`insert_or_update` for each
+        row. Databases which can write many rows with one statement or within
+        one transaction should override this.
+        """
+        for row in data:
+            await self.insert_or_update(table_name, row)
+
 
 @base_entry_point("dffml.db", "db")
 class BaseDatabase(BaseDataFlowObject):
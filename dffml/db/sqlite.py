@@ -1,17 +1,40 @@
 import asyncio
 import sqlite3
-from typing import Dict, Any, List, Optional, AsyncIterator
+import itertools
+import contextlib
+import concurrent.futures
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator
 
 
 from .base import BaseDatabase, Conditions
 from .sql import SQLDatabaseContext
-from ..base import config
+from ..base import config, field
 from ..util.entrypoint import entrypoint
 
+# INSERT ... ON CONFLICT DO UPDATE was added in SQLite 3.24.0
+SQLITE_UPSERT = sqlite3.sqlite_version_info >= (3, 24, 0)
+
 
 @config
 class SqliteDatabaseConfig:
     filename: str
+    wal: bool = field(
+        "Use write-ahead logging, so that lookups and writes don't wait on "
+        "each other and each transaction only appends to the log. Creates "
+        "-wal and -shm files next to the database",
+        default=False,
+    )
+    readers: int = field(
+        "Number of connections used for lookups. Lookups are run on worker "
+        "threads with their own connections, so they don't block the event "
+        "loop. With wal they also don't wait on writes. In memory databases "
+        "are always read through the connection used for writes",
+        default=4,
+    )
+    fetch_size: int = field(
+        "Number of rows fetched from SQLite at a time by lookups",
+        default=1000,
+    )
 
 
 class SqliteDatabaseContext(SQLDatabaseContext):
@@ -20,14 +43,18 @@ class SqliteDatabaseContext(SQLDatabaseContext):
     ) -> None:
         query = self.create_table_query(table_name, cols)
         self.logger.debug(query)
-        self.parent.cursor.execute(query)
+        async with self.parent.lock:
+            await self.parent.run(self.parent.write, [(query, ())])
+        self.parent.primary_keys.pop(table_name, None)
+        self.parent.rowid_tables.pop(table_name, None)
 
     async def insert(self, table_name: str, data: Dict[str, Any]) -> None:
         query, query_values = self.insert_query(table_name, data)
+        self.logger.debug(query)
         async with self.parent.lock:
-            with self.parent.db:
-                self.logger.debug(query)
-                self.parent.cursor.execute(query, list(data.values()))
+            await self.parent.run(
+                self.parent.write, [(query, list(data.values()))]
+            )
 
     async def update(
         self,
@@ -38,10 +65,9 @@ class SqliteDatabaseContext(SQLDatabaseContext):
         query, query_values = self.update_query(
             table_name, data, conditions=conditions
         )
+        self.logger.debug(query)
         async with self.parent.lock:
-            with self.parent.db:
-                self.logger.debug(query)
-                self.parent.cursor.execute(query, query_values)
+            await self.parent.run(self.parent.write, [(query, query_values)])
 
     async def lookup(
         self,
@@ -49,15 +75,111 @@ class SqliteDatabaseContext(SQLDatabaseContext):
         cols: Optional[List[str]] = None,
         conditions: Optional[Conditions] = None,
     ) -> AsyncIterator[Dict[str, Any]]:
+        # Without write-ahead logging an unfinished SELECT keeps the database
+        # locked, so that nothing can write to it. Rows are instead read a page
+        # at a time, with each page read by its own statement.
+        if not self.parent.streams():
+            async for row in self.lookup_pages(
+                table_name, cols=cols, conditions=conditions
+            ):
+                yield row
+            return
         query, query_values = self.lookup_query(
             table_name, cols=cols, conditions=conditions
         )
-        async with self.parent.lock:
-            with self.parent.db:
-                self.logger.debug(query)
-                self.parent.cursor.execute(query, query_values)
-                for row in self.parent.cursor.fetchall():
-                    yield dict(row)
+        self.logger.debug(query)
+        async with self.parent.reader() as conn:
+            cursor = await self.parent.run(conn.execute, query, query_values)
+            try:
+                # Rows are fetched in batches as they are iterated over
+                while True:
+                    rows = await self.parent.run(
+                        self.parent.fetchmany, cursor
+                    )
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield row
+            finally:
+                cursor.close()
+
+    async def lookup_pages(
+        self,
+        table_name: str,
+        cols: Optional[List[str]] = None,
+        conditions: Optional[Conditions] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Read rows ``fetch_size`` at a time, in order of their rowid, with one
+        statement per page. Rows of tables without a rowid are all read by one
+        statement.
+        """
+        async with self.parent.reader() as conn:
+            has_rowid = await self.parent.run(
+                self.parent.has_rowid, conn, table_name
+            )
+        if not has_rowid:
+            query, query_values = self.lookup_query(
+                table_name, cols=cols, conditions=conditions
+            )
+            self.logger.debug(query)
+            async with self.parent.reader() as conn:
+                rows = await self.parent.run(
+                    self.parent.fetchall, conn, query, query_values
+                )
+            for row in rows:
+                yield row
+            return
+        query, query_values = self.lookup_page_query(
+            table_name, cols=cols, conditions=conditions
+        )
+        self.logger.debug(query)
+        rowid = None
+        while True:
+            async with self.parent.reader() as conn:
+                rows = await self.parent.run(
+                    self.parent.fetch_page,
+                    conn,
+                    query,
+                    query_values + [rowid, rowid],
+                )
+            for rowid, row in rows:
+                yield row
+            if len(rows) < self.parent.config.fetch_size:
+                break
+
+    def lookup_page_query(
+        self,
+        table_name: str,
+        cols: Optional[List[str]] = None,
+        conditions: Optional[Conditions] = None,
+    ) -> Tuple[str, List[Any]]:
+        """
+        Creates a ``SELECT`` query for the page of rows after the rowid bound
+        as the last two parameters, ``NULL`` for the first page. The rowid is
+        the first column of each row.
+        """
+        condition_dict = self.make_condition_expression(conditions)
+        query_values = []
+        condition_exp = (
+            f"( {self.BIND_DECLARATION} IS NULL"
+            + f" OR rowid > {self.BIND_DECLARATION} )"
+        )
+        if condition_dict is not None:
+            condition_exp = f"( {condition_dict['expression']} ) AND " + (
+                condition_exp
+            )
+            query_values.extend(condition_dict["values"])
+        if not cols:
+            col_exp = "*"
+        else:
+            col_exp = ", ".join([f"`{col}`" for col in cols])
+        query = (
+            f"SELECT rowid, {col_exp} FROM {table_name}"
+            + f" WHERE {condition_exp}"
+            + f" ORDER BY rowid LIMIT {self.parent.config.fetch_size}"
+        )
+        return query, query_values
 
     async def remove(
         self, table_name: str, conditions: Optional[Conditions] = None
@@ -65,12 +187,95 @@ class SqliteDatabaseContext(SQLDatabaseContext):
         query, query_values = self.remove_query(
             table_name, conditions=conditions
         )
+        self.logger.debug(query)
         async with self.parent.lock:
-            with self.parent.db:
-                self.logger.debug(query)
-                self.parent.cursor.execute(query, query_values)
+            await self.parent.run(self.parent.write, [(query, query_values)])
 
     async def insert_or_update(self, table_name: str, data: Dict[str, Any]):
+        await self.insert_or_update_many(table_name, [data])
+
+    async def insert_or_update_many(
+        self, table_name: str, data: List[Dict[str, Any]]
+    ) -> None:
+        # Rows missing part of the primary key could conflict on another
+        # unique column, which an upsert can't resolve
+        primary_key = await self.primary_key(table_name)
+        if SQLITE_UPSERT and all(
+            col in row for col in primary_key for row in data
+        ):
+            try:
+                await self.upsert_many(table_name, data)
+                return
+            except sqlite3.IntegrityError:
+                # A unique column other than the primary key conflicted. The
+                # transaction was rolled back, so every row is written again
+                # below.
+                pass
+        for row in data:
+            await self.insert_then_update(table_name, dict(row))
+
+    async def upsert_many(
+        self, table_name: str, data: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Inserts rows, updating those with the same primary key as an existing
+        row, in one transaction
+        """
+        primary_key = await self.primary_key(table_name)
+        statements = []
+        # Rows with the same columns are written with one statement
+        for cols, rows in itertools.groupby(
+            data, key=lambda row: tuple(row.keys())
+        ):
+            query = self.insert_or_update_query(
+                table_name, list(cols), primary_key
+            )
+            self.logger.debug(query)
+            statements.append((query, [list(row.values()) for row in rows]))
+        async with self.parent.lock:
+            await self.parent.run(self.parent.write, statements, True)
+
+    async def primary_key(self, table_name: str) -> List[str]:
+        """
+        Columns making up the primary key of a table
+        """
+        if table_name not in self.parent.primary_keys:
+            self.parent.primary_keys[table_name] = await self.parent.run(
+                self.parent.table_primary_key, table_name
+            )
+        return self.parent.primary_keys[table_name]
+
+    def insert_or_update_query(
+        self, table_name: str, cols: List[str], primary_key: List[str]
+    ) -> str:
+        """
+        Creates an ``INSERT`` query which updates the row if one with the same
+        primary key already exists
+        """
+        col_exp = ", ".join([f"`{col}`" for col in cols])
+        query = (
+            f"INSERT INTO {table_name} "
+            + f"( {col_exp} )"
+            + f" VALUES( {', '.join([self.BIND_DECLARATION] * len(cols))} ) "
+        )
+        # Without a primary key there can be no conflict to resolve
+        if not primary_key:
+            return query
+        updates = [col for col in cols if col not in primary_key]
+        query += (
+            "ON CONFLICT ( "
+            + ", ".join([f"`{col}`" for col in primary_key])
+            + " ) DO "
+        )
+        if not updates:
+            return query + "NOTHING"
+        return (
+            query
+            + "UPDATE SET "
+            + " ,".join([f"`{col}` = excluded.`{col}`" for col in updates])
+        )
+
+    async def insert_then_update(self, table_name: str, data: Dict[str, Any]):
         try:
             await self.insert(table_name, data)
         except sqlite3.IntegrityError as e:
@@ -98,13 +303,163 @@ class SqliteDatabase(BaseDatabase):
         self.lock = None
         self.db = None
         self.cursor = None
+        # Primary key columns by table name
+        self.primary_keys: Dict[str, List[str]] = {}
+        # Whether each table has a rowid, by table name
+        self.rowid_tables: Dict[str, bool] = {}
+        # Worker threads lookups are run on, and the idle read connections
+        self.executor = None
+        self.idle_readers = None
+        self.read_connections: List[sqlite3.Connection] = []
 
     async def __aenter__(self):
         self.lock = asyncio.Lock()
-        self.db = sqlite3.connect(self.config.filename)
+        # Lookups on in memory databases use this connection from the worker
+        # threads, while holding the lock
+        self.db = sqlite3.connect(
+            self.config.filename, check_same_thread=False
+        )
         self.db.row_factory = sqlite3.Row
         self.cursor = self.db.cursor()
+        self.primary_keys = {}
+        self.rowid_tables = {}
+        if self.config.wal and self.config.filename != ":memory:":
+            self.cursor.execute("PRAGMA journal_mode=WAL").fetchall()
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max(1, self.config.readers)
+        )
+        self.idle_readers = asyncio.Queue()
+        self.read_connections = []
         return await super().__aenter__()
 
     async def __aexit__(self, _exc_type, _exc_value, _traceback):
+        # Wait for in progress fetches to finish before closing the
+        # connections they use, without blocking the event loop
+        await asyncio.get_running_loop().run_in_executor(
+            None, self.executor.shutdown
+        )
+        for conn in self.read_connections:
+            conn.close()
+        self.read_connections = []
         self.db.close()
+
+    async def run(self, func, *args):
+        """
+        Call a function on one of the worker threads
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, func, *args
+        )
+
+    def fetchmany(self, cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+        return [dict(row) for row in cursor.fetchmany(self.config.fetch_size)]
+
+    def fetchall(
+        self, conn: sqlite3.Connection, query: str, query_values: List[Any]
+    ) -> List[Dict[str, Any]]:
+        cursor = conn.execute(query, query_values)
+        try:
+            return [dict(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+
+    def fetch_page(
+        self, conn: sqlite3.Connection, query: str, query_values: List[Any]
+    ) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Rowid and row for each row returned by a query whose first column is
+        the rowid. The name of the rowid column is that of the table's
+        ``INTEGER PRIMARY KEY`` if it has one, so it's removed by position.
+        """
+        cursor = conn.execute(query, query_values)
+        try:
+            cols = [description[0] for description in cursor.description]
+            return [
+                (row[0], dict(zip(cols[1:], tuple(row)[1:])))
+                for row in cursor.fetchall()
+            ]
+        finally:
+            cursor.close()
+
+    def has_rowid(self, conn: sqlite3.Connection, table_name: str) -> bool:
+        """
+        Whether a table has a rowid. Views and tables created
+        ``WITHOUT ROWID`` don't.
+        """
+        if table_name not in self.rowid_tables:
+            row = conn.execute(
+                "SELECT sql FROM sqlite_master "
+                + "WHERE type = 'table' AND name = ?",
+                (table_name,),
+            ).fetchone()
+            self.rowid_tables[table_name] = (
+                row is not None
+                and "WITHOUT ROWID" not in " ".join(row["sql"].upper().split())
+            )
+        return self.rowid_tables[table_name]
+
+    def table_primary_key(self, table_name: str) -> List[str]:
+        return [
+            row["name"]
+            for row in sorted(
+                self.db.execute(f"PRAGMA table_info({table_name})").fetchall(),
+                key=lambda row: row["pk"],
+            )
+            if row["pk"]
+        ]
+
+    def write(
+        self, statements: List[Tuple[str, Any]], many: bool = False
+    ) -> None:
+        """
+        Run queries and their bindings in one transaction, on a worker thread
+        so that waiting on a locked database doesn't block the event loop.
+        With many, each query is run with a list of bindings.
+        """
+        with self.db:
+            for query, query_values in statements:
+                if many:
+                    self.cursor.executemany(query, query_values)
+                else:
+                    self.cursor.execute(query, query_values)
+
+    def streams(self) -> bool:
+        """
+        Whether lookups read all their rows with one statement as they are
+        iterated over. Without write-ahead logging that would stop anything
+        from writing until they finish, and lookups on in memory databases
+        would hold the lock until then.
+        """
+        return (
+            self.config.wal
+            and self.config.filename != ":memory:"
+            and self.config.readers >= 1
+        )
+
+    def connect_reader(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.config.filename, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    @contextlib.asynccontextmanager
+    async def reader(self) -> AsyncIterator[sqlite3.Connection]:
+        """
+        Use a read connection from the pool, opening a new one if all are in
+        use and there are fewer than ``readers``
+        """
+        if self.config.filename == ":memory:" or self.config.readers < 1:
+            async with self.lock:
+                yield self.db
+            return
+        if self.idle_readers.empty() and (
+            len(self.read_connections) < self.config.readers
+        ):
+            conn = await self.run(self.connect_reader)
+            self.read_connections.append(conn)
+        else:
+            conn = await self.idle_readers.get()
+        try:
+            yield conn
+        finally:
+            self.idle_readers.put_nowait(conn)
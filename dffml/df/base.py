@@ -383,12 +383,12 @@ def op(
             )
         )
         # Check if the function uses the operation implementation config
-        # This exists because eventually we will make non async functions
-        # wrapped with op run with loop.run_in_executor when that happens it's
-        # likely that self won't be serializeable into the thread / process.
-        # Config's are guaranteed to be serializable, therefore this lets us
-        # define operations that have configs and needs to access them when
-        # running within another thread.
+        # This exists because non async functions wrapped with op may be run
+        # with loop.run_in_executor (see the executor property of Operation).
+        # self isn't serializeable into the thread / process. Config's are
+        # guaranteed to be serializable, therefore this lets us define
+        # operations that have configs and needs to access them when running
+        # within another thread or process.
         uses_config = None
         if config_cls is not None:
             for name, param in sig.parameters.items():
@@ -568,8 +568,17 @@ def op(
                             result = await result
                     elif inspect.iscoroutinefunction(func):
                         result = await func(**inputs)
+                    elif (
+                        getattr(self.octx, "nctx", None) is not None
+                        and not inspect.isasyncgenfunction(func)
+                        and not inspect.isgeneratorfunction(func)
+                    ):
+                        # Let the operation implementation network decide if
+                        # the function should be run in a thread or process
+                        result = await self.octx.nctx.run_sync(
+                            self.parent.op, func, inputs
+                        )
                     else:
-                        # TODO Add auto thread pooling of non-async functions
                         result = func(**inputs)
                     if not multi_output and len(self.parent.op.outputs) == 1:
                         if inspect.isasyncgen(result):
@@ -905,16 +914,52 @@ class BaseInputNetworkContext(BaseDataFlowObjectContext):
         within the given context, by definition.
         """
 
+    async def initialize_dataflow(self, dataflow: DataFlow) -> None:
+        """
+        Called by the orchestrator when a dataflow is initialized. Allows the
+        network to precompute anything it needs to find inputs for the
+        dataflow's operations.
+        """
+
+    async def remove_context(self, ctx: BaseInputSetContext) -> None:
+        """
+        Called by the orchestrator once a context has completed. Removes all
+        inputs and notifications associated with the context.
+        """
+
+    def result_pending(self) -> bool:
+        """
+        True if there are context results which have not yet been retrieved
+        via ``result()``. Networks which can't tell return False, in which case
+        the orchestrator stops waiting once the last context has completed.
+        """
+        return False
+
+    def inputs_pending(self, handle_string: str) -> bool:
+        """
+        True if there are input sets within the context which have not yet
+        been retrieved via :py:meth:`added`. Networks which can't tell return
+        False, in which case the orchestrator stops waiting once no operations
+        are running within the context.
+        """
+        return False
+
     @abc.abstractmethod
     async def gather_inputs(
         self,
         rctx: "BaseRedundancyCheckerContext",
         operation: Operation,
+        dataflow: DataFlow,
         ctx: Optional[BaseInputSetContext] = None,
+        *,
+        new_input_set: Optional[BaseInputSet] = None,
     ) -> AsyncIterator[BaseParameterSet]:
         """
         Generate all possible permutations of applicable inputs for an operation
         that, according to the redundancy checker, haven't been run yet.
+
+        If ``new_input_set`` is given, implementations may only generate the
+        permutations which contain at least one of its inputs.
         """
 
 
@@ -977,10 +1022,6 @@ class BaseRedundancyCheckerConfig(NamedTuple):
     key_value_store: BaseKeyValueStore
 
 
-# TODO store redundancy checks by BaseInputSetContext.handle() and add method
-# to remove all associated with a particular handle. Aka allow us to clean up
-# the input, redundancy, etc. networks after execution of a context completes
-# via the orchestrator.
 class BaseRedundancyCheckerContext(BaseDataFlowObjectContext):
     """
     Abstract Base Class for redundancy checking context
@@ -996,6 +1037,12 @@ class BaseRedundancyCheckerContext(BaseDataFlowObjectContext):
     async def add(self, operation: Operation, parameter_set: BaseParameterSet):
         pass
 
+    async def remove_context(self, ctx: BaseInputSetContext) -> None:
+        """
+        Called by the orchestrator once a context has completed. Removes all
+        records of parameter sets run within the context.
+        """
+
 
 @base_entry_point("dffml.redundancy.checker", "rchecker")
 class BaseRedundancyChecker(BaseDataFlowObject):
@@ -1005,7 +1052,6 @@ class BaseRedundancyChecker(BaseDataFlowObject):
     """
 
 
-# TODO Provide a way to clear out all locks for inputs within a context
 class BaseLockNetworkContext(BaseDataFlowObjectContext):
     @abc.abstractmethod
     async def acquire(self, parameter_set: BaseParameterSet) -> bool:
@@ -1014,6 +1060,12 @@ class BaseLockNetworkContext(BaseDataFlowObjectContext):
         the parameter set.
         """
 
+    async def remove_context(self, ctx: BaseInputSetContext) -> None:
+        """
+        Called by the orchestrator once a context has completed. Removes the
+        locks for all inputs within the context.
+        """
+
 
 @base_entry_point("dffml.lock.network", "lock", "network")
 class BaseLockNetwork(BaseDataFlowObject):
@@ -1055,6 +1107,15 @@ class BaseOperationImplementationNetworkContext(BaseDataFlowObjectContext):
         return the results.
         """
 
+    async def run_sync(
+        self, operation: Operation, func, inputs: Dict[str, Any]
+    ) -> Any:
+        """
+        Call a non-async function implementing an operation. Networks may
+        override this to run the function in a thread or process pool.
+        """
+        return func(**inputs)
+
     @abc.abstractmethod
     async def operation_completed(self):
         """
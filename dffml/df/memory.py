@@ -1,14 +1,23 @@
 import io
 import copy
+import json
+import time
+import pickle
+import logging
 import asyncio
 import secrets
+import collections
 import inspect
+import weakref
+import functools
 import itertools
 import traceback
 import concurrent.futures
 from itertools import product, chain
 from contextlib import asynccontextmanager, AsyncExitStack, ExitStack
 from typing import (
+    Deque,
+    Iterator,
     AsyncIterator,
     AsyncContextManager,
     Dict,
@@ -19,6 +28,7 @@ from typing import (
     Union,
     Optional,
     Set,
+    FrozenSet,
     Callable,
 )
 
@@ -70,10 +80,11 @@ from .base import (
 
 from ..base import config, field
 from ..util.entrypoint import entrypoint
-from ..util.data import ignore_args
+from ..util.data import ignore_args, export_value
 from ..util.asynchelper import aenter_stack, concurrently
 from ..util.crypto import secure_hash
 
+from .profile import OrchestratorProfiler, ProfiledRedundancyCheckerContext
 from .log import LOGGER
 
 
@@ -93,7 +104,10 @@ class BaseMemoryDataFlowObject(BaseDataFlowObject):
 
 @config
 class MemoryKeyValueStoreConfig:
-    pass
+    max_entries: int = field(
+        "Maximum number of keys to keep. Least recently used keys are removed first",
+        default=None,
+    )
 
 
 class MemoryKeyValueStoreContext(BaseKeyValueStoreContext):
@@ -101,16 +115,32 @@ class MemoryKeyValueStoreContext(BaseKeyValueStoreContext):
         self, config: BaseConfig, parent: "MemoryKeyValueStore"
     ) -> None:
         super().__init__(config, parent)
-        self.memory: Dict[str, bytes] = {}
+        self.memory: Dict[str, bytes] = collections.OrderedDict()
         self.lock = asyncio.Lock()
+        # Stores may be created with a BaseConfig
+        self.max_entries = getattr(self.parent.config, "max_entries", None)
 
     async def get(self, key: str) -> Union[bytes, None]:
         async with self.lock:
+            if self.max_entries is not None and key in self.memory:
+                self.memory.move_to_end(key)
             return self.memory.get(key)
 
     async def set(self, key: str, value: bytes):
         async with self.lock:
             self.memory[key] = value
+            self.evict(key)
+
+    def evict(self, key: str):
+        """
+        Mark key as most recently used and remove least recently used keys
+        while there are more than max_entries
+        """
+        if self.max_entries is None:
+            return
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_entries:
+            self.memory.popitem(last=False)
 
     async def conditional_set(
         self,
@@ -123,6 +153,7 @@ class MemoryKeyValueStoreContext(BaseKeyValueStoreContext):
         async with self.lock:
             if checker(self.memory.get(key)):
                 self.memory[key] = value
+                self.evict(key)
                 return True
         return False
 
@@ -195,14 +226,10 @@ class MemoryParameterSet(BaseParameterSet):
             yield parameter
 
     async def inputs_and_parents_recursive(self) -> AsyncIterator[Input]:
-        parents = []
         for parameter in self.__parameters:
-            parents.append(
-                [parameter.origin]
-                + [item async for item in parameter.origin.get_parents()]
-            )
-        for item in itertools.chain(*parents):
-            yield item
+            yield parameter.origin
+            for item in parameter.origin.ancestors():
+                yield item
 
 
 class NotificationSetContext(object):
@@ -211,30 +238,38 @@ class NotificationSetContext(object):
         self.logger = LOGGER.getChild(self.__class__.__qualname__)
 
     async def add(self, notification_item: Any):
-        async with self.parent.lock:
-            self.parent.notification_items.append(notification_item)
-            self.parent.event_added.set()
+        self.parent.notification_items.append(notification_item)
+        self.parent.event_added.set()
+
+    async def wait(self) -> None:
+        """
+        Wait until there is at least one item in the notification queue
+        """
+        # Multiple coroutines might be waiting. Whichever runs first may take
+        # all the items, so check again each time the event is set.
+        while not self.parent.notification_items:
+            self.parent.event_added.clear()
+            await self.parent.event_added.wait()
 
     async def added(self) -> Tuple[bool, List[Any]]:
         """
         Gets item from FIFO notification queue. Returns a bool for if there are
         more items to get and one of the items.
         """
-        more = True
-        # Make sure waiting on event_added is done by one coroutine at a time.
-        # Multiple might be waiting and if there is only one event in the queue
-        # they would all otherwise be triggered
-        async with self.parent.event_added_lock:
-            await self.parent.event_added.wait()
-            async with self.parent.lock:
-                notification_item = self.parent.notification_items.pop(0)
-                # If there are still more items that the added event hasn't
-                # processed then make sure we will return immediately if called
-                # again
-                if not self.parent.notification_items:
-                    more = False
-                    self.parent.event_added.clear()
-                return more, notification_item
+        await self.wait()
+        notification_item = self.parent.notification_items.popleft()
+        return bool(self.parent.notification_items), notification_item
+
+    async def drain(self) -> List[Any]:
+        """
+        Gets all items from FIFO notification queue, waiting until there is
+        at least one.
+        """
+        await self.wait()
+        notification_items = list(self.parent.notification_items)
+        self.parent.notification_items.clear()
+        self.parent.event_added.clear()
+        return notification_items
 
     async def __aenter__(self) -> "NotificationSetContext":
         return self
@@ -250,10 +285,8 @@ class NotificationSet(object):
 
     def __init__(self) -> None:
         # TODO audit use of memory (should be used sparingly)
-        self.lock = asyncio.Lock()
         self.event_added = asyncio.Event()
-        self.event_added_lock = asyncio.Lock()
-        self.notification_items = []
+        self.notification_items: Deque[Any] = collections.deque()
 
     def __call__(self) -> NotificationSetContext:
         return NotificationSetContext(self)
@@ -268,6 +301,146 @@ class MemoryInputNetworkContextEntry(NamedTuple):
     ctx: BaseInputSetContext
     definitions: Dict[Definition, List[Input]]
     by_origin: Dict[Union[str, Tuple[str, str]], List[Input]]
+    # Index of inputs by their origin and the name of their definition
+    by_origin_definition: Dict[
+        Tuple[Union[str, Tuple[str, str]], str], List[Input]
+    ]
+
+
+class MemoryInputMatchSource(NamedTuple):
+    """
+    One place within the input network an operation's input or condition can
+    be found. Compiled from an :py:class:`InputFlow` entry.
+    """
+
+    origin: Union[str, Tuple[str, str]]
+    # Names of definitions accepted from the origin
+    definitions: Tuple[str]
+    # When the input flow specified a list of alternate definitions, the
+    # origins each successive parent must have come from. Empty otherwise.
+    ancestor_origins: Tuple[Any] = ()
+
+
+class MemoryOperationMatchPlan(NamedTuple):
+    """
+    Precompiled lookup plan for finding the inputs and conditions of an
+    operation within the input network. Created once per operation within a
+    dataflow rather than walking the input flow each time inputs are gathered.
+    """
+
+    operation: Operation
+    input_flow: Any
+    inputs: Dict[str, List[MemoryInputMatchSource]]
+    conditions: List[List[MemoryInputMatchSource]]
+    # Lazily created Input objects holding default values for inputs
+    defaults: Dict[str, Input]
+
+    @classmethod
+    def compile(
+        cls, operation: Operation, dataflow: DataFlow
+    ) -> "MemoryOperationMatchPlan":
+        # Grab the input flow to check for definition overrides
+        input_flow = dataflow.flow[operation.instance_name]
+
+        def output_definition_name(origin) -> Tuple[str]:
+            try:
+                return (
+                    dataflow.operations[origin[0]].outputs[origin[1]].name,
+                )
+            except KeyError:
+                # No operation could have created an input with this origin
+                return ()
+
+        def expand(source) -> List[Any]:
+            # Create a list of places this input originates from
+            if isinstance(source, dict):
+                return list(source.items())
+            return [source]
+
+        conditions = []
+        for i, condition_source in enumerate(input_flow.conditions):
+            sources = []
+            for origin in expand(condition_source):
+                (
+                    alternate_definitions,
+                    origin,
+                ) = input_flow.get_alternate_definitions(origin)
+                if alternate_definitions:
+                    definitions = tuple(alternate_definitions)
+                elif isinstance(condition_source, str):
+                    definitions = (operation.conditions[i].name,)
+                else:
+                    definitions = output_definition_name(origin)
+                sources.append(MemoryInputMatchSource(origin, definitions))
+            conditions.append(sources)
+
+        inputs = {}
+        for input_name, input_sources in input_flow.inputs.items():
+            inputs[input_name] = []
+            for input_source in input_sources:
+                ancestor_origins = ()
+                # Handle the case where we look at the first instance in the
+                # list for the immediate alternate definition then trace back
+                # through input origins to make sure they all match
+                if isinstance(input_source, list):
+                    origins = expand(input_source[0])
+                    ancestor_origins = tuple(
+                        itertools.chain(*map(expand, input_source))
+                    )
+                else:
+                    origins = expand(input_source)
+                for origin in origins:
+                    # Check if the origin is a tuple where the first value is
+                    # the origin (such as "seed") and the second value is an
+                    # array of allowed alternate Definition's (their names)
+                    # within that origin. These definitions will be used
+                    # instead of the default one the input specified for the
+                    # operation).
+                    (
+                        alternate_definitions,
+                        origin,
+                    ) = input_flow.get_alternate_definitions(origin)
+                    # TODO(p2) We favored comparing names to definitions
+                    # because sometimes we create definitions which have specs
+                    # which create new types which will not equal each other.
+                    # We maybe want to consider switching to comparing
+                    # exported Definitions
+                    if alternate_definitions:
+                        definitions = tuple(alternate_definitions)
+                    elif isinstance(origin, str):
+                        definitions = (operation.inputs[input_name].name,)
+                    else:
+                        definitions = output_definition_name(origin)
+                    inputs[input_name].append(
+                        MemoryInputMatchSource(
+                            origin, definitions, ancestor_origins
+                        )
+                    )
+        return cls(
+            operation=operation,
+            input_flow=input_flow,
+            inputs=inputs,
+            conditions=conditions,
+            defaults={},
+        )
+
+    def default(self, input_name: str) -> Optional[Input]:
+        """
+        Input holding the default value for an operation's input, or None if
+        the definition for the input has no default value.
+        """
+        if input_name not in self.defaults:
+            definition = self.operation.inputs[input_name]
+            self.defaults[input_name] = None
+            # Check if the definition has a default value that is not
+            # _NO_DEFAULT
+            if "dffml.df.types._NO_DEFAULT" not in repr(definition.default):
+                self.defaults[input_name] = Input(
+                    value=definition.default,
+                    definition=definition,
+                    origin="default",
+                )
+        return self.defaults[input_name]
 
 
 class MemoryDefinitionSetContext(BaseDefinitionSetContext):
@@ -303,6 +476,11 @@ class MemoryInputNetworkContext(BaseInputNetworkContext):
         self.ctxhd: Dict[str, Dict[Definition, Any]] = {}
         # TODO Create ctxhd_locks dict to manage a per context lock
         self.ctxhd_lock = asyncio.Lock()
+        # Compiled plans for finding operation inputs, by dataflow then
+        # operation instance_name
+        self.match_plans: Dict[
+            DataFlow, Dict[str, MemoryOperationMatchPlan]
+        ] = weakref.WeakKeyDictionary()
 
     async def receive_from_parent_flow(self, inputs: List[Input]):
         """
@@ -312,8 +490,8 @@ class MemoryInputNetworkContext(BaseInputNetworkContext):
             return
         async with self.ctxhd_lock:
             ctx_keys = list(self.ctxhd.keys())
-        self.logger.debug(f"Receiving {inputs} from parent flow")
-        self.logger.debug(f"Forwarding inputs to contexts {ctx_keys}")
+        self.logger.debug("Receiving %s from parent flow", inputs)
+        self.logger.debug("Forwarding inputs to contexts %s", ctx_keys)
         for ctx in ctx_keys:
             await self.sadd(ctx, *inputs)
 
@@ -322,7 +500,7 @@ class MemoryInputNetworkContext(BaseInputNetworkContext):
         Takes context creation event from child dataflow to watch for results
         """
         self.logger.debug(
-            f"Received context {ctx} from child flow {ctx.orchestrator}"
+            "Received context %s from child flow %s", ctx, ctx.orchestrator
         )
         async with self.ctx_notification_set() as ctx:
             await ctx.add((None, ctx))
@@ -333,7 +511,7 @@ class MemoryInputNetworkContext(BaseInputNetworkContext):
         results.
         """
         self.logger.debug(
-            f"Received {ctx} result {result} from {ctx.orchestrator}"
+            "Received %s result %s from %s", ctx, result, ctx.orchestrator
         )
         async with self.result_notification_set() as result_ctx:
             await result_ctx.add((ctx, result))
@@ -342,12 +520,34 @@ class MemoryInputNetworkContext(BaseInputNetworkContext):
         # Grab the input set context handle
         handle = await input_set.ctx.handle()
         handle_string = handle.as_string()
-        # TODO These ctx.add calls should probably happen after inputs are in
-        # self.ctxhd
 
         # remove unvalidated inputs
         unvalidated_input_set = await input_set.remove_unvalidated_inputs()
 
+        # Associate inputs with their context handle grouped by definition.
+        # This happens before any notifications are sent so that whatever is
+        # notified always finds the new inputs within the network.
+        async with self.ctxhd_lock:
+            # Create dict for handle_string if not present
+            if not handle_string in self.ctxhd:
+                self.ctxhd[handle_string] = MemoryInputNetworkContextEntry(
+                    ctx=input_set.ctx,
+                    definitions={},
+                    by_origin={},
+                    by_origin_definition={},
+                )
+            entry = self.ctxhd[handle_string]
+            # Go through each item in the input set
+            async for item in input_set.inputs():
+                # Add input to by definition set
+                entry.definitions.setdefault(item.definition, []).append(item)
+                # Add input to by origin set
+                entry.by_origin.setdefault(item.origin, []).append(item)
+                # Add input to by origin and definition name index
+                entry.by_origin_definition.setdefault(
+                    (item.origin, item.definition.name), []
+                ).append(item)
+
         # If the context for this input set does not exist create a
         # NotificationSet for it to notify the orchestrator
         if not handle_string in self.input_notification_set:
@@ -357,30 +557,24 @@ class MemoryInputNetworkContext(BaseInputNetworkContext):
         # Add the input set to the incoming inputs
         async with self.input_notification_set[handle_string]() as ctx:
             await ctx.add((unvalidated_input_set, input_set))
-        # Associate inputs with their context handle grouped by definition
+
+    async def remove_context(self, ctx: BaseInputSetContext) -> None:
+        handle_string = (await ctx.handle()).as_string()
         async with self.ctxhd_lock:
-            # Create dict for handle_string if not present
-            if not handle_string in self.ctxhd:
-                self.ctxhd[handle_string] = MemoryInputNetworkContextEntry(
-                    ctx=input_set.ctx, definitions={}, by_origin={}
-                )
-            # Go through each item in the input set
-            async for item in input_set.inputs():
-                # Create set for item definition if not present
-                if (
-                    not item.definition
-                    in self.ctxhd[handle_string].definitions
-                ):
-                    self.ctxhd[handle_string].definitions[item.definition] = []
-                # Add input to by definition set
-                self.ctxhd[handle_string].definitions[item.definition].append(
-                    item
-                )
-                # Create set for item origin if not present
-                if not item.origin in self.ctxhd[handle_string].by_origin:
-                    self.ctxhd[handle_string].by_origin[item.origin] = []
-                # Add input to by origin set
-                self.ctxhd[handle_string].by_origin[item.origin].append(item)
+            entry = self.ctxhd.pop(handle_string, None)
+        self.input_notification_set.pop(handle_string, None)
+        if entry is None:
+            return
+        # Nothing reads context creation notifications, remove ours so that
+        # they don't accumulate
+        notification_items = self.ctx_notification_set.notification_items
+        remaining = [
+            (unused, item_ctx)
+            for unused, item_ctx in notification_items
+            if item_ctx is not entry.ctx
+        ]
+        notification_items.clear()
+        notification_items.extend(remaining)
 
     async def uadd(self, *args: Input):
         """
@@ -434,21 +628,39 @@ class MemoryInputNetworkContext(BaseInputNetworkContext):
         async with self.ctx_notification_set() as ctx:
             return await ctx.added()
 
+    def result_pending(self) -> bool:
+        """
+        True if there are context results which have not yet been retrieved
+        via :py:meth:`result`.
+        """
+        return bool(self.result_notification_set.notification_items)
+
+    def inputs_pending(self, handle_string: str) -> bool:
+        """
+        True if there are input sets within the context which have not yet
+        been retrieved via :py:meth:`added`.
+        """
+        notification_set = self.input_notification_set.get(handle_string)
+        return bool(
+            notification_set is not None
+            and notification_set.notification_items
+        )
+
     async def result(self) -> Tuple[bool, BaseInputSetContext]:
-        # Notify whatever is listening for new inputs in this context
+        # Return all the context results which have been added since the last
+        # call, waiting for at least one
         async with self.result_notification_set() as ctx:
-            more, notification_item = await ctx.added()
-            return more, [notification_item]
+            return False, await ctx.drain()
 
     async def added(
         self, watch_ctx: BaseInputSetContext
     ) -> Tuple[bool, BaseInputSet]:
         # Grab the input set context handle
         handle_string = (await watch_ctx.handle()).as_string()
-        # Notify whatever is listening for new inputs in this context
+        # Return all the input sets which have been added to this context since
+        # the last call, waiting for at least one
         async with self.input_notification_set[handle_string]() as ctx:
-            more, notification_item = await ctx.added()
-            return more, [notification_item]
+            return False, await ctx.drain()
 
     async def definition(
         self, ctx: BaseInputSetContext, definition: str
@@ -479,6 +691,32 @@ class MemoryInputNetworkContext(BaseInputNetworkContext):
     ) -> BaseDefinitionSetContext:
         return MemoryDefinitionSetContext(self.config, self, ctx)
 
+    def match_plan(
+        self, operation: Operation, dataflow: DataFlow
+    ) -> MemoryOperationMatchPlan:
+        """
+        Return the plan used to find the inputs and conditions of an operation
+        within the network. Plans are compiled once per operation within a
+        dataflow and recompiled if the operation or its input flow change.
+        """
+        plans = self.match_plans.setdefault(dataflow, {})
+        plan = plans.get(operation.instance_name, None)
+        if (
+            plan is None
+            or plan.operation is not operation
+            or plan.input_flow is not dataflow.flow[operation.instance_name]
+        ):
+            plan = MemoryOperationMatchPlan.compile(operation, dataflow)
+            plans[operation.instance_name] = plan
+        return plan
+
+    async def initialize_dataflow(self, dataflow: DataFlow) -> None:
+        """
+        Precompile match plans for all operations within the dataflow.
+        """
+        for operation in dataflow.operations.values():
+            self.match_plan(operation, dataflow)
+
     async def check_conditions(
         self,
         operation: Operation,
@@ -493,22 +731,37 @@ class MemoryInputNetworkContext(BaseInputNetworkContext):
                 return
             # Limit search to given context via context handle
             return await self._check_conditions(
-                operation, dataflow, self.ctxhd[handle_string].by_origin
+                self.match_plan(operation, dataflow),
+                self.ctxhd[handle_string],
+            )
+
+    @staticmethod
+    def _last_match(
+        entry: MemoryInputNetworkContextEntry, source: MemoryInputMatchSource
+    ) -> Optional[Input]:
+        """
+        Most recently added input matching the source
+        """
+        if len(source.definitions) == 1:
+            found = entry.by_origin_definition.get(
+                (source.origin, source.definitions[0]), None
             )
+            return found[-1] if found else None
+        for item in reversed(entry.by_origin[source.origin]):
+            if item.definition.name in source.definitions:
+                return item
+        return None
 
     async def _check_conditions(
         self,
-        operation: Operation,
-        dataflow: DataFlow,
-        by_origin: Dict[Union[str, Tuple[str, str]], List[Input]],
+        plan: MemoryOperationMatchPlan,
+        entry: MemoryInputNetworkContextEntry,
     ) -> bool:
-        # Grab the input flow to check for definition overrides
-        input_flow = dataflow.flow[operation.instance_name]
         # Return that all conditions are satisfied if there are none to satisfy
-        if not input_flow.conditions:
+        if not plan.conditions:
             return True
         # Check that all conditions are present and logicly True
-        for i, condition_source in enumerate(input_flow.conditions):
+        for sources in plan.conditions:
             # We must check if we found an Input where the definition
             # matches the definition of the condition in addition to
             # checking that the Input's value is True. If we were not
@@ -516,46 +769,14 @@ class MemoryInputNetworkContext(BaseInputNetworkContext):
             # saying that the lack of presence equates with the
             # condition being True.
             condition_found_and_true = False
-            # Create a list of places this input originates from
-            origins = []
-            if isinstance(condition_source, dict):
-                for origin in condition_source.items():
-                    origins.append(origin)
-            else:
-                origins.append(condition_source)
             # Ensure all conditions from all origins are True
-            for origin in origins:
-                # See comment in input_flow.inputs section
-                (
-                    alternate_definitions,
-                    origin,
-                ) = input_flow.get_alternate_definitions(origin)
+            for source in sources:
                 # Bail if the condition doesn't exist
-                if not origin in by_origin:
+                if not source.origin in entry.by_origin:
                     return
                 # Bail if the condition is not True
-                for item in by_origin[origin]:
-                    # TODO(p2) Alright, this shits fucked, way not clean
-                    # / clear. We're just trying to skip any conditions
-                    # (and inputs for input_flow.inputs.items()) where
-                    # the definition doesn't match, but it's within the
-                    # correct origin.
-                    if alternate_definitions:
-                        if item.definition.name not in alternate_definitions:
-                            continue
-                    elif isinstance(condition_source, str):
-                        if (
-                            item.definition.name
-                            != operation.conditions[i].name
-                        ):
-                            continue
-                    elif (
-                        item.definition.name
-                        != dataflow.operations[origin[0]]
-                        .outputs[origin[1]]
-                        .name
-                    ):
-                        continue
+                item = self._last_match(entry, source)
+                if item is not None:
                     condition_found_and_true = bool(item.value)
             # Ensure we were able to find a condition within the input
             # network, and that when we found it it's value was True.
@@ -563,15 +784,214 @@ class MemoryInputNetworkContext(BaseInputNetworkContext):
                 return True
         return False
 
+    @staticmethod
+    def _ancestry_matches(
+        item: Input,
+        operation: Operation,
+        input_name: str,
+        source: MemoryInputMatchSource,
+    ) -> bool:
+        """
+        When the input_source is a list of alternate definitions we need to
+        check each parent to verity that it's origin matches with the list
+        given by input_source
+        """
+        current_parent = item
+        for ancestor_origin in source.ancestor_origins[1:]:
+            # Go through all the parents. Create a list of possible parents
+            # based on if their origin matches the alternate definition
+            possible_parents = [
+                parent
+                for parent in current_parent.parents
+                if parent.origin == ancestor_origin
+            ]
+            if not possible_parents:
+                # If we didn't find any ancestor paths that matched then we
+                # don't use this Input
+                return False
+            elif len(possible_parents) > 1:
+                # TODO Go through each option and check if either is a viable
+                # option. Our current implementation only allows for valeting
+                # one path, due to a single current_parent If there is more
+                # than one option raise an error since we don't know who to
+                # choose
+                raise MultipleAncestorsFoundError(
+                    (
+                        operation.instance_name,
+                        input_name,
+                        ancestor_origin,
+                        [parent.export() for parent in possible_parents],
+                    )
+                )
+            # The current_parent becomes the only possible parent
+            current_parent = possible_parents[0]
+        return True
+
+    def _gather(
+        self,
+        plan: MemoryOperationMatchPlan,
+        entry: MemoryInputNetworkContextEntry,
+        input_name: str,
+    ) -> Optional[List[Parameter]]:
+        """
+        Create parameters for all the inputs within a context which could be
+        used for an operation's input. Returns None if there are no inputs and
+        no default value for the input.
+        """
+        operation = plan.operation
+        gathered = [
+            Parameter(
+                key=input_name,
+                value=item.value,
+                origin=item,
+                definition=operation.inputs[input_name],
+            )
+            for source in plan.inputs[input_name]
+            for definition_name in source.definitions
+            for item in entry.by_origin_definition.get(
+                (source.origin, definition_name), ()
+            )
+            if self._ancestry_matches(item, operation, input_name, source)
+        ]
+        # There is no data in the network for an input
+        if not gathered:
+            # Check if there is a default value for the parameter, if so use
+            # it. If there is no default value, we don't have a complete
+            # parameter set
+            default = plan.default(input_name)
+            if default is None:
+                return None
+            gathered.append(
+                Parameter(
+                    key=input_name,
+                    value=default.value,
+                    origin=default,
+                    definition=operation.inputs[input_name],
+                )
+            )
+        return gathered
+
+    def _gather_new(
+        self,
+        plan: MemoryOperationMatchPlan,
+        new_inputs: List[Input],
+        input_name: str,
+    ) -> List[Parameter]:
+        """
+        Create parameters for the new inputs which could be used for an
+        operation's input.
+        """
+        operation = plan.operation
+        return [
+            Parameter(
+                key=input_name,
+                value=item.value,
+                origin=item,
+                definition=operation.inputs[input_name],
+            )
+            for source in plan.inputs[input_name]
+            for item in new_inputs
+            if item.origin == source.origin
+            and item.definition.name in source.definitions
+            and self._ancestry_matches(item, operation, input_name, source)
+        ]
+
+    def _semi_naive_permutations(
+        self,
+        plan: MemoryOperationMatchPlan,
+        entry: MemoryInputNetworkContextEntry,
+        new_inputs: List[Input],
+    ) -> Optional[Iterator[Tuple[Parameter]]]:
+        """
+        Generate only the permutations of inputs which contain at least one of
+        the new inputs. For each input of the operation which has new inputs,
+        pair those new inputs with the old inputs for all of the operation's
+        inputs before it, and all the inputs (old and new) for all of the
+        operation's inputs after it. This way each permutation is generated
+        exactly once.
+
+        Returns None if the full set of permutations should be generated
+        instead.
+        """
+        # If one of the new inputs is a condition for the operation it may
+        # have made permutations which already existed runnable
+        new_keys = set(
+            (item.origin, item.definition.name) for item in new_inputs
+        )
+        for sources in plan.conditions:
+            for source in sources:
+                for definition_name in source.definitions:
+                    if (source.origin, definition_name) in new_keys:
+                        return None
+        input_names = list(plan.inputs.keys())
+        new = {
+            input_name: self._gather_new(plan, new_inputs, input_name)
+            for input_name in input_names
+        }
+        if not any(new.values()):
+            # If every input has a default value the permutation of default
+            # values may have become runnable
+            if all(map(plan.default, input_names)):
+                return None
+            return iter(())
+        new_uids = set(
+            parameter.origin.uid
+            for parameters in new.values()
+            for parameter in parameters
+        )
+        # All inputs for an operation's input, lazily gathered
+        gathered = {}
+        permutations = []
+        for i, input_name in enumerate(input_names):
+            if not new[input_name]:
+                continue
+            lists = []
+            for j, other_input_name in enumerate(input_names):
+                if j == i:
+                    lists.append(new[input_name])
+                    continue
+                if not other_input_name in gathered:
+                    gathered[other_input_name] = self._gather(
+                        plan, entry, other_input_name
+                    )
+                # We don't have a complete parameter set
+                if gathered[other_input_name] is None:
+                    return iter(())
+                if j < i:
+                    lists.append(
+                        [
+                            parameter
+                            for parameter in gathered[other_input_name]
+                            if parameter.origin.uid not in new_uids
+                        ]
+                    )
+                else:
+                    lists.append(gathered[other_input_name])
+            permutations.append(product(*lists))
+        return itertools.chain(*permutations)
+
     async def gather_inputs(
         self,
         rctx: "BaseRedundancyCheckerContext",
         operation: Operation,
         dataflow: DataFlow,
         ctx: Optional[BaseInputSetContext] = None,
+        *,
+        new_input_set: Optional[BaseInputSet] = None,
     ) -> AsyncIterator[BaseParameterSet]:
-        # Create a mapping of definitions to inputs for that definition
-        gather: Dict[str, List[Parameter]] = {}
+        """
+        If new_input_set is given, only permutations which contain at least
+        one input from it are generated (semi-naive evaluation). Otherwise
+        all permutations of inputs within the context are generated.
+        """
+        # Lookup plan for finding inputs for the operation
+        plan = self.match_plan(operation, dataflow)
+        # Permutations of parameters
+        permutations = None
+        # The new inputs, only used when searching within a single context
+        new_inputs = None
+        if new_input_set is not None and ctx is not None:
+            new_inputs = [item async for item in new_input_set.inputs()]
         async with self.ctxhd_lock:
             # If no context is given we will generate input pairs for all
             # contexts
@@ -585,197 +1005,38 @@ class MemoryInputNetworkContext(BaseInputNetworkContext):
                     return
                 # Limit search to given context via context handle
                 contexts = [self.ctxhd[handle_string]]
-            for ctx, _, by_origin in contexts:
+            for entry in contexts:
+                ctx = entry.ctx
                 # Ensure we were able to find a condition within the input
                 # network, and that when we found it it's value was True.
-                if not await self._check_conditions(
-                    operation, dataflow, by_origin
-                ):
+                if not await self._check_conditions(plan, entry):
                     return
-                # Grab the input flow to check for definition overrides
-                input_flow = dataflow.flow[operation.instance_name]
+                if new_inputs is not None:
+                    permutations = self._semi_naive_permutations(
+                        plan, entry, new_inputs
+                    )
+                    if permutations is not None:
+                        permutations = list(permutations)
+                        continue
+                # Create a mapping of definitions to inputs for that definition
+                gather: Dict[str, List[Parameter]] = {}
                 # Gather all inputs with matching definitions and contexts
-                for input_name, input_sources in input_flow.inputs.items():
-                    # Create parameters for all the inputs
-                    gather[input_name] = []
-                    for input_source in input_sources:
-                        # Create a list of places this input originates from
-                        origins = []
-                        # Handle the case where we look at the first instance in
-                        # the list for the immediate alternate definition then
-                        # trace back through input origins to make sure they all
-                        # match
-                        if isinstance(input_source, list):
-                            # TODO Refactor this since we have duplicate code
-                            if isinstance(input_source[0], dict):
-                                for origin in input_source[0].items():
-                                    origins.append(origin)
-                            else:
-                                origins.append(input_source[0])
-                        elif isinstance(input_source, dict):
-                            for origin in input_source.items():
-                                origins.append(origin)
-                        else:
-                            origins.append(input_source)
-                        for origin in origins:
-                            # Check if the origin is a tuple where the first
-                            # value is the origin (such as "seed") and the
-                            # second value is an array of allowed alternate
-                            # Definition's (their names) within that origin.
-                            # These definitions will be used instead of the
-                            # default one the input specified for the
-                            # operation).
-                            (
-                                alternate_definitions,
-                                origin,
-                            ) = input_flow.get_alternate_definitions(origin)
-                            # Don't try to grab inputs from an origin that
-                            # doesn't have any to give us
-                            if not origin in by_origin:
-                                continue
-                            # Generate parameters from inputs
-                            for item in by_origin[origin]:
-                                # TODO(p2) We favored comparing names to
-                                # definitions because sometimes we create
-                                # definitions which have specs which create new
-                                # types which will not equal each other. We
-                                # maybe want to consider switching to comparing
-                                # exported Definitions
-                                if alternate_definitions:
-                                    if (
-                                        item.definition.name
-                                        not in alternate_definitions
-                                    ):
-                                        continue
-                                elif isinstance(origin, str):
-                                    if (
-                                        item.definition.name
-                                        != operation.inputs[input_name].name
-                                    ):
-                                        continue
-                                elif (
-                                    item.definition.name
-                                    != dataflow.operations[origin[0]]
-                                    .outputs[origin[1]]
-                                    .name
-                                ):
-                                    continue
-                                # When the input_source is a list of alternate
-                                # definitions we need to check each parent to
-                                # verity that it's origin matches with the list
-                                # given by input_source
-                                if isinstance(input_source, list):
-                                    all_parent_origins_match = True
-                                    # Make a list of all the origins
-                                    ancestor_origins = []
-                                    for ancestor_origin in input_source:
-                                        if isinstance(ancestor_origin, dict):
-                                            for (
-                                                ancestor_origin
-                                            ) in ancestor_origin.items():
-                                                ancestor_origins.append(
-                                                    ancestor_origin
-                                                )
-                                        else:
-                                            ancestor_origins.append(
-                                                ancestor_origin
-                                            )
-                                    i = 1
-                                    current_parent = item
-                                    while i < len(ancestor_origins):
-                                        ancestor_origin = ancestor_origins[i]
-                                        # Go through all the parents. Create a
-                                        # list of possible parents based on if
-                                        # their origin matches the alternate
-                                        # definition
-                                        possible_parents = [
-                                            parent
-                                            for parent in current_parent.parents
-                                            # If the input source is a dict then
-                                            # we need to convert it to a tuple
-                                            # for comparison to the origin
-                                            if parent.origin == ancestor_origin
-                                        ]
-                                        if not possible_parents:
-                                            all_parent_origins_match = False
-                                            break
-                                        elif len(possible_parents) > 1:
-                                            # TODO Go through each option and
-                                            # check if either is a viable
-                                            # option. Our current implementation
-                                            # only allows for valeting one path,
-                                            # due to a single current_parent
-                                            # If there is more than one option
-                                            # raise an error since we don't know
-                                            # who to choose
-                                            raise MultipleAncestorsFoundError(
-                                                (
-                                                    operation.instance_name,
-                                                    input_name,
-                                                    ancestor_origin,
-                                                    [
-                                                        parent.__dict__
-                                                        for parent in possible_parents
-                                                    ],
-                                                )
-                                            )
-                                        # Move on to the next origin to validate
-                                        i += 1
-                                        # The current_parent becomes the only
-                                        # possible parent
-                                        current_parent = possible_parents[0]
-                                    # If we didn't find any ancestor paths that
-                                    # matched then we don't use this Input
-                                    if not all_parent_origins_match:
-                                        continue
-                                gather[input_name].append(
-                                    Parameter(
-                                        key=input_name,
-                                        value=item.value,
-                                        origin=item,
-                                        definition=operation.inputs[
-                                            input_name
-                                        ],
-                                    )
-                                )
-                    # There is no data in the network for an input
-                    if not gather[input_name]:
-                        # Check if there is a default value for the parameter,
-                        # if so use it. That default will either come from the
-                        # definition attached to input_name, or it will come
-                        # from one of the alternate definition given within the
-                        # input flow for the input_name.
-                        check_for_default_value = [
-                            operation.inputs[input_name]
-                        ]
-                        for definition in check_for_default_value:
-                            # Check if the definition has a default value that is not _NO_DEFAULT
-                            if "dffml.df.types._NO_DEFAULT" not in repr(
-                                definition.default
-                            ):
-                                gather[input_name].append(
-                                    Parameter(
-                                        key=input_name,
-                                        value=definition.default,
-                                        origin=item,
-                                        definition=operation.inputs[
-                                            input_name
-                                        ],
-                                    )
-                                )
-                                break
-                        # If there is no default value, we don't have a complete
-                        # parameter set, so we bail out
-                        else:
-                            return
-        # Generate all possible permutations of applicable inputs
+                for input_name in plan.inputs:
+                    gather[input_name] = self._gather(plan, entry, input_name)
+                    # We don't have a complete parameter set, so we bail out
+                    if gather[input_name] is None:
+                        return
+                # Generate all possible permutations of applicable inputs
+                permutations = list(product(*list(gather.values())))
+        if permutations is None:
+            return
         # Create the parameter set for each
         products = list(
             map(
                 lambda permutation: MemoryParameterSet(
                     MemoryParameterSetConfig(ctx=ctx, parameters=permutation)
                 ),
-                product(*list(gather.values())),
+                permutations,
             )
         )
         # Check if each permutation has been executed before
@@ -885,8 +1146,8 @@ class MemoryRedundancyCheckerContext(BaseRedundancyCheckerContext):
         SHA384 hash of the parameter set context handle as a string, the
         operation.instance_name, and the sorted list of input uuids.
         """
-        uid_list = [instance_name, handle] + sorted(uids)
-        return secure_hash("".join(uid_list), "sha384")
+        uid_list = [instance_name, handle] + sorted(map(str, uids))
+        return secure_hash("\n".join(uid_list), "sha384")
 
     async def unique(
         self, operation: Operation, parameter_set: BaseParameterSet
@@ -972,6 +1233,83 @@ class MemoryRedundancyChecker(BaseRedundancyChecker, BaseMemoryDataFlowObject):
         await self.__stack.__aexit__(exc_type, exc_value, traceback)
 
 
+@config
+class MemorySetRedundancyCheckerConfig:
+    pass
+
+
+class MemorySetRedundancyCheckerContext(BaseRedundancyCheckerContext):
+    def __init__(
+        self, config: BaseConfig, parent: "MemorySetRedundancyChecker"
+    ) -> None:
+        super().__init__(config, parent)
+        # Maps context handle strings to the set of (operation.instance_name,
+        # frozenset of input uids) which have been taken within that context
+        self.taken: Dict[str, Set[Tuple[str, FrozenSet[str]]]] = {}
+
+    async def unique(
+        self, operation: Operation, parameter_set: BaseParameterSet
+    ) -> Tuple[str, str, FrozenSet[str]]:
+        """
+        Tuple of the operation.instance_name, the parameter set context handle
+        as a string, and the set of input uuids.
+        """
+        return (
+            operation.instance_name,
+            (await parameter_set.ctx.handle()).as_string(),
+            frozenset(
+                [item.origin.uid async for item in parameter_set.parameters()]
+            ),
+        )
+
+    async def exists(
+        self, operation: Operation, parameter_set: BaseParameterSet
+    ) -> bool:
+        instance_name, handle_string, uids = await self.unique(
+            operation, parameter_set
+        )
+        return (instance_name, uids) in self.taken.get(handle_string, ())
+
+    async def add(self, operation: Operation, parameter_set: BaseParameterSet):
+        instance_name, handle_string, uids = await self.unique(
+            operation, parameter_set
+        )
+        self.taken.setdefault(handle_string, set()).add((instance_name, uids))
+
+    async def take_if_non_existant(
+        self, operation: Operation, *parameter_sets: BaseParameterSet
+    ) -> bool:
+        for parameter_set in parameter_sets:
+            instance_name, handle_string, uids = await self.unique(
+                operation, parameter_set
+            )
+            taken = self.taken.setdefault(handle_string, set())
+            # No await between the check and the add, so no other coroutine
+            # can take the same parameter set in between
+            key = (instance_name, uids)
+            if key in taken:
+                yield parameter_set, False
+            else:
+                taken.add(key)
+                yield parameter_set, True
+
+    async def remove_context(self, ctx: BaseInputSetContext) -> None:
+        self.taken.pop((await ctx.handle()).as_string(), None)
+
+
+@entrypoint("memory.set")
+class MemorySetRedundancyChecker(
+    BaseRedundancyChecker, BaseMemoryDataFlowObject
+):
+    """
+    Redundancy Checker backed by a set per context. Unlike the key value store
+    backed checker nothing is hashed and nothing is persisted.
+    """
+
+    CONTEXT = MemorySetRedundancyCheckerContext
+    CONFIG = MemorySetRedundancyCheckerConfig
+
+
 @config
 class MemoryLockNetworkConfig:
     pass
@@ -984,6 +1322,12 @@ class MemoryLockNetworkContext(BaseLockNetworkContext):
         super().__init__(config, parent)
         self.lock = asyncio.Lock()
         self.locks: Dict[str, asyncio.Lock] = {}
+        # Maps context handle strings to the uids of inputs locked within them,
+        # and input uids to the context handle strings they were locked within.
+        # The same input may be within multiple contexts (for instance inputs
+        # forwarded from a parent flow)
+        self.ctx_locks: Dict[str, Set[str]] = {}
+        self.lock_ctxs: Dict[str, Set[str]] = {}
 
     @asynccontextmanager
     async def acquire(
@@ -995,64 +1339,83 @@ class MemoryLockNetworkContext(BaseLockNetworkContext):
         """
         Acquire the lock for each input in the input set which must be locked
         prior to running an operation using the input.
+
+        Locks are always taken in order of input uid, so that operations
+        needing overlapping sets of locks can't deadlock.
         """
+        # Inputs which must be locked, out of the inputs and their ancestors,
+        # are found when each input is created
+        lock_inputs = set()
+        async for parameter in parameter_set.parameters():
+            lock_inputs.update(parameter.origin.lock_inputs)
+        if not lock_inputs:
+            yield
+            return
         need_lock = {}
-        # Acquire the master lock to find and or create needed locks
-        async with self.lock:
-            # Get all the inputs up the ancestry tree
-            inputs = [
-                item
-                async for item in parameter_set.inputs_and_parents_recursive()
-            ]
-            # Only lock the ones which require it
-            for item in filter(lambda item: item.definition.lock, inputs):
-                # Create the lock for the input if not present
-                if not item.uid in self.locks:
-                    self.locks[item.uid] = asyncio.Lock()
-                # Retrieve the lock
-                need_lock[item.uid] = (item, self.locks[item.uid])
+        handle_string = (await parameter_set.ctx.handle()).as_string()
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        # There are no awaits while the needed locks are found or created, so
+        # no other coroutine can modify them in the meantime
+        for item in sorted(lock_inputs, key=lambda item: str(item.uid)):
+            # Create the lock for the input if not present
+            if not item.uid in self.locks:
+                self.locks[item.uid] = asyncio.Lock()
+            self.ctx_locks.setdefault(handle_string, set()).add(item.uid)
+            self.lock_ctxs.setdefault(item.uid, set()).add(handle_string)
+            # Retrieve the lock
+            need_lock[item.uid] = (item, self.locks[item.uid])
         # Use AsyncExitStack to lock the variable amount of inputs required
         async with AsyncExitStack() as stack:
             # Take all the locks we found we needed for this parameter set
             for _uid, (item, lock) in need_lock.items():
                 # Take the lock
-                if operation is not None:
-                    self.logger.debug(
-                        "%s acquiring: %s(%r)", operation, item.uid, item.value
-                    )
-                elif hasattr(lock, "operation") and operation is not None:
-                    self.logger.debug(
-                        "%s acquiring: %s(%r) (previously held by %s)",
-                        operation,
-                        item.uid,
-                        item.value,
-                        lock.operation,
-                    )
-                elif hasattr(lock, "operation"):
-                    self.logger.debug(
-                        "Acquiring: %s(%r) (previously held by %s)",
-                        item.uid,
-                        item.value,
-                        lock.operation,
-                    )
-                else:
-                    self.logger.debug(
-                        "Acquiring: %s(%r)", item.uid, item.value
-                    )
+                if debug:
+                    if operation is not None:
+                        self.logger.debug(
+                            "%s acquiring: %s(%r)",
+                            operation,
+                            item.uid,
+                            item.value,
+                        )
+                    elif hasattr(lock, "operation"):
+                        self.logger.debug(
+                            "Acquiring: %s(%r) (previously held by %s)",
+                            item.uid,
+                            item.value,
+                            lock.operation,
+                        )
+                    else:
+                        self.logger.debug(
+                            "Acquiring: %s(%r)", item.uid, item.value
+                        )
                 await stack.enter_async_context(lock)
                 if operation is not None:
                     lock.operation = operation
-                    self.logger.debug(
-                        "Acquiring: %s(%r) (now held by %s)",
-                        item.uid,
-                        item.value,
-                        lock.operation,
-                    )
-                else:
-                    self.logger.debug("Acquired: %s(%r)", item.uid, item.value)
+                if debug:
+                    if operation is not None:
+                        self.logger.debug(
+                            "Acquiring: %s(%r) (now held by %s)",
+                            item.uid,
+                            item.value,
+                            lock.operation,
+                        )
+                    else:
+                        self.logger.debug(
+                            "Acquired: %s(%r)", item.uid, item.value
+                        )
             # All locks for these parameters have been acquired
             yield
 
+    async def remove_context(self, ctx: BaseInputSetContext) -> None:
+        handle_string = (await ctx.handle()).as_string()
+        async with self.lock:
+            for uid in self.ctx_locks.pop(handle_string, ()):
+                self.lock_ctxs[uid].discard(handle_string)
+                # Only remove the lock once no context uses the input
+                if not self.lock_ctxs[uid]:
+                    del self.lock_ctxs[uid]
+                    del self.locks[uid]
+
 
 @entrypoint("memory")
 class MemoryLockNetwork(BaseLockNetwork, BaseMemoryDataFlowObject):
@@ -1061,12 +1424,105 @@ class MemoryLockNetwork(BaseLockNetwork, BaseMemoryDataFlowObject):
     CONFIG = MemoryLockNetworkConfig
 
 
+MEMORYOPIMPNETWORKCONFIG_EXECUTOR: str = "inline"
+
+
+class MemoryBatchEntry(NamedTuple):
+    """
+    Inputs for one parameter set waiting to be run as part of a batch, and
+    the future its outputs will be set on
+    """
+
+    ctx: BaseInputSetContext
+    inputs: Dict[str, Any]
+    future: asyncio.Future
+
+
+class OperationTrace(NamedTuple):
+    """
+    Passed to the ``trace`` hook of the memory operation implementation
+    network when an operation starts (``event`` is ``"start"``) and stops
+    (``event`` is ``"stop"``) running. Values are never converted to strings,
+    sizes are their lengths, or None for values without one.
+    """
+
+    event: str
+    instance_name: str
+    ctx: BaseInputSetContext
+    input_sizes: Dict[str, Optional[int]]
+    # Seconds the operation ran for, only set when it stops
+    duration: Optional[float] = None
+    # Exception the operation raised, if any, only set when it stops
+    error: Optional[BaseException] = None
+
+
+def value_size(value: Any) -> Optional[int]:
+    """
+    Length of a value if it has one, without looking at its contents
+    """
+    try:
+        return len(value)
+    except Exception:
+        return None
+
+
+def cache_key_default(value: Any) -> Any:
+    """
+    Export values which aren't JSON serializable for
+    :py:meth:`MemoryOperationImplementationNetworkContext.cache_key`. Sets are
+    sorted, and functions and classes are referred to by name, so that the
+    same value always has the same key.
+    """
+    if isinstance(value, (set, frozenset)):
+        return sorted(
+            value,
+            key=lambda item: json.dumps(
+                item, sort_keys=True, default=cache_key_default
+            ),
+        )
+    if isinstance(value, bytes):
+        return {"bytes": value.hex()}
+    if inspect.isfunction(value) or inspect.isclass(value):
+        return f"{value.__module__}.{value.__qualname__}"
+    exported = {}
+    export_value(exported, "value", value)
+    if "value" not in exported:
+        raise TypeError(
+            f"Object of type {type(value).__qualname__} can't be exported"
+        )
+    return exported["value"]
+
+
 @config
 class MemoryOperationImplementationNetworkConfig:
     operations: Dict[str, OperationImplementation] = field(
         "Operation implementations to load on initialization",
         default_factory=lambda: {},
     )
+    executor: str = field(
+        "Where to run non-async operations which don't set an executor: inline, thread, or process",
+        default=MEMORYOPIMPNETWORKCONFIG_EXECUTOR,
+    )
+    workers: int = field(
+        "Maximum number of workers in the thread and process pools",
+        default=None,
+    )
+    max_concurrency: Dict[str, int] = field(
+        "Maximum number of concurrent runs for operations by instance name",
+        default_factory=lambda: {},
+    )
+    cache: BaseKeyValueStore = field(
+        "Key value store to cache the outputs of operations which set cache in",
+        default=None,
+    )
+    cache_ttl: Dict[str, float] = field(
+        "Seconds cached outputs are valid for by instance name. Operations listed are cached even if they don't set cache. Zero or less means never expire",
+        default_factory=lambda: {},
+    )
+    trace: Callable[[OperationTrace], None] = field(
+        "Called with an OperationTrace when each operation starts and stops running",
+        default=None,
+    )
 
 
 class MemoryOperationImplementationNetworkContext(
@@ -1081,12 +1537,40 @@ class MemoryOperationImplementationNetworkContext(
         self.opimps = self.parent.config.operations
         self.operations = {}
         self.completed_event = asyncio.Event()
+        # Thread and process pools, created when first needed
+        self.pools: Dict[str, concurrent.futures.Executor] = {}
+        # Maps operation instance names to semaphores limiting concurrency
+        self.semaphores: Dict[str, asyncio.Semaphore] = {}
+        # Parameter sets waiting to be run together by operations which
+        # accept batches, by orchestrator context and operation instance name
+        self.batches: Dict[
+            Tuple[BaseOrchestratorContext, str], List[MemoryBatchEntry]
+        ] = {}
+        # Timers which will run batches that are not yet full
+        self.batch_timers: Dict[
+            Tuple[BaseOrchestratorContext, str], asyncio.TimerHandle
+        ] = {}
+        # Batches currently running
+        self.batch_tasks: Set[asyncio.Task] = set()
+        # Key value store context outputs of operations are cached in
+        self.cachectx: Optional[BaseKeyValueStoreContext] = None
 
     async def __aenter__(
         self,
     ) -> "MemoryOperationImplementationNetworkContext":
         self._stack = AsyncExitStack()
         await self._stack.__aenter__()
+        self.pools = {}
+        self.semaphores = {}
+        self.batches = {}
+        self.batch_timers = {}
+        self.batch_tasks = set()
+        self._stack.callback(self.cancel_batches)
+        self.cachectx = None
+        if self.parent.cache is not None:
+            self.cachectx = await self._stack.enter_async_context(
+                self.parent.cache()
+            )
         self.operations = {
             opimp.op.name: await self._stack.enter_async_context(opimp)
             for opimp in self.opimps.values()
@@ -1157,6 +1641,152 @@ class MemoryOperationImplementationNetworkContext(
             operation.instance_name
         ] = await self._stack.enter_async_context(opimp(config))
 
+    def pool(self, executor: str) -> concurrent.futures.Executor:
+        """
+        Thread or process pool shared by all operations in this network
+        """
+        if executor not in self.pools:
+            if executor == "thread":
+                pool_cls = concurrent.futures.ThreadPoolExecutor
+            elif executor == "process":
+                pool_cls = concurrent.futures.ProcessPoolExecutor
+            else:
+                raise ValueError(
+                    f"Unknown executor {executor!r}, must be one of: inline, thread, process"
+                )
+            self.pools[executor] = self._stack.enter_context(
+                pool_cls(max_workers=self.parent.config.workers)
+            )
+        return self.pools[executor]
+
+    async def run_sync(
+        self, operation: Operation, func, inputs: Dict[str, Any]
+    ) -> Any:
+        """
+        Call a non-async function implementing an operation inline, or within
+        the thread or process pool if that's the operation's executor.
+        Functions run in a process pool must be picklable, as must their
+        inputs.
+        """
+        executor = operation.executor
+        if executor is None:
+            executor = self.parent.config.executor
+        if executor == "inline":
+            return func(**inputs)
+        return await asyncio.get_running_loop().run_in_executor(
+            self.pool(executor), functools.partial(func, **inputs)
+        )
+
+    def semaphore(self, operation: Operation) -> Optional[asyncio.Semaphore]:
+        """
+        Semaphore limiting the number of concurrent runs of an operation, or
+        None if the operation is not limited.
+        """
+        if operation.instance_name not in self.semaphores:
+            max_concurrency = self.parent.config.max_concurrency.get(
+                operation.instance_name, operation.max_concurrency
+            )
+            self.semaphores[operation.instance_name] = (
+                asyncio.Semaphore(max_concurrency)
+                if max_concurrency is not None
+                else None
+            )
+        return self.semaphores[operation.instance_name]
+
+    async def run_batched(
+        self,
+        ctx: BaseInputSetContext,
+        octx: BaseOrchestratorContext,
+        operation: Operation,
+        inputs: Dict[str, Any],
+    ) -> Union[bool, Dict[str, Any]]:
+        """
+        Add the inputs for one parameter set to the operation's next batch and
+        return the outputs for that parameter set once the batch has run.
+        """
+        key = (octx, operation.instance_name)
+        future = asyncio.get_running_loop().create_future()
+        batch = self.batches.setdefault(key, [])
+        batch.append(MemoryBatchEntry(ctx=ctx, inputs=inputs, future=future))
+        if len(batch) >= operation.batch:
+            self.run_batch(octx, operation)
+        elif len(batch) == 1:
+            self.batch_timers[key] = asyncio.get_running_loop().call_later(
+                (operation.batch_wait or 0) / 1000,
+                self.run_batch,
+                octx,
+                operation,
+            )
+        return await future
+
+    def run_batch(
+        self, octx: BaseOrchestratorContext, operation: Operation
+    ) -> None:
+        """
+        Start running the parameter sets waiting in the operation's batch
+        """
+        key = (octx, operation.instance_name)
+        timer = self.batch_timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self.batches.pop(key, None)
+        if not batch:
+            return
+        task = asyncio.create_task(
+            self.run_batch_entries(octx, operation, batch)
+        )
+        self.batch_tasks.add(task)
+        task.add_done_callback(self.batch_tasks.discard)
+
+    async def run_batch_entries(
+        self,
+        octx: BaseOrchestratorContext,
+        operation: Operation,
+        batch: List["MemoryBatchEntry"],
+    ) -> None:
+        """
+        Run the operation once for all the entries in a batch and hand each
+        entry its outputs. The operation implementation context is created
+        with the context of the first entry.
+        """
+        try:
+            outputs = await self.run(
+                batch[0].ctx,
+                octx,
+                operation,
+                {
+                    name: [entry.inputs[name] for entry in batch]
+                    for name in batch[0].inputs
+                },
+            )
+            if outputs is None or len(outputs) != len(batch):
+                raise ValueError(
+                    f"{operation.instance_name}: batched operation must return a list of outputs, one for each of the {len(batch)} parameter sets it was given: {outputs!r}"
+                )
+        except Exception as error:
+            for entry in batch:
+                if not entry.future.done():
+                    entry.future.set_exception(error)
+            return
+        for entry, entry_outputs in zip(batch, outputs):
+            if not entry.future.done():
+                entry.future.set_result(entry_outputs)
+
+    def cancel_batches(self) -> None:
+        """
+        Cancel batches which have not yet run or are still running
+        """
+        for timer in self.batch_timers.values():
+            timer.cancel()
+        for batch in self.batches.values():
+            for entry in batch:
+                entry.future.cancel()
+        for task in self.batch_tasks:
+            task.cancel()
+        self.batch_timers = {}
+        self.batches = {}
+        self.batch_tasks = set()
+
     async def ensure_contains(self, operation: Operation):
         """
         Raise errors if we don't have and can't instantiate an operation.
@@ -1170,6 +1800,22 @@ class MemoryOperationImplementationNetworkContext(
                     operation.instance_name
                 )
 
+    def trace_hooks(
+        self, octx: BaseOrchestratorContext
+    ) -> List[Callable[[OperationTrace], None]]:
+        """
+        Functions to call with traces of operations run for an orchestrator
+        context. The network's trace option and the orchestrator context's
+        profiler, if either are set.
+        """
+        hooks = []
+        if self.parent.config.trace is not None:
+            hooks.append(self.parent.config.trace)
+        profiler = getattr(octx, "profiler", None)
+        if profiler is not None:
+            hooks.append(profiler.trace)
+        return hooks
+
     async def run_no_retry(
         self,
         ctx: BaseInputSetContext,
@@ -1183,50 +1829,180 @@ class MemoryOperationImplementationNetworkContext(
         # Check that our network contains the operation
         await self.ensure_contains(operation)
         # Create an opimp context and run the operation
+        # Only format inputs and outputs if they will be logged
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        hooks = self.trace_hooks(octx)
         async with self.operations[operation.instance_name](
             ctx, octx
         ) as opctx:
-            self.logger.debug("---")
-            self.logger.debug(
-                "%s Stage: %s: %s",
-                operation.instance_name,
-                operation.stage.value.upper(),
-                operation.instance_name,
-            )
-            str_inputs = str(inputs)
-            self.logger.debug(
-                "%s Inputs: %s",
-                operation.instance_name,
-                str_inputs
-                if len(str_inputs) < 512
-                else (str_inputs[:512] + "..."),
+            if debug:
+                self.logger.debug("---")
+                self.logger.debug(
+                    "%s Stage: %s: %s",
+                    operation.instance_name,
+                    operation.stage.value.upper(),
+                    operation.instance_name,
+                )
+                str_inputs = str(inputs)
+                self.logger.debug(
+                    "%s Inputs: %s",
+                    operation.instance_name,
+                    str_inputs
+                    if len(str_inputs) < 512
+                    else (str_inputs[:512] + "..."),
+                )
+                self.logger.debug(
+                    "%s Conditions: %s",
+                    operation.instance_name,
+                    {
+                        condition.name: True
+                        for condition in operation.conditions
+                    },
+                )
+            if hooks:
+                input_sizes = {
+                    name: value_size(value) for name, value in inputs.items()
+                }
+                started = OperationTrace(
+                    "start", operation.instance_name, ctx, input_sizes
+                )
+                for hook in hooks:
+                    hook(started)
+                start = time.perf_counter()
+            semaphore = self.semaphore(operation)
+            error = None
+            try:
+                if semaphore is None:
+                    outputs = await opctx.run(inputs)
+                else:
+                    async with semaphore:
+                        outputs = await opctx.run(inputs)
+            except BaseException as exception:
+                error = exception
+                raise
+            finally:
+                if hooks:
+                    stopped = OperationTrace(
+                        "stop",
+                        operation.instance_name,
+                        ctx,
+                        input_sizes,
+                        time.perf_counter() - start,
+                        error,
+                    )
+                    for hook in hooks:
+                        hook(stopped)
+            if debug:
+                str_outputs = str(outputs)
+                self.logger.debug(
+                    "%s Outputs: %s",
+                    operation.instance_name,
+                    str_outputs
+                    if len(str_outputs) < 512
+                    else (str_outputs[:512] + "..."),
+                )
+                self.logger.debug("---")
+            return outputs
+
+    async def run(
+        self,
+        ctx: BaseInputSetContext,
+        octx: BaseOrchestratorContext,
+        operation: Operation,
+        inputs: Dict[str, Any],
+    ) -> Union[bool, Dict[str, Any]]:
+        """
+        Run an operation in our network. If the operation is cached, outputs
+        are looked up in the cache first and saved to it after running.
+        """
+        key = None
+        if self.cached(operation):
+            key = self.cache_key(operation, inputs)
+        if key is not None:
+            hit, outputs = await self.cache_get(key)
+            if hit:
+                self.logger.debug("%s Cache hit", operation.instance_name)
+                return outputs
+        outputs = await self.run_retry(ctx, octx, operation, inputs)
+        if key is not None and not inspect.isasyncgen(outputs):
+            await self.cache_set(operation, key, outputs)
+        return outputs
+
+    def cached(self, operation: Operation) -> bool:
+        """
+        True if the outputs of an operation should be cached
+        """
+        return self.cachectx is not None and (
+            operation.cache
+            or operation.instance_name in self.parent.config.cache_ttl
+        )
+
+    def cache_key(
+        self, operation: Operation, inputs: Dict[str, Any]
+    ) -> Optional[str]:
+        """
+        SHA384 hash of the exported operation, the exported config of its
+        implementation, and its input values, as JSON with sorted keys. The
+        key is the same across processes, so cached outputs can be found by
+        later runs. The instance name is not part of the key, so instances of
+        the same operation share cached outputs. Returns None if the config or
+        input values can't be exported.
+        """
+        try:
+            unique = json.dumps(
+                [
+                    operation.export(),
+                    self.operations[operation.instance_name].config,
+                    inputs,
+                ],
+                sort_keys=True,
+                default=cache_key_default,
             )
+        except Exception as error:
             self.logger.debug(
-                "%s Conditions: %s",
+                "%s Not caching, could not export inputs: %s",
                 operation.instance_name,
-                dict(
-                    zip(
-                        map(
-                            lambda condition: condition.name,
-                            operation.conditions,
-                        ),
-                        ([True] * len(operation.conditions)),
-                    )
-                ),
+                error,
             )
-            outputs = await opctx.run(inputs)
-            str_outputs = str(outputs)
+            return None
+        return secure_hash(unique, "sha384")
+
+    async def cache_get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Look up cached outputs. Returns a tuple of True and the outputs if they
+        were found and have not expired, otherwise False and None.
+        """
+        value = await self.cachectx.get(key)
+        if value is None:
+            return False, None
+        expires, outputs = pickle.loads(value)
+        if expires is not None and expires < time.time():
+            return False, None
+        return True, outputs
+
+    async def cache_set(self, operation: Operation, key: str, outputs: Any):
+        """
+        Save outputs to the cache. Outputs which can't be pickled are not
+        cached.
+        """
+        ttl = self.parent.config.cache_ttl.get(
+            operation.instance_name, operation.cache_ttl
+        )
+        expires = None
+        if ttl is not None and ttl > 0:
+            expires = time.time() + ttl
+        try:
+            value = pickle.dumps((expires, outputs), protocol=4)
+        except Exception as error:
             self.logger.debug(
-                "%s Outputs: %s",
+                "%s Not caching, could not pickle outputs: %s",
                 operation.instance_name,
-                str_outputs
-                if len(str_outputs) < 512
-                else (str_outputs[:512] + "..."),
+                error,
             )
-            self.logger.debug("---")
-            return outputs
+            return
+        await self.cachectx.set(key, value)
 
-    async def run(
+    async def run_retry(
         self,
         ctx: BaseInputSetContext,
         octx: BaseOrchestratorContext,
@@ -1234,7 +2010,8 @@ class MemoryOperationImplementationNetworkContext(
         inputs: Dict[str, Any],
     ) -> Union[bool, Dict[str, Any]]:
         """
-        Run an operation in our network.
+        Run an operation in our network, trying again if it fails and has
+        retries left.
         """
         if not operation.retry:
             return await self.run_no_retry(ctx, octx, operation, inputs)
@@ -1269,10 +2046,23 @@ class MemoryOperationImplementationNetworkContext(
         network when complete
         """
         # Ensure that we can run the operation
-        # Lock all inputs which cannot be used simultaneously
-        async with octx.lctx.acquire(parameter_set, operation=operation):
-            # Run the operation
-            outputs = await self.run(
+        # Lock all inputs which cannot be used simultaneously. Operations which
+        # can't be given locked inputs skip the lock network
+        profiler = getattr(octx, "profiler", None)
+        if operation.instance_name in octx.locking:
+            lock = octx.lctx.acquire(parameter_set, operation=operation)
+        else:
+            lock = AsyncExitStack()
+            profiler = None
+        if profiler is not None:
+            start = profiler.now()
+        async with lock:
+            if profiler is not None:
+                profiler.phase("lock", start, parameter_set.ctx)
+            # Run the operation, together with parameter sets from other
+            # contexts if it accepts batches
+            run = self.run_batched if operation.batch else self.run
+            outputs = await run(
                 parameter_set.ctx,
                 octx,
                 operation,
@@ -1289,28 +2079,43 @@ class MemoryOperationImplementationNetworkContext(
                     yield x
 
                 outputs = to_async_gen(outputs)
+        # Every output of this run has the same parents
+        parents = [item.origin async for item in parameter_set.parameters()]
+        parent_lock_inputs = frozenset(
+            itertools.chain(*[parent.lock_inputs for parent in parents])
+        )
+        trusted = octx.trusted_outputs.get(operation.instance_name, {})
+        if operation.expand:
+            expand = operation.expand
+        else:
+            expand = []
         async for an_output in outputs:
             # Create a list of inputs from the outputs using the definition mapping
             try:
                 inputs = []
-                if operation.expand:
-                    expand = operation.expand
-                else:
-                    expand = []
-                parents = [
-                    item.origin async for item in parameter_set.parameters()
-                ]
                 for key, output in an_output.items():
                     if not key in expand:
                         output = [output]
+                    origin = (operation.instance_name, key)
+                    definition = trusted.get(key)
                     for value in output:
-                        new_input = Input(
-                            value=value,
-                            definition=operation.outputs[key],
-                            parents=parents,
-                            origin=(operation.instance_name, key),
-                        )
-                        new_input.validated = set_valid
+                        if definition is not None:
+                            new_input = Input.trusted(
+                                value,
+                                definition,
+                                parents,
+                                origin,
+                                set_valid,
+                                parent_lock_inputs,
+                            )
+                        else:
+                            new_input = Input(
+                                value=value,
+                                definition=operation.outputs[key],
+                                parents=parents,
+                                origin=origin,
+                            )
+                            new_input.validated = set_valid
                         inputs.append(new_input)
             except KeyError as error:
                 raise KeyError(
@@ -1353,8 +2158,28 @@ class MemoryOperationImplementationNetwork(
     CONTEXT = MemoryOperationImplementationNetworkContext
     CONFIG = MemoryOperationImplementationNetworkConfig
 
+    def __init__(self, config: BaseConfig) -> None:
+        super().__init__(config)
+        self.cache = None
+
+    async def __aenter__(self) -> "MemoryOperationImplementationNetwork":
+        self._stack = AsyncExitStack()
+        await self._stack.__aenter__()
+        if self.config.cache is not None:
+            self.cache = await self._stack.enter_async_context(
+                self.config.cache
+            )
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self._stack.aclose()
+        self.cache = None
+
 
 MEMORYORCHESTRATORCONFIG_MAX_CTXS: int = None
+MEMORYORCHESTRATORCONFIG_NO_SEMI_NAIVE: bool = False
+MEMORYORCHESTRATORCONFIG_RETAIN_CTXS: int = -1
+MEMORYORCHESTRATORCONFIG_PRUNE: bool = False
 
 
 @config
@@ -1379,6 +2204,26 @@ class MemoryOrchestratorConfig:
     )
     # Maximum number of contexts to run concurrently
     max_ctxs: int = MEMORYORCHESTRATORCONFIG_MAX_CTXS
+    no_semi_naive: bool = field(
+        "Generate all parameter sets rather than only those containing at least one newly added input",
+        default=MEMORYORCHESTRATORCONFIG_NO_SEMI_NAIVE,
+    )
+    retain_ctxs: int = field(
+        "Number of completed contexts to keep inputs, locks and redundancy checks for. Negative values keep all. Set to 0 to free the state of contexts as they complete",
+        default=MEMORYORCHESTRATORCONFIG_RETAIN_CTXS,
+    )
+    prune: bool = field(
+        "Skip operations whose outputs can never reach the definitions requested by output operations in the seed",
+        default=MEMORYORCHESTRATORCONFIG_PRUNE,
+    )
+    resume: BaseKeyValueStore = field(
+        "Key value store to save results of completed contexts in. Contexts with saved results are not run again, their saved results are returned instead",
+        default=None,
+    )
+    profiler: OrchestratorProfiler = field(
+        "Record operation latencies, time spent orchestrating, and context wall times",
+        default=None,
+    )
 
 
 @config
@@ -1390,6 +2235,14 @@ class MemoryOrchestratorContextConfig:
     reuse: Dict[str, BaseDataFlowObjectContext] = None
     # Maximum number of contexts to run concurrently
     max_ctxs: int = MEMORYORCHESTRATORCONFIG_MAX_CTXS
+    # Generate all parameter sets rather than only those containing at least
+    # one newly added input
+    no_semi_naive: bool = MEMORYORCHESTRATORCONFIG_NO_SEMI_NAIVE
+    # Number of completed contexts to keep inputs, locks and redundancy checks
+    # for. Negative values keep all
+    retain_ctxs: int = MEMORYORCHESTRATORCONFIG_RETAIN_CTXS
+    # Skip operations whose outputs can never reach an output operation
+    prune: bool = MEMORYORCHESTRATORCONFIG_PRUNE
 
     def __post_init__(self):
         if self.reuse is None:
@@ -1406,6 +2259,23 @@ class MemoryOrchestratorContext(BaseOrchestratorContext):
         self._stack = None
         # Maps instance_name to OrchestratorContext
         self.subflows = {}
+        # Completed contexts which have not yet been removed from the networks
+        self.retained: Deque[BaseInputSetContext] = collections.deque()
+        # Instance names of operations which will not be run
+        self.pruned: Set[str] = set()
+        # Instance names of operations which may need to lock their inputs
+        self.locking: Set[str] = set()
+        # Output definitions of each operation which inputs can be created
+        # from without conversion or validation
+        self.trusted_outputs: Dict[str, Dict[str, Definition]] = {}
+        # Key value store context results of completed contexts are saved in
+        self.resumectx: Optional[BaseKeyValueStoreContext] = None
+        # Hash of the dataflow, saved results are keyed by it and the context
+        self.resume_dataflow: Optional[str] = None
+        # Records where time is spent, if profiling
+        self.profiler: Optional[OrchestratorProfiler] = getattr(
+            self.parent.config, "profiler", None
+        )
 
     async def __aenter__(self) -> "BaseOrchestratorContext":
         # TODO(subflows) In all of these contexts we are about to enter, they
@@ -1439,6 +2309,18 @@ class MemoryOrchestratorContext(BaseOrchestratorContext):
         # Create the exit stack and enter all the contexts we won't be reusing
         self._stack = AsyncExitStack()
         self._stack = await aenter_stack(self, enter)
+        if self.parent.resume is not None:
+            self.resumectx = await self._stack.enter_async_context(
+                self.parent.resume()
+            )
+            self.resume_dataflow = secure_hash(
+                json.dumps(
+                    self.config.dataflow.export(),
+                    sort_keys=True,
+                    default=cache_key_default,
+                ),
+                "sha384",
+            )
         # Ensure that we can run the dataflow
         await self.initialize_dataflow(self.config.dataflow)
         return self
@@ -1446,6 +2328,13 @@ class MemoryOrchestratorContext(BaseOrchestratorContext):
     async def __aexit__(self, exc_type, exc_value, traceback):
         await self._stack.aclose()
 
+    def resume_key(self, ctx_str: str) -> str:
+        """
+        Key the result of a context is saved under in the ``resume`` store.
+        Results are only resumed by runs of the same dataflow.
+        """
+        return f"{self.resume_dataflow}:{ctx_str}"
+
     @asynccontextmanager
     async def modify_dataflow(
         self,
@@ -1458,15 +2347,37 @@ class MemoryOrchestratorContext(BaseOrchestratorContext):
         Initialize a DataFlow by preforming the following steps.
 
         1. Add operations the operation network context
-        2. Instantiate operation implementations which are not instantiated
+        2. Let the input network context compile plans for finding the inputs
+           of each operation
+        3. Instantiate operation implementations which are not instantiated
            within the operation implementation network context
-        3. Seed input network context with given inputs
+        4. Seed input network context with given inputs
+
+        If pruning, operations which can never contribute to the output are
+        determined before step 3, and are not instantiated or run.
         """
         self.logger.debug("Initializing dataflow: %s", dataflow)
+        if self.config.prune:
+            self.pruned = dataflow.unreachable_operations()
+            if self.pruned:
+                self.logger.info(
+                    "Pruned operations which can not reach the output: %s",
+                    ", ".join(sorted(self.pruned)),
+                )
+            else:
+                self.logger.debug("No operations pruned")
+        # Only operations which may be given locked inputs need to go through
+        # the lock network
+        self.locking = dataflow.locking_operations()
+        self.trusted_outputs = dataflow.trusted_outputs()
         # Add operations to operations network context
         await self.octx.add(dataflow.operations.values())
+        # Let the input network prepare to search for operation inputs
+        await self.ictx.initialize_dataflow(dataflow)
         # Instantiate all operations
         for (instance_name, operation) in dataflow.operations.items():
+            if instance_name in self.pruned:
+                continue
             # Add and instantiate operation implementation if not
             # present
             if not await self.nctx.contains(operation):
@@ -1559,7 +2470,7 @@ class MemoryOrchestratorContext(BaseOrchestratorContext):
             for instance_name in instance_list:
                 inputs_to_forward.setdefault(instance_name, []).append(item)
         self.logger.debug(
-            f"Forwarding inputs from {inputs_to_forward} to {self.subflows}"
+            "Forwarding inputs from %s to %s", inputs_to_forward, self.subflows
         )
         for instance_name, inputs in inputs_to_forward.items():
             if instance_name in self.subflows:
@@ -1574,171 +2485,205 @@ class MemoryOrchestratorContext(BaseOrchestratorContext):
         # TODO Note from subflow
         await self.ictx.add_context_result(ctx, result)
 
-    # TODO(dfass) Get rid of run_operations, make it run_dataflow. Pass down the
-    # dataflow to everything. Make inputs a list of InputSets or an
-    # asyncgenerator of InputSets. Add a parameter which tells us if we should
-    # exit when all operations are complete or continue to wait for more inputs
-    # from the asyncgenerator. Make that parameter an asyncio.Event
-    async def run(
+    async def seed_ctx_inputs(
         self,
-        *input_sets: Union[List[Input], BaseInputSet],
-        strict: bool = True,
+        ctx: Union[str, BaseInputSetContext],
+        input_set: Union[List[Input], BaseInputSet],
+    ) -> BaseInputSetContext:
+        """
+        Seed a context given as a string or an input set context
+        """
+        await self.forward_inputs_to_subflow(input_set)
+        return await self.seed_inputs(
+            ctx=StringInputSetContext(ctx) if isinstance(ctx, str) else ctx,
+            input_set=input_set,
+        )
+
+    async def seed_ctxs(
+        self,
+        *input_sets: Union[
+            List[Input],
+            BaseInputSet,
+            Dict[Union[str, BaseInputSetContext], List[Input]],
+            AsyncIterator[
+                Union[
+                    Tuple[Union[str, BaseInputSetContext], List[Input]],
+                    BaseInputSet,
+                ]
+            ],
+        ],
         ctx: Optional[BaseInputSetContext] = None,
-        halt: Optional[asyncio.Event] = None,
-        parent: Optional[BaseOrchestratorContext] = None,
-    ) -> AsyncIterator[Tuple[BaseContextHandle, Dict[str, Any]]]:
+    ) -> AsyncIterator[BaseInputSetContext]:
         """
-        Run a DataFlow.
+        Add each context given to :py:meth:`run` to the input network as it is
+        needed, yielding each context once it has been seeded.
         """
-        # Lists of contexts we care about for this dataflow
-        ctxs: List[BaseInputSetContext] = []
-        self.logger.debug("Running %s: %s", self.config.dataflow, input_sets)
         if not input_sets:
             # If there are no input sets, add only seed inputs
-            ctxs.append(await self.seed_inputs(ctx=ctx))
+            ctx = await self.seed_inputs(ctx=ctx)
             await self.forward_inputs_to_subflow(self.config.dataflow.seed)
-        if len(input_sets) == 1 and inspect.isasyncgen(input_sets[0]):
-            # Check if inputs is an asyncgenerator
-            # If it is, start a coroutine to wait for new inputs or input sets
-            # from it. When new inputs are received, add the seed inputs from
-            # the dataflow to the context.
-            # TODO(dfass) Grab inputs from asyncgen, combine with seed
-            raise NotImplementedError("asyncgen not yet supported")
+            yield ctx
         elif len(input_sets) == 1 and isinstance(input_sets[0], dict):
             # Helper to quickly add inputs under string context
             for ctx_string, input_set in input_sets[0].items():
-                await self.forward_inputs_to_subflow(input_set)
-                ctxs.append(
-                    await self.seed_inputs(
-                        ctx=StringInputSetContext(ctx_string)
-                        if isinstance(ctx_string, str)
-                        else ctx_string,
-                        input_set=input_set,
-                    )
-                )
+                yield await self.seed_ctx_inputs(ctx_string, input_set)
+        elif len(input_sets) == 1 and isinstance(
+            input_sets[0], collections.abc.AsyncIterable
+        ):
+            # Async iterator of context, inputs pairs (or input sets) which is
+            # only pulled from when we are ready to start another context
+            async for pair in input_sets[0]:
+                if isinstance(pair, BaseInputSet):
+                    yield await self.seed_inputs(input_set=pair)
+                else:
+                    yield await self.seed_ctx_inputs(*pair)
         else:
             # For inputs sets that are of type BaseInputSetContext or list
             for input_set in input_sets:
-                ctxs.append(
-                    await self.seed_inputs(ctx=ctx, input_set=input_set)
-                )
-        # TODO Add check that ctx returned is the ctx corresponding to uadd.
-        # We'll have to make uadd return the ctx so we can compare.
-        # TODO Send the context back into some list maintained by
-        # run_operations so that if there is another run_dataflow method
-        # running on the same orchestrator context it will get the context
-        # it's waiting for and return
-        # BEGIN old run_operations
-        # Set of tasks we are waiting on
-        # TODO Make some way to cap the number of context's who have operations
-        # executing. Or maybe just the number of operations. Or both.
+                yield await self.seed_inputs(ctx=ctx, input_set=input_set)
+
+    # TODO(dfass) Get rid of run_operations, make it run_dataflow. Pass down the
+    # dataflow to everything. Add a parameter which tells us if we should exit
+    # when all operations are complete or continue to wait for more inputs from
+    # the asyncgenerator. Make that parameter an asyncio.Event
+    async def run(
+        self,
+        *input_sets: Union[
+            List[Input],
+            BaseInputSet,
+            Dict[Union[str, BaseInputSetContext], List[Input]],
+            AsyncIterator[
+                Union[
+                    Tuple[Union[str, BaseInputSetContext], List[Input]],
+                    BaseInputSet,
+                ]
+            ],
+        ],
+        strict: bool = True,
+        ctx: Optional[BaseInputSetContext] = None,
+        halt: Optional[asyncio.Event] = None,
+        parent: Optional[BaseOrchestratorContext] = None,
+    ) -> AsyncIterator[Tuple[BaseContextHandle, Dict[str, Any]]]:
+        """
+        Run a DataFlow.
+
+        Contexts are added to the input network as they are started, at most
+        ``max_ctxs`` at a time. If given an async iterator of context, inputs
+        pairs, it is only pulled from when another context can be started. The
+        number of contexts held in memory then depends on ``max_ctxs`` rather
+        than on the number of contexts the iterator yields.
+
+        If ``resume`` is set, contexts whose results were saved by a previous
+        run are not run again, their saved results are yielded instead.
+        """
+        self.logger.debug("Running %s: %s", self.config.dataflow, input_sets)
+        # Contexts we care about for this dataflow, seeded as they are started
+        ctxs = self.seed_ctxs(*input_sets, ctx=ctx)
+        # Track if there are more contexts to start
+        more_ctxs = True
+        # Set of tasks which have not yet been handled as completed
         tasks = set()
+        # Tasks put themselves on this queue as they complete
+        completed = asyncio.Queue()
+
+        def track(task):
+            tasks.add(task)
+            task.add_done_callback(completed.put_nowait)
+
         # Track the number of contexts running
         num_ctxs = 0
-        # Track if there are more context results
-        more = True
-        # If the max_ctxs is more than the total number of contexts, then set max_ctxs to None
-        if self.config.max_ctxs is not None and self.config.max_ctxs > len(
-            ctxs
-        ):
-            with self.config.no_enforce_immutable():
-                self.config.max_ctxs = None
-        # Create tasks to wait on the results of each of the contexts submitted
-        for ctxs_index in range(0, len(ctxs)):
-            if (
-                self.config.max_ctxs is not None
-                and num_ctxs >= self.config.max_ctxs
-            ):
-                break
-            # Grab the context by its index
-            ctx = ctxs[ctxs_index]
-            if parent is not None:
-                # TODO(alice) It's upstream + the execution of this operation.
-                # We'll have to make the flow on the fly to describe this input
-                # being triggered?
-                # ctx.overlay = dffml.DataFlow(parent.config.dataflow, dataflow, not sure here on any of these)
-                # ctx.upstream = dffml.DataFlow(dataflow, ...)
-                ctx.orchestartor = self
-                ctx.orchestrator_parent = parent
-            self.logger.debug(
-                "kickstarting context: %s", (await ctx.handle()).as_string()
-            )
-            tasks.add(
-                asyncio.create_task(
-                    self.run_operations_for_ctx(ctx, strict=strict)
-                )
-            )
-            # Ensure we don't run more contexts conncurrently than requested
-            num_ctxs += 1
         # Create initial events to wait on
         # TODO Listen for child context creation and bubble up events per system
         # context policy to parent (if we should call add_context_result
         # from here or not, probably done within the dataflow version of this
         # function eventually when it's cleaned up)
         context_result = asyncio.create_task(self.ictx.result())
-        tasks.add(context_result)
+        track(context_result)
         try:
             # Return when outstanding operations reaches zero
             while tasks:
-                if not more and len(tasks) == 1 and context_result in tasks:
-                    break
-                # Wait for incoming events
-                done, _pending = await asyncio.wait(
-                    tasks, return_when=asyncio.FIRST_COMPLETED
-                )
-
-                for task in done:
-                    # Remove the task from the set of tasks we are waiting for
-                    tasks.remove(task)
-                    num_ctxs -= 1
-                    # Get the tasks exception if any
-                    exception = task.exception()
-                    if strict and exception is not None:
-                        raise exception
-                    elif exception is not None:
-                        # If there was an exception log it
-                        output = io.StringIO()
-                        task.print_stack(file=output)
-                        self.logger.error("%s", output.getvalue().rstrip())
-                        output.close()
-
-                    if task is context_result:
-                        # All operations for a context completed
-                        # Yield the context that completed and the results of its
-                        # output operations
-                        more, results = task.result()
-                        for ctx, result in results:
-                            yield ctx, result
-                        context_result = asyncio.create_task(
-                            self.ictx.result()
-                        )
-                        tasks.add(context_result)
-                    else:
-                        # Just run everything else to completion if not known
-                        # event.
-                        task.result()
-                    # Create more tasks to wait on the results of each of the
-                    # contexts submitted if we are caping the number of them
-                    while (
-                        self.config.max_ctxs is not None
-                        and num_ctxs <= self.config.max_ctxs
-                        and ctxs_index < len(ctxs)
-                    ):
-                        # Grab the context by it's index
-                        ctx = ctxs[ctxs_index]
-                        self.logger.debug(
-                            "kickstarting context: %s",
-                            (await ctx.handle()).as_string(),
+                # Create tasks to wait on the results of each of the contexts
+                # submitted. Ensure we don't run more contexts concurrently
+                # than requested
+                while more_ctxs and (
+                    self.config.max_ctxs is None
+                    or num_ctxs < self.config.max_ctxs
+                ):
+                    try:
+                        ctx = await ctxs.__anext__()
+                    except StopAsyncIteration:
+                        more_ctxs = False
+                        break
+                    if parent is not None:
+                        # TODO(alice) It's upstream + the execution of this
+                        # operation. We'll have to make the flow on the fly to
+                        # describe this input being triggered?
+                        # ctx.overlay = dffml.DataFlow(parent.config.dataflow, dataflow, not sure here on any of these)
+                        # ctx.upstream = dffml.DataFlow(dataflow, ...)
+                        ctx.orchestartor = self
+                        ctx.orchestrator_parent = parent
+                    if self.resumectx is not None:
+                        saved = await self.resumectx.get(
+                            self.resume_key((await ctx.handle()).as_string())
                         )
-                        tasks.add(
-                            asyncio.create_task(
-                                self.run_operations_for_ctx(ctx, strict=strict)
+                        if saved is not None:
+                            self.logger.debug(
+                                "resuming completed context: %s",
+                                (await ctx.handle()).as_string(),
                             )
+                            await self.remove_context(ctx)
+                            yield ctx, pickle.loads(saved)
+                            continue
+                    self.logger.debug(
+                        "kickstarting context: %s",
+                        (await ctx.handle()).as_string(),
+                    )
+                    track(
+                        asyncio.create_task(
+                            self.run_operations_for_ctx(ctx, strict=strict)
                         )
-                        # Keep track of which index we're at
-                        ctxs_index += 1
-                        # Ensure we don't run more contexts conncurrently than requested
-                        num_ctxs += 1
+                    )
+                    num_ctxs += 1
+                if (
+                    not more_ctxs
+                    and len(tasks) == 1
+                    and context_result in tasks
+                    # The last context may have added its result after the
+                    # previous result was retrieved
+                    and not context_result.done()
+                    and not self.ictx.result_pending()
+                ):
+                    break
+                # Wait for the next task to complete
+                task = await completed.get()
+                # Remove the task from the set of tasks we are waiting for
+                tasks.remove(task)
+                # Get the tasks exception if any
+                exception = task.exception()
+                if strict and exception is not None:
+                    raise exception
+                elif exception is not None:
+                    # If there was an exception log it
+                    output = io.StringIO()
+                    task.print_stack(file=output)
+                    self.logger.error("%s", output.getvalue().rstrip())
+                    output.close()
+
+                if task is context_result:
+                    # All operations for a context completed
+                    # Yield the context that completed and the results of its
+                    # output operations
+                    _more, results = task.result()
+                    for ctx, result in results:
+                        yield ctx, result
+                    context_result = asyncio.create_task(self.ictx.result())
+                    track(context_result)
+                else:
+                    # All operations for a context completed
+                    num_ctxs -= 1
+                    # Just run everything else to completion if not known
+                    # event.
+                    task.result()
                 self.logger.debug("ctx.outstanding: %d", len(tasks) - 1)
         finally:
             # Cancel tasks which we don't need anymore now that we know we are done
@@ -1747,6 +2692,7 @@ class MemoryOrchestratorContext(BaseOrchestratorContext):
                     task.cancel()
                 else:
                     task.exception()
+            await ctxs.aclose()
 
     async def operations_parameter_set_pairs(
         self,
@@ -1761,15 +2707,36 @@ class MemoryOrchestratorContext(BaseOrchestratorContext):
         up for running. Cross check using existing inputs to generate per
         input set context novel input pairings. Yield novel input pairings
         along with their operations as they are generated.
+
+        When running in semi-naive mode (the default) only pairings which
+        contain at least one input from new_input_set are generated. Pairings
+        made only of inputs which were already in the network were generated
+        when the newest of those inputs was added.
         """
         # Get operations which may possibly run as a result of these new inputs
         async for operation in self.octx.operations(
             dataflow, input_set=new_input_set, stage=stage
         ):
+            if operation.instance_name in self.pruned:
+                continue
+            rctx = self.rctx
+            if self.profiler is not None:
+                rctx = ProfiledRedundancyCheckerContext(rctx, self.profiler)
             # Generate all pairs of un-run input combinations
-            async for parameter_set in self.ictx.gather_inputs(
-                self.rctx, operation, dataflow, ctx=ctx
-            ):
+            parameter_sets = self.ictx.gather_inputs(
+                rctx,
+                operation,
+                dataflow,
+                ctx=ctx,
+                new_input_set=None
+                if self.config.no_semi_naive
+                else new_input_set,
+            )
+            if self.profiler is not None:
+                parameter_sets = self.profiler.timed(
+                    "gather_inputs", parameter_sets, ctx
+                )
+            async for parameter_set in parameter_sets:
                 yield operation, parameter_set
 
     async def validator_target_set_pairs(
@@ -1807,6 +2774,8 @@ class MemoryOrchestratorContext(BaseOrchestratorContext):
         Schedule the running of all operations without inputs
         """
         for operation in self.config.dataflow.operations.values():
+            if operation.instance_name in self.pruned:
+                continue
             if operation.inputs or not await self.ictx.check_conditions(
                 operation, self.config.dataflow, ctx
             ):
@@ -1822,12 +2791,20 @@ class MemoryOrchestratorContext(BaseOrchestratorContext):
     async def run_operations_for_ctx(
         self, ctx: BaseContextHandle, *, strict: bool = True
     ) -> AsyncIterator[Tuple[BaseContextHandle, Dict[str, Any]]]:
-        # Track if there are more inputs
-        more = True
-        # Set of tasks we are waiting on
+        # Set of tasks which have not yet been handled as completed
         tasks = set()
+        # Tasks put themselves on this queue as they complete, so that handling
+        # each completion does not depend on the number of outstanding tasks
+        completed = asyncio.Queue()
+
+        def track(task):
+            tasks.add(task)
+            task.add_done_callback(completed.put_nowait)
+
         # String representing the context we are executing operations for
         ctx_str = (await ctx.handle()).as_string()
+        if self.profiler is not None:
+            started = self.profiler.context_started(ctx, ctx_str)
         # We are orchestrating this context
         ctx.orchestrator = self
         # NOTE Not sure if statisfied with this, wanted to look at Monitor use.
@@ -1836,109 +2813,100 @@ class MemoryOrchestratorContext(BaseOrchestratorContext):
             await ctx.orchestrator_parent.subflow_system_context_added(ctx)
         # schedule running of operations with no inputs
         async for task in self.dispatch_auto_starts(ctx):
-            tasks.add(task)
+            track(task)
         # Create initial events to wait on
         # TODO(dfass) Make ictx.added(ctx) specific to dataflow
         input_set_enters_network = asyncio.create_task(self.ictx.added(ctx))
-        tasks.add(input_set_enters_network)
+        track(input_set_enters_network)
         try:
             # Return when outstanding operations reaches zero
             while tasks:
+                # Operations add their outputs to the input network before
+                # they complete. If no operations are running and there are no
+                # new input sets then nothing else can happen in this context.
                 if (
-                    not more
-                    and len(tasks) == 1
+                    len(tasks) == 1
                     and input_set_enters_network in tasks
+                    and not input_set_enters_network.done()
+                    and not self.ictx.inputs_pending(ctx_str)
                 ):
                     break
-                # Wait for incoming events
-                done, _pending = await asyncio.wait(
-                    tasks, return_when=asyncio.FIRST_COMPLETED
-                )
-                for task in done:
-                    # Remove the task from the set of tasks we are waiting for
-                    tasks.remove(task)
-                    # Get the tasks exception if any
-                    exception = task.exception()
-                    if strict and exception is not None:
-                        if task is input_set_enters_network:
-                            raise exception
-                        raise OperationException(
-                            "{}({}): {}".format(
-                                task.operation.instance_name,
-                                task.operation.inputs,
-                                {
-                                    parameter.key: parameter.value
-                                    async for parameter in task.parameter_set.parameters()
-                                },
+                if self.profiler is not None:
+                    self.profiler.tasks(ctx, len(tasks))
+                # Wait for the next task to complete
+                task = await completed.get()
+                # Remove the task from the set of tasks we are waiting for
+                tasks.remove(task)
+                # Get the tasks exception if any
+                exception = task.exception()
+                if strict and exception is not None:
+                    if task is input_set_enters_network:
+                        raise exception
+                    raise OperationException(
+                        "{}({}): {}".format(
+                            task.operation.instance_name,
+                            task.operation.inputs,
+                            {
+                                parameter.key: parameter.value
+                                async for parameter in task.parameter_set.parameters()
+                            },
+                        )
+                    ) from exception
+                elif exception is not None:
+                    # If there was an exception log it
+                    output = io.StringIO()
+                    task.print_stack(file=output)
+                    self.logger.error("%s", output.getvalue().rstrip())
+                    output.close()
+
+                elif task is input_set_enters_network:
+                    _more, new_input_sets = input_set_enters_network.result()
+                    for (unvalidated_input_set, new_input_set,) in new_input_sets:
+                        async for operation, parameter_set in self.validator_target_set_pairs(
+                            ctx, self.config.dataflow, unvalidated_input_set,
+                        ):
+                            dispatch_operation = await self.nctx.dispatch(
+                                self, operation, parameter_set
                             )
-                        ) from exception
-                    elif exception is not None:
-                        # If there was an exception log it
-                        output = io.StringIO()
-                        task.print_stack(file=output)
-                        self.logger.error("%s", output.getvalue().rstrip())
-                        output.close()
-
-                    elif task is input_set_enters_network:
-                        (
-                            more,
-                            new_input_sets,
-                        ) = input_set_enters_network.result()
-                        for (
-                            unvalidated_input_set,
-                            new_input_set,
-                        ) in new_input_sets:
-                            async for operation, parameter_set in self.validator_target_set_pairs(
-                                ctx,
-                                self.config.dataflow,
-                                unvalidated_input_set,
-                            ):
-                                dispatch_operation = await self.nctx.dispatch(
-                                    self, operation, parameter_set
-                                )
-                                dispatch_operation.operation = operation
-                                dispatch_operation.parameter_set = (
-                                    parameter_set
-                                )
-                                tasks.add(dispatch_operation)
-                                self.logger.debug(
-                                    "[%s]: dispatch operation: %s",
-                                    ctx_str,
-                                    operation.instance_name,
-                                )
-                            # forward inputs to subflow
-                            await self.forward_inputs_to_subflow(
-                                [x async for x in new_input_set.inputs()]
+                            dispatch_operation.operation = operation
+                            dispatch_operation.parameter_set = parameter_set
+                            track(dispatch_operation)
+                            self.logger.debug(
+                                "[%s]: dispatch operation: %s",
+                                ctx_str,
+                                operation.instance_name,
                             )
-                            # Identify which operations have completed contextually
-                            # appropriate input sets which haven't been run yet
-                            async for operation, parameter_set in self.operations_parameter_set_pairs(
-                                ctx,
-                                self.config.dataflow,
-                                new_input_set=new_input_set,
-                            ):
-                                # Validation operations shouldn't be run here
-                                if operation.validator:
-                                    continue
-                                # Dispatch the operation and input set for running
-                                dispatch_operation = await self.nctx.dispatch(
-                                    self, operation, parameter_set
-                                )
-                                dispatch_operation.operation = operation
-                                dispatch_operation.parameter_set = (
-                                    parameter_set
-                                )
-                                tasks.add(dispatch_operation)
-                                self.logger.debug(
-                                    "[%s]: dispatch operation: %s",
-                                    ctx_str,
-                                    operation.instance_name,
-                                )
-                        # Create a another task to waits for new input sets
-                        input_set_enters_network = asyncio.create_task(
-                            self.ictx.added(ctx)
+                        # forward inputs to subflow
+                        await self.forward_inputs_to_subflow(
+                            [x async for x in new_input_set.inputs()]
                         )
-                        tasks.add(input_set_enters_network)
+                        # Identify which operations have completed contextually
+                        # appropriate input sets which haven't been run yet
+                        async for operation, parameter_set in self.operations_parameter_set_pairs(
+                            ctx,
+                            self.config.dataflow,
+                            new_input_set=new_input_set,
+                        ):
+                            # Validation operations shouldn't be run here
+                            if operation.validator:
+                                continue
+                            # Dispatch the operation and input set for running
+                            dispatch_operation = await self.nctx.dispatch(
+                                self, operation, parameter_set
+                            )
+                            dispatch_operation.operation = operation
+                            dispatch_operation.parameter_set = parameter_set
+                            track(dispatch_operation)
+                            self.logger.debug(
+                                "[%s]: dispatch operation: %s",
+                                ctx_str,
+                                operation.instance_name,
+                            )
+                    # Create a another task to waits for new input sets
+                    input_set_enters_network = asyncio.create_task(
+                        self.ictx.added(ctx)
+                    )
+                    track(input_set_enters_network)
         finally:
             # Cancel tasks which we don't need anymore now that we know we are done
             for task in tasks:
@@ -1970,10 +2938,42 @@ class MemoryOrchestratorContext(BaseOrchestratorContext):
         # of a dict with it as the only key value pair
         if len(output) == 1:
             output = list(output.values())[0]
+        # Save the result so that a resumed run can skip this context
+        if self.resumectx is not None:
+            await self.resumectx.set(
+                self.resume_key(ctx_str), pickle.dumps(output, protocol=4)
+            )
+        if self.profiler is not None:
+            self.profiler.context_completed(ctx, ctx_str, started)
         # Notify watchers of return value
         await self.ictx.add_context_result(ctx, output)
         if hasattr(ctx, "orchestrator_parent"):
             await ctx.orchestrator_parent.subflow_context_result(ctx, output)
+        # Release the context's state unless we've been asked to retain it
+        await self.context_completed(ctx)
+
+    async def context_completed(self, ctx: BaseInputSetContext):
+        """
+        Keep the most recently completed contexts around according to
+        retain_ctxs, remove the rest from the input network, redundancy checker
+        and lock network.
+        """
+        if self.config.retain_ctxs < 0:
+            return
+        self.retained.append(ctx)
+        while len(self.retained) > self.config.retain_ctxs:
+            await self.remove_context(self.retained.popleft())
+
+    async def remove_context(self, ctx: BaseInputSetContext):
+        """
+        Remove all state held for a context which has completed
+        """
+        self.logger.debug(
+            "Removing context: %s", (await ctx.handle()).as_string()
+        )
+        await self.ictx.remove_context(ctx)
+        await self.rctx.remove_context(ctx)
+        await self.lctx.remove_context(ctx)
 
     async def run_stage(self, ctx: BaseInputSetContext, stage: Stage):
         # Identify which operations have complete contextually appropriate
@@ -1999,6 +2999,7 @@ class MemoryOrchestrator(BaseOrchestrator, BaseMemoryDataFlowObject):
         super().__init__(config)
         self._stack = None
         self._entered = 0
+        self.resume = None
 
     async def __aenter__(self) -> "DataFlowFacilitator":
         self._entered += 1
@@ -2015,6 +3016,11 @@ class MemoryOrchestrator(BaseOrchestrator, BaseMemoryDataFlowObject):
             },
             call=False,
         )
+        self.resume = None
+        if self.config.resume is not None:
+            self.resume = await self._stack.enter_async_context(
+                self.config.resume
+            )
         return self
 
     async def __aexit__(self, exc_type, exc_value, traceback):
@@ -2030,6 +3036,9 @@ class MemoryOrchestrator(BaseOrchestrator, BaseMemoryDataFlowObject):
         config = dataflow
         if isinstance(dataflow, DataFlow):
             kwargs.setdefault("max_ctxs", self.config.max_ctxs)
+            kwargs.setdefault("no_semi_naive", self.config.no_semi_naive)
+            kwargs.setdefault("retain_ctxs", self.config.retain_ctxs)
+            kwargs.setdefault("prune", self.config.prune)
             config = MemoryOrchestratorContextConfig(
                 uid=secrets.token_hex(), dataflow=dataflow, **kwargs
             )
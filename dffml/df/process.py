@@ -0,0 +1,453 @@
+"""
+Run contexts across worker processes on the local machine. Each worker is a
+:py:class:`MemoryOrchestrator` which is created with the dataflow already
+loaded, by forking the process which entered the orchestrator context.
+Contexts are sent to workers over pipes, and results are streamed back as each
+context completes.
+"""
+import os
+import pickle
+import asyncio
+import traceback
+import dataclasses
+import multiprocessing
+import multiprocessing.connection
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    List,
+    Set,
+    Tuple,
+    Optional,
+    Union,
+)
+
+from .types import DataFlow, Definition, Input
+from .base import BaseContextHandle, OperationException
+from .memory import (
+    MemoryOrchestratorConfig,
+    MemoryOrchestratorContextConfig,
+    MemoryOrchestratorContext,
+    MemoryOrchestrator,
+)
+from ..base import config, field
+from ..util.entrypoint import entrypoint
+
+
+def _worker_main(
+    conn: multiprocessing.connection.Connection,
+    config: MemoryOrchestratorConfig,
+    dataflow: DataFlow,
+):
+    """
+    Entry point of worker processes. The parent's event loop is not running
+    within the forked process, so a new one is started.
+    """
+    asyncio.run(_worker(conn, config, dataflow))
+
+
+def _worker_send(
+    conn: multiprocessing.connection.Connection,
+    ctx_str: str,
+    result: Any,
+    error: Optional[str],
+):
+    """
+    Send the result of a context, or the traceback of the error which stopped
+    it, to the parent
+    """
+    try:
+        conn.send((ctx_str, result, error))
+    except Exception:
+        # Pickling failed before anything was written
+        conn.send((ctx_str, None, traceback.format_exc()))
+
+
+async def _worker(
+    conn: multiprocessing.connection.Connection,
+    config: MemoryOrchestratorConfig,
+    dataflow: DataFlow,
+):
+    """
+    Run contexts received from the parent until told to stop
+    """
+    loop = asyncio.get_running_loop()
+    requests = asyncio.Queue()
+
+    def receive():
+        try:
+            requests.put_nowait(conn.recv())
+        except EOFError:
+            loop.remove_reader(conn.fileno())
+            requests.put_nowait(None)
+
+    loop.add_reader(conn.fileno(), receive)
+    orchestrator = MemoryOrchestrator(config)
+    async with orchestrator:
+        async with orchestrator(dataflow) as octx:
+
+            async def send_results():
+                while True:
+                    _more, results = await octx.ictx.result()
+                    for ctx, result in results:
+                        _worker_send(
+                            conn,
+                            (await ctx.handle()).as_string(),
+                            result,
+                            None,
+                        )
+
+            async def run_ctx(
+                ctx_str: str,
+                inputs: List[
+                    Tuple[
+                        Union[str, Definition],
+                        Any,
+                        Union[str, Tuple[str, str]],
+                    ]
+                ],
+                strict: bool,
+            ):
+                try:
+                    ctx = await octx.seed_ctx_inputs(
+                        ctx_str,
+                        [
+                            Input(
+                                value=value,
+                                definition=octx.config.dataflow.definitions[
+                                    definition
+                                ]
+                                if isinstance(definition, str)
+                                else definition,
+                                origin=origin,
+                            )
+                            for definition, value, origin in inputs
+                        ],
+                    )
+                    await octx.run_operations_for_ctx(ctx, strict=strict)
+                except Exception:
+                    _worker_send(conn, ctx_str, None, traceback.format_exc())
+
+            results_task = asyncio.create_task(send_results())
+            tasks = set()
+            try:
+                while True:
+                    request = await requests.get()
+                    if request is None:
+                        break
+                    task = asyncio.create_task(run_ctx(*request))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                if tasks:
+                    await asyncio.wait(tasks)
+            finally:
+                results_task.cancel()
+                loop.remove_reader(conn.fileno())
+    conn.close()
+
+
+class ProcessPoolWorker:
+    """
+    Parent's view of a worker process
+    """
+
+    def __init__(
+        self,
+        process: multiprocessing.Process,
+        conn: multiprocessing.connection.Connection,
+    ):
+        self.process = process
+        self.conn = conn
+        # Only one thread may send to the worker at a time
+        self.lock = asyncio.Lock()
+        # Handle strings of contexts sent to the worker which have not
+        # completed
+        self.contexts: Set[str] = set()
+
+    @property
+    def running(self) -> int:
+        """
+        Number of contexts sent to the worker which have not completed
+        """
+        return len(self.contexts)
+
+
+PROCESSPOOLORCHESTRATORCONFIG_WORKERS: int = None
+
+
+@config
+class ProcessPoolOrchestratorConfig(MemoryOrchestratorConfig):
+    workers: int = field(
+        "Number of worker processes. Defaults to the number of CPUs",
+        default=PROCESSPOOLORCHESTRATORCONFIG_WORKERS,
+    )
+
+
+class ProcessPoolOrchestratorContext(MemoryOrchestratorContext):
+    """
+    Contexts are seeded in this process, then the inputs of each are sent to
+    the worker running the fewest contexts. Operations are only instantiated
+    and run within workers. Input values and results must be picklable.
+
+    The value, definition, and origin of each seeded input are sent. Seeded
+    inputs which have parents are refused, as their parents are not sent.
+    """
+
+    def __init__(
+        self,
+        config: MemoryOrchestratorContextConfig,
+        parent: "ProcessPoolOrchestrator",
+    ) -> None:
+        super().__init__(config, parent)
+        self.workers: List[ProcessPoolWorker] = []
+        # Futures for the results of contexts sent to workers, by handle string
+        self.pending: Dict[str, asyncio.Future] = {}
+
+    async def __aenter__(self) -> "ProcessPoolOrchestratorContext":
+        await super().__aenter__()
+        self._stack.push_async_callback(self.stop_workers)
+        self.start_workers()
+        return self
+
+    async def initialize_dataflow(self, dataflow: DataFlow) -> None:
+        """
+        Only let the input network prepare for the dataflow. Operations are
+        instantiated within each worker.
+        """
+        await self.ictx.initialize_dataflow(dataflow)
+
+    def worker_config(self) -> MemoryOrchestratorConfig:
+        """
+        Config of the memory orchestrators run within workers. Workers have no
+        limit on the number of contexts they run, as this process starts at
+        most max_ctxs contexts across all of them. Results are only saved for
+        resuming, and contexts are only profiled, by this process. Nothing
+        reads the state of completed contexts within workers, so it is not
+        retained.
+        """
+        return MemoryOrchestratorConfig(
+            **{
+                **{
+                    field.name: getattr(self.parent.config, field.name)
+                    for field in dataclasses.fields(MemoryOrchestratorConfig)
+                },
+                "max_ctxs": None,
+                "retain_ctxs": 0,
+                "prune": self.config.prune,
+                "resume": None,
+                "profiler": None,
+            }
+        )
+
+    def start_workers(self):
+        """
+        Fork worker processes, each of which enters a memory orchestrator
+        context for the dataflow
+        """
+        mp_context = multiprocessing.get_context("fork")
+        worker_config = self.worker_config()
+        for _ in range(self.parent.config.workers or os.cpu_count() or 1):
+            conn, child_conn = mp_context.Pipe()
+            process = mp_context.Process(
+                target=_worker_main,
+                args=(child_conn, worker_config, self.config.dataflow),
+                daemon=True,
+            )
+            process.start()
+            child_conn.close()
+            worker = ProcessPoolWorker(process, conn)
+            asyncio.get_running_loop().add_reader(
+                conn.fileno(), self.receive, worker
+            )
+            self.workers.append(worker)
+        self.logger.debug("Started %d workers", len(self.workers))
+
+    async def stop_workers(self):
+        """
+        Tell workers to stop once their contexts complete and wait for them to
+        exit
+        """
+        loop = asyncio.get_running_loop()
+        for worker in self.workers:
+            loop.remove_reader(worker.conn.fileno())
+            try:
+                async with worker.lock:
+                    await loop.run_in_executor(None, worker.conn.send, None)
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self.workers:
+            await loop.run_in_executor(None, worker.process.join, 5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            worker.conn.close()
+        for future in self.pending.values():
+            future.cancel()
+        self.workers = []
+        self.pending = {}
+
+    def receive(self, worker: ProcessPoolWorker):
+        """
+        Called when a worker has sent the result of a context
+        """
+        try:
+            ctx_str, result, error = worker.conn.recv()
+        except (EOFError, OSError):
+            self.worker_exited(worker)
+            return
+        worker.contexts.discard(ctx_str)
+        future = self.pending.pop(ctx_str, None)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(OperationException(f"{ctx_str}: {error}"))
+        else:
+            future.set_result(result)
+
+    def worker_exited(self, worker: ProcessPoolWorker):
+        """
+        Fail the contexts a worker was running when it exited, and stop
+        sending it contexts
+        """
+        if worker not in self.workers:
+            return
+        asyncio.get_running_loop().remove_reader(worker.conn.fileno())
+        self.workers.remove(worker)
+        worker.conn.close()
+        # Reap the process if it has already exited
+        worker.process.join(0)
+        error = f"Worker {worker.process.pid} exited with code {worker.process.exitcode}"
+        self.logger.error("%s", error)
+        for ctx_str in worker.contexts:
+            future = self.pending.pop(ctx_str, None)
+            if future is not None and not future.done():
+                future.set_exception(OperationException(f"{ctx_str}: {error}"))
+        worker.contexts = set()
+
+    async def run_operations_for_ctx(
+        self, ctx: BaseContextHandle, *, strict: bool = True
+    ) -> AsyncIterator[Tuple[BaseContextHandle, Dict[str, Any]]]:
+        """
+        Send the inputs of a context to a worker and wait for its result
+        """
+        # String representing the context we are executing operations for
+        ctx_str = (await ctx.handle()).as_string()
+        if self.profiler is not None:
+            started = self.profiler.context_started(ctx, ctx_str)
+        # We are orchestrating this context
+        ctx.orchestrator = self
+        # Seeded inputs are all present, workers add the dataflow's seed
+        # inputs themselves
+        _more, new_input_sets = await self.ictx.added(ctx)
+        inputs = []
+        for (unvalidated_input_set, new_input_set,) in new_input_sets:
+            for input_set in (unvalidated_input_set, new_input_set):
+                async for item in input_set.inputs():
+                    if any(item is seed for seed in self.config.dataflow.seed):
+                        continue
+                    if item.parents:
+                        raise ValueError(
+                            f"{ctx_str}: Seeded inputs with parents can't be sent to workers: {item}"
+                        )
+                    # Send the name of definitions the worker knows
+                    definition = item.definition
+                    if (
+                        self.config.dataflow.definitions.get(definition.name)
+                        == definition
+                    ):
+                        definition = definition.name
+                    inputs.append((definition, item.value, item.origin))
+        future = asyncio.get_running_loop().create_future()
+        if not self.workers:
+            future.set_exception(
+                OperationException(f"{ctx_str}: All workers have exited")
+            )
+        else:
+            worker = min(self.workers, key=lambda worker: worker.running)
+            worker.contexts.add(ctx_str)
+            self.pending[ctx_str] = future
+            self.logger.debug(
+                "[%s]: sending to worker %d", ctx_str, worker.process.pid
+            )
+            # Send from a thread so that results can still be received if the
+            # worker's pipe is full
+            try:
+                async with worker.lock:
+                    await asyncio.get_running_loop().run_in_executor(
+                        None, worker.conn.send, (ctx_str, inputs, strict)
+                    )
+            except (BrokenPipeError, OSError):
+                self.worker_exited(worker)
+        output = {}
+        try:
+            output = await future
+        except OperationException:
+            if strict:
+                raise
+            self.logger.error("%s", traceback.format_exc().rstrip())
+        if self.profiler is not None:
+            self.profiler.context_completed(ctx, ctx_str, started)
+        # Save the result so that a resumed run can skip this context
+        if self.resumectx is not None:
+            await self.resumectx.set(
+                self.resume_key(ctx_str), pickle.dumps(output, protocol=4)
+            )
+        # Notify watchers of return value
+        await self.ictx.add_context_result(ctx, output)
+        # Release the context's state unless we've been asked to retain it
+        await self.context_completed(ctx)
+
+
+@entrypoint("process")
+class ProcessPoolOrchestrator(MemoryOrchestrator):
+    """
+    Run contexts across a pool of worker processes on the local machine. The
+    dataflow is loaded into each worker once, when the orchestrator context
+    is entered. ``max_ctxs`` limits the number of contexts running across all
+    workers.
+
+    Workers are forked, so this orchestrator is not available on platforms
+    which can't fork.
+
+    Examples
+    --------
+
+    >>> import asyncio
+    >>> from dffml import *
+    >>>
+    >>> @op(
+    ...     inputs={"number": Definition(name="number", primitive="int")},
+    ...     outputs={"square": Definition(name="square", primitive="int")},
+    ... )
+    ... def square(number: int):
+    ...     return {"square": number * number}
+    >>>
+    >>> dataflow = DataFlow(square, GetSingle)
+    >>> dataflow.seed.append(
+    ...     Input(value=["square"], definition=GetSingle.op.inputs["spec"])
+    ... )
+    >>>
+    >>> async def main():
+    ...     results = {}
+    ...     async with ProcessPoolOrchestrator(workers=2) as orchestrator:
+    ...         async with orchestrator(dataflow) as octx:
+    ...             async for ctx, ctx_results in octx.run(
+    ...                 {
+    ...                     str(number): [
+    ...                         Input(
+    ...                             value=number,
+    ...                             definition=square.op.inputs["number"],
+    ...                         )
+    ...                     ]
+    ...                     for number in range(3)
+    ...                 }
+    ...             ):
+    ...                 results[(await ctx.handle()).as_string()] = ctx_results
+    ...     print(dict(sorted(results.items())))
+    >>>
+    >>> asyncio.run(main())
+    {'0': {'square': 0}, '1': {'square': 1}, '2': {'square': 4}}
+    """
+
+    CONFIG = ProcessPoolOrchestratorConfig
+    CONTEXT = ProcessPoolOrchestratorContext
@@ -0,0 +1,439 @@
+"""
+Profiling of dataflow runs. An :py:class:`OrchestratorProfiler` given to the
+memory orchestrator as ``profiler`` records how long operations, contexts, and
+the orchestrator's own bookkeeping take. Results can be read as a dict, saved
+as a Chrome trace which can be opened in ``chrome://tracing`` or Perfetto, or
+exported in the Prometheus text format.
+"""
+import os
+import json
+import time
+import bisect
+import pathlib
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+# Upper bounds of latency histogram buckets, in seconds
+PROFILER_BUCKETS: Tuple[float] = (
+    0.0001,
+    0.0005,
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+    10.0,
+)
+# Maximum number of trace events and context wall times kept
+PROFILER_MAX_EVENTS: int = 100000
+
+
+def prometheus_label(value: str) -> str:
+    """
+    Escape a label value for the Prometheus text format
+    """
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+    )
+
+
+class Histogram:
+    """
+    Count of observed durations falling into each bucket, along with their
+    total
+    """
+
+    def __init__(self, buckets: Tuple[float]) -> None:
+        self.buckets = buckets
+        # Last count is for values greater than the largest bucket
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """
+        Number of observations less than or equal to each bucket's upper bound
+        """
+        cumulative = []
+        count = 0
+        for bound, bucket_count in zip(
+            [str(bound) for bound in self.buckets] + ["+Inf"], self.counts
+        ):
+            count += bucket_count
+            cumulative.append((bound, count))
+        return cumulative
+
+    def export(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "seconds": self.total,
+            "buckets": dict(self.cumulative()),
+        }
+
+
+class ProfiledRedundancyCheckerContext:
+    """
+    Wraps a redundancy checker context so that time spent checking parameter
+    sets is recorded by a profiler
+    """
+
+    def __init__(self, rctx, profiler: "OrchestratorProfiler") -> None:
+        self.rctx = rctx
+        self.profiler = profiler
+
+    def take_if_non_existant(self, operation, *parameter_sets):
+        return self.profiler.timed(
+            "redundancy_check",
+            self.rctx.take_if_non_existant(operation, *parameter_sets),
+        )
+
+    def __getattr__(self, name):
+        return getattr(self.rctx, name)
+
+
+class OrchestratorProfiler:
+    """
+    Records operation call counts and latencies, time spent in each phase of
+    orchestration, the number of tasks pending within contexts, and the wall
+    time of each context.
+
+    Phases are ``gather_inputs``, ``redundancy_check`` (included in
+    ``gather_inputs``), and ``lock``. One profiler can be shared by many runs,
+    its results accumulate.
+
+    Examples
+    --------
+
+    >>> import asyncio
+    >>> from dffml import *
+    >>>
+    >>> @op(
+    ...     inputs={"number": Definition(name="number", primitive="int")},
+    ...     outputs={"square": Definition(name="square", primitive="int")},
+    ... )
+    ... def square(number: int):
+    ...     return {"square": number * number}
+    >>>
+    >>> profiler = OrchestratorProfiler()
+    >>>
+    >>> async def main():
+    ...     async with MemoryOrchestrator(profiler=profiler) as orchestrator:
+    ...         async with orchestrator(DataFlow(square)) as octx:
+    ...             async for ctx, results in octx.run(
+    ...                 {
+    ...                     str(number): [
+    ...                         Input(
+    ...                             value=number,
+    ...                             definition=square.op.inputs["number"],
+    ...                         )
+    ...                     ]
+    ...                     for number in range(3)
+    ...                 }
+    ...             ):
+    ...                 pass
+    >>>
+    >>> asyncio.run(main())
+    >>> summary = profiler.summary()
+    >>> summary["operations"][square.op.name]["count"]
+    3
+    >>> sorted(summary["contexts"]["by_context"])
+    ['0', '1', '2']
+    """
+
+    def __init__(
+        self,
+        *,
+        buckets: Tuple[float] = PROFILER_BUCKETS,
+        max_events: int = PROFILER_MAX_EVENTS,
+    ) -> None:
+        self.buckets = buckets
+        self.max_events = max_events
+        self.start = time.perf_counter()
+        self.pid = os.getpid()
+        # Latencies of operations by instance name
+        self.operations: Dict[str, Histogram] = {}
+        # Number of calls to each operation which raised
+        self.errors: Dict[str, int] = {}
+        # Time spent in each orchestration phase
+        self.phases: Dict[str, Histogram] = {}
+        # Wall time of completed contexts by handle string
+        self.contexts: Dict[str, float] = {}
+        self.context_seconds = Histogram(buckets)
+        # Tasks pending within each running context, by id of the context
+        self.pending: Dict[int, int] = {}
+        self.pending_total = 0
+        self.max_pending = 0
+        # Trace events and the number which were not kept
+        self.events: List[Dict[str, Any]] = []
+        self.dropped = 0
+        # Trace thread ids of running contexts, by id of the context
+        self.tids: Dict[int, int] = {}
+        self.next_tid = 1
+
+    def now(self) -> float:
+        return time.perf_counter()
+
+    def add_event(self, event: Dict[str, Any]) -> None:
+        if len(self.events) >= self.max_events:
+            self.dropped += 1
+            return
+        self.events.append(event)
+
+    def complete(
+        self,
+        name: str,
+        category: str,
+        start: float,
+        duration: float,
+        ctx: Any = None,
+        args: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Add a trace event for something which ran from start for duration
+        seconds. Events are shown on the row of the context they ran within.
+        """
+        if len(self.events) >= self.max_events:
+            self.dropped += 1
+            return
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start - self.start) * 1000000,
+            "dur": duration * 1000000,
+            "pid": self.pid,
+            "tid": self.tids.get(id(ctx), 0),
+        }
+        if args:
+            event["args"] = args
+        self.add_event(event)
+
+    def trace(self, trace: "OperationTrace") -> None:
+        """
+        Record an operation having run. Called by the memory operation
+        implementation network with each
+        :py:class:`OperationTrace <dffml.df.memory.OperationTrace>`.
+        """
+        if trace.event != "stop":
+            return
+        if trace.instance_name not in self.operations:
+            self.operations[trace.instance_name] = Histogram(self.buckets)
+        self.operations[trace.instance_name].observe(trace.duration)
+        if trace.error is not None:
+            self.errors[trace.instance_name] = (
+                self.errors.get(trace.instance_name, 0) + 1
+            )
+        self.complete(
+            trace.instance_name,
+            "operation",
+            self.now() - trace.duration,
+            trace.duration,
+            trace.ctx,
+            {"input_sizes": trace.input_sizes},
+        )
+
+    def phase(self, name: str, start: float, ctx: Any = None) -> None:
+        """
+        Record time spent in a phase of orchestration since start
+        """
+        duration = self.now() - start
+        if name not in self.phases:
+            self.phases[name] = Histogram(self.buckets)
+        self.phases[name].observe(duration)
+        self.complete(name, "orchestrator", start, duration, ctx)
+
+    async def timed(
+        self, name: str, iterator: AsyncIterator[Any], ctx: Any = None
+    ) -> AsyncIterator[Any]:
+        """
+        Yield from an async iterator, recording the time spent within it, but
+        not the time the caller spends between items, as a phase
+        """
+        duration = 0.0
+        start = self.now()
+        try:
+            while True:
+                resumed = self.now()
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    duration += self.now() - resumed
+                yield item
+        finally:
+            if name not in self.phases:
+                self.phases[name] = Histogram(self.buckets)
+            self.phases[name].observe(duration)
+            self.complete(
+                name,
+                "orchestrator",
+                start,
+                duration,
+                ctx,
+                {"wall": self.now() - start},
+            )
+
+    def context_started(self, ctx: Any, ctx_str: str) -> float:
+        """
+        Called when a context starts running. Returns the time it started.
+        """
+        tid = self.next_tid
+        self.next_tid += 1
+        self.tids[id(ctx)] = tid
+        self.add_event(
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": self.pid,
+                "tid": tid,
+                "args": {"name": ctx_str},
+            }
+        )
+        return self.now()
+
+    def context_completed(self, ctx: Any, ctx_str: str, start: float) -> None:
+        """
+        Called when a context which started at start has completed
+        """
+        duration = self.now() - start
+        self.context_seconds.observe(duration)
+        if len(self.contexts) < self.max_events:
+            self.contexts[ctx_str] = duration
+        self.complete(ctx_str, "context", start, duration, ctx)
+        self.tasks(ctx, 0)
+        self.tids.pop(id(ctx), None)
+
+    def tasks(self, ctx: Any, pending: int) -> None:
+        """
+        Called when the number of tasks pending within a context changes
+        """
+        self.pending_total -= self.pending.pop(id(ctx), 0)
+        if pending:
+            self.pending[id(ctx)] = pending
+            self.pending_total += pending
+        total = self.pending_total
+        self.max_pending = max(self.max_pending, total)
+        self.add_event(
+            {
+                "name": "pending tasks",
+                "ph": "C",
+                "ts": (self.now() - self.start) * 1000000,
+                "pid": self.pid,
+                "args": {"tasks": total},
+            }
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Everything recorded so far as a dict which can be dumped to JSON
+        """
+        return {
+            "operations": {
+                instance_name: {
+                    **histogram.export(),
+                    "errors": self.errors.get(instance_name, 0),
+                }
+                for instance_name, histogram in self.operations.items()
+            },
+            "phases": {
+                name: histogram.export()
+                for name, histogram in self.phases.items()
+            },
+            "contexts": {
+                **self.context_seconds.export(),
+                "by_context": dict(self.contexts),
+            },
+            "tasks": {
+                "pending": self.pending_total,
+                "max_pending": self.max_pending,
+            },
+        }
+
+    def chrome_trace(self) -> Dict[str, Any]:
+        """
+        Trace events in the Chrome trace event format
+        """
+        return {
+            "traceEvents": list(self.events),
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "summary": self.summary(),
+                "dropped_events": self.dropped,
+            },
+        }
+
+    def save(self, path: Union[str, pathlib.Path]) -> None:
+        """
+        Write a Chrome trace to a file
+        """
+        pathlib.Path(path).write_text(json.dumps(self.chrome_trace()))
+
+    def prometheus(self) -> str:
+        """
+        Metrics in the Prometheus text exposition format
+        """
+        lines = []
+
+        def histogram(name, help_text, histograms, label):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for value, histogram in histograms.items():
+                labels = (
+                    f'{label}="{prometheus_label(value)}",' if label else ""
+                )
+                for bound, count in histogram.cumulative():
+                    lines.append(
+                        f'{name}_bucket{{{labels}le="{bound}"}} {count}'
+                    )
+                labels = "{" + labels.rstrip(",") + "}" if labels else ""
+                lines.append(f"{name}_sum{labels} {histogram.total}")
+                lines.append(f"{name}_count{labels} {histogram.count}")
+
+        histogram(
+            "dffml_operation_seconds",
+            "Time taken by each call to an operation",
+            self.operations,
+            "operation",
+        )
+        lines.append(
+            "# HELP dffml_operation_errors_total Calls to an operation which raised"
+        )
+        lines.append("# TYPE dffml_operation_errors_total counter")
+        for instance_name, errors in self.errors.items():
+            lines.append(
+                f'dffml_operation_errors_total{{operation="{prometheus_label(instance_name)}"}} {errors}'
+            )
+        histogram(
+            "dffml_phase_seconds",
+            "Time spent in each phase of orchestration",
+            self.phases,
+            "phase",
+        )
+        histogram(
+            "dffml_context_seconds",
+            "Wall time of each context",
+            {None: self.context_seconds},
+            None,
+        )
+        lines.append(
+            "# HELP dffml_pending_tasks Tasks pending within running contexts"
+        )
+        lines.append("# TYPE dffml_pending_tasks gauge")
+        lines.append(f"dffml_pending_tasks {self.pending_total}")
+        lines.append(
+            "# HELP dffml_pending_tasks_max Most tasks pending within running contexts at once"
+        )
+        lines.append("# TYPE dffml_pending_tasks_max gauge")
+        lines.append(f"dffml_pending_tasks_max {self.max_pending}")
+        return "\n".join(lines) + "\n"
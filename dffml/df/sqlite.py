@@ -0,0 +1,130 @@
+import asyncio
+import pathlib
+import sqlite3
+from typing import Dict, Union, Optional, Callable
+
+from .base import (
+    BaseConfig,
+    BaseKeyValueStoreContext,
+    BaseKeyValueStore,
+)
+from ..base import config, field
+from ..util.entrypoint import entrypoint
+
+
+SQLITEKEYVALUESTORECONFIG_BATCH_SIZE: int = 128
+
+
+@config
+class SqliteKeyValueStoreConfig:
+    filename: pathlib.Path = field("Path to the database file")
+    table_name: str = field(
+        "Name of the table keys and values are stored in", default="kvstore"
+    )
+    journal_mode: str = field(
+        "SQLite journal mode. WAL lets readers continue while a batch is written",
+        default="wal",
+    )
+    batch_size: int = field(
+        "Number of writes to hold in memory before writing them all in one transaction. Held writes are lost if the process dies",
+        default=SQLITEKEYVALUESTORECONFIG_BATCH_SIZE,
+    )
+
+
+class SqliteKeyValueStoreContext(BaseKeyValueStoreContext):
+    def __init__(
+        self, config: BaseConfig, parent: "SqliteKeyValueStore"
+    ) -> None:
+        super().__init__(config, parent)
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        async with self.parent.lock:
+            self.parent.flush()
+
+    def _get(self, key: str) -> Union[bytes, None]:
+        if key in self.parent.pending:
+            return self.parent.pending[key]
+        row = self.parent.db.execute(
+            f"SELECT value FROM {self.parent.config.table_name} WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0]
+
+    def _set(self, key: str, value: bytes):
+        self.parent.pending[key] = value
+        if len(self.parent.pending) >= self.parent.config.batch_size:
+            self.parent.flush()
+
+    async def get(self, key: str) -> Union[bytes, None]:
+        async with self.parent.lock:
+            return self._get(key)
+
+    async def set(self, key: str, value: bytes):
+        async with self.parent.lock:
+            self._set(key, value)
+
+    async def conditional_set(
+        self,
+        key: str,
+        value,
+        *,
+        checker: Optional[Callable[[bytes], bool]] = lambda value: value
+        is not None,
+    ) -> bool:
+        async with self.parent.lock:
+            if not checker(self._get(key)):
+                return False
+            self._set(key, value)
+        return True
+
+
+@entrypoint("sqlite")
+class SqliteKeyValueStore(BaseKeyValueStore):
+    """
+    Key Value store backed by a table in an SQLite database. Keys and values
+    persist across runs. Writes are held in memory and written in batches.
+    """
+
+    CONTEXT = SqliteKeyValueStoreContext
+    CONFIG = SqliteKeyValueStoreConfig
+
+    def __init__(self, config: BaseConfig) -> None:
+        super().__init__(config)
+        self.lock = None
+        self.db = None
+        # Writes which have not yet been committed to the database
+        self.pending: Dict[str, bytes] = {}
+
+    def __call__(self) -> SqliteKeyValueStoreContext:
+        return self.CONTEXT(BaseConfig(), self)
+
+    async def __aenter__(self) -> "SqliteKeyValueStore":
+        self.lock = asyncio.Lock()
+        self.pending = {}
+        self.db = sqlite3.connect(str(self.config.filename))
+        self.db.execute(f"PRAGMA journal_mode={self.config.journal_mode}")
+        with self.db:
+            self.db.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.config.table_name} (key TEXT PRIMARY KEY, value BLOB)"
+            )
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.flush()
+        self.db.close()
+        self.db = None
+
+    def flush(self):
+        """
+        Write all pending writes in one transaction
+        """
+        if not self.pending:
+            return
+        with self.db:
+            self.db.executemany(
+                f"INSERT OR REPLACE INTO {self.config.table_name} (key, value) VALUES (?, ?)",
+                self.pending.items(),
+            )
+        self.pending = {}
@@ -1,5 +1,6 @@
-import uuid
+import os
 import copy
+import uuid
 import types
 import inspect
 import itertools
@@ -21,6 +22,10 @@ from typing import (
     Type,
     NewType,
     ForwardRef,
+    Iterable,
+    Iterator,
+    Set,
+    FrozenSet,
 )
 
 from ..base import BaseConfig
@@ -439,6 +444,25 @@ class Operation(Entrypoint):
     instance_name: Optional[str] = None
     validator: bool = False
     retry: int = 0
+    # How to run non-async functions: "inline", "thread" or "process". None
+    # uses the default of the operation implementation network
+    executor: Optional[str] = None
+    # Maximum number of concurrent runs of this operation
+    max_concurrency: Optional[int] = None
+    # Maximum number of parameter sets, possibly from different contexts, to
+    # run together. The implementation is given a list of values for each
+    # input, one per parameter set, and must return a list of outputs in the
+    # same order.
+    batch: Optional[int] = None
+    # Milliseconds to wait for more parameter sets before running a batch
+    # which is not full. None runs it once currently ready tasks have run.
+    batch_wait: Optional[float] = None
+    # Cache outputs keyed on the operation, its config and its input values,
+    # if the operation implementation network has a cache. Only set this on
+    # operations whose outputs depend only on those.
+    cache: bool = False
+    # Seconds cached outputs are valid for. None means they never expire
+    cache_ttl: Optional[float] = None
 
     def __post_init__(self):
         # Covert all typing.NewType's to definitions
@@ -493,6 +517,17 @@ class Operation(Entrypoint):
             del exported["conditions"]
         if not exported["expand"]:
             del exported["expand"]
+        for optional in [
+            "executor",
+            "max_concurrency",
+            "batch",
+            "batch_wait",
+            "cache_ttl",
+        ]:
+            if getattr(self, optional) is not None:
+                exported[optional] = getattr(self, optional)
+        if self.cache:
+            exported["cache"] = self.cache
         return exported
 
     @classmethod
@@ -604,12 +639,46 @@ class Output(NamedTuple):
     ismap: bool = False
 
 
+def _input_uids() -> Iterator[int]:
+    """
+    Counter of ids for inputs created within this process. It starts at a
+    random multiple of 2**64, so that ids from other processes, including
+    previous runs whose results were saved, don't collide.
+    """
+    return itertools.count((uuid.uuid4().int << 64) + 1)
+
+
+_INPUT_UIDS = _input_uids()
+
+
+def _reset_input_uids() -> None:
+    global _INPUT_UIDS
+    _INPUT_UIDS = _input_uids()
+
+
+# Forked children would otherwise continue from the parent's counter
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_input_uids)
+
+
 class Input(object):
     """
     All inputs have a unique id. Without it they can't be tracked for locking
-    purposes.
+    purposes. Unless one is given, the id is an integer from a counter which
+    starts at a random offset in each process.
     """
 
+    __slots__ = (
+        "value",
+        "definition",
+        "parents",
+        "origin",
+        "validated",
+        "uid",
+        "lock_inputs",
+        "_ancestors",
+    )
+
     def __init__(
         self,
         value: Any,
@@ -619,7 +688,7 @@ class Input(object):
         origin: Optional[Union[str, Tuple[Operation, str]]] = "seed",
         validated: bool = True,
         *,
-        uid: Optional[str] = "",
+        uid: Optional[Union[str, int]] = "",
         links: Optional[Tuple["Input"]] = None,
     ):
         # TODO(alice)
@@ -627,7 +696,10 @@ class Input(object):
         # NOTE For some reason doctests end up with id(type(definition)) not
         # equal to id(Definition). Therefore just compare the class name.
         # typing.NewType support. Auto convert NewTypes into definitions.
-        if definition.__class__.__qualname__ != "Definition":
+        if (
+            definition.__class__ is not Definition
+            and definition.__class__.__qualname__ != "Definition"
+        ):
             # typing.NewType support
             old_definition = definition
             definition = create_definition("", definition)
@@ -662,15 +734,65 @@ class Input(object):
         self.origin = origin
         self.uid = uid
         if not self.uid:
-            self.uid = str(uuid.uuid4())
+            self.uid = next(_INPUT_UIDS)
+        # This input and any of its ancestors whose definitions must be locked
+        # while an operation uses them. Parents are not expected to change
+        # after creation.
+        self.lock_inputs: FrozenSet["Input"] = frozenset(
+            itertools.chain(
+                [self] if definition.lock else [],
+                *[parent.lock_inputs for parent in parents],
+            )
+        )
+        self._ancestors: Optional[FrozenSet["Input"]] = None
 
-    async def get_parents(self) -> AsyncIterator["Input"]:
-        parents = []
-        for item in self.parents:
-            parents.append(
-                [item] + [item async for item in item.get_parents()]
+    @classmethod
+    def trusted(
+        cls,
+        value: Any,
+        definition: Definition,
+        parents: List["Input"],
+        origin: Tuple[str, str],
+        validated: bool,
+        parent_lock_inputs: FrozenSet["Input"],
+    ) -> "Input":
+        """
+        Create an input from the output of an operation without converting or
+        validating its value. Only for definitions which have no ``spec`` and
+        no ``validate``. ``parent_lock_inputs`` is the union of the
+        ``lock_inputs`` of all ``parents``, which is shared by every output of
+        the same operation run.
+        """
+        self = cls.__new__(cls)
+        self.value = value
+        self.definition = definition
+        self.parents = parents
+        self.origin = origin
+        self.validated = validated
+        self.uid = next(_INPUT_UIDS)
+        if definition.lock:
+            self.lock_inputs = parent_lock_inputs.union([self])
+        else:
+            self.lock_inputs = parent_lock_inputs
+        self._ancestors = None
+        return self
+
+    def ancestors(self) -> FrozenSet["Input"]:
+        """
+        All inputs this input was derived from. Found the first time it's
+        called, after which the set is reused.
+        """
+        if self._ancestors is None:
+            self._ancestors = frozenset(
+                itertools.chain(
+                    self.parents,
+                    *[parent.ancestors() for parent in self.parents],
+                )
             )
-        for parent in list(set(itertools.chain(*parents))):
+        return self._ancestors
+
+    async def get_parents(self) -> AsyncIterator["Input"]:
+        for parent in self.ancestors():
             yield parent
 
     def __repr__(self):
@@ -693,6 +815,9 @@ class Input(object):
 
 
 class Parameter(Input):
+
+    __slots__ = ("key",)
+
     def __init__(
         self, key: str, value: Any, origin: Input, definition: Definition,
     ):
@@ -1135,6 +1260,258 @@ class DataFlow:
                     flow_dict[operation.instance_name].conditions = ["seed"]
         return flow_dict
 
+    @classmethod
+    def _spec_strings(cls, spec: Any) -> Iterator[str]:
+        """
+        All strings within an output operation spec, including dict keys
+        """
+        if isinstance(spec, str):
+            yield spec
+        elif isinstance(spec, dict):
+            for key, value in spec.items():
+                yield from cls._spec_strings(key)
+                yield from cls._spec_strings(value)
+        elif isinstance(spec, (list, tuple, set)):
+            for value in spec:
+                yield from cls._spec_strings(value)
+
+    @classmethod
+    def _flow_origins(cls, source: Union[str, List, Dict]) -> Iterator[str]:
+        """
+        Origins named by an entry within an input flow. An entry is either an
+        origin (such as "seed"), a dict mapping an operation instance name (or
+        origin) to an output name or list of alternate definitions, or a list
+        of either.
+        """
+        if isinstance(source, str):
+            yield source
+        elif isinstance(source, dict):
+            yield from source.keys()
+        elif isinstance(source, (list, tuple)):
+            for item in source:
+                yield from cls._flow_origins(item)
+
+    def output_definitions(self) -> Optional[Set[str]]:
+        """
+        Names of the definitions requested by output stage operations via the
+        ``spec`` inputs given to them within the seed. Returns ``None`` if
+        there are no output operations, or if what any one of them will request
+        can not be determined from the seed.
+        """
+        output_operations = [
+            operation
+            for operation in self.operations.values()
+            if operation.stage == Stage.OUTPUT
+        ]
+        if not output_operations:
+            return None
+        requested = set()
+        for operation in output_operations:
+            spec = operation.inputs.get("spec", None)
+            if spec is None:
+                return None
+            # The spec must only come from the seed
+            input_flow = self.flow.get(operation.instance_name, InputFlow())
+            if any(
+                origin != "seed"
+                for origin in self._flow_origins(
+                    input_flow.inputs.get("spec", ["seed"])
+                )
+            ):
+                return None
+            specs = [
+                item.value for item in self.seed if item.definition == spec
+            ]
+            if not specs:
+                return None
+            for value in specs:
+                requested.update(
+                    name
+                    for name in self._spec_strings(value)
+                    if name in self.definitions
+                )
+        return requested
+
+    def operations_reaching(
+        self,
+        definition_names: Iterable[str],
+        instance_names: Iterable[str] = (),
+    ) -> Set[str]:
+        """
+        Instance names of operations which produce any of the given
+        definitions, or which are one of the given operations, along with all
+        the operations which could provide them with inputs or conditions
+        according to the flow.
+        """
+        producers = {}
+        for operation in self.operations.values():
+            for definition in operation.outputs.values():
+                producers.setdefault(definition.name, set()).add(
+                    operation.instance_name
+                )
+        todo = list(instance_names)
+        for name in definition_names:
+            todo.extend(producers.get(name, ()))
+        reached = set()
+        while todo:
+            instance_name = todo.pop()
+            if (
+                instance_name in reached
+                or instance_name not in self.operations
+            ):
+                continue
+            reached.add(instance_name)
+            input_flow = self.flow.get(instance_name, None)
+            if input_flow is None:
+                continue
+            for source in itertools.chain(
+                input_flow.conditions, *input_flow.inputs.values()
+            ):
+                todo.extend(self._flow_origins(source))
+        return reached
+
+    def locking_operations(self) -> Set[str]:
+        """
+        Instance names of operations which may be given an input whose
+        definition must be locked, or an input derived from one. Only these
+        operations need to go through the lock network.
+
+        Examples
+        --------
+
+        >>> from dffml import *
+        >>>
+        >>> repo = Definition(name="repo", primitive="str", lock=True)
+        >>> commits = Definition(name="commits", primitive="int")
+        >>> word = Definition(name="word", primitive="str")
+        >>>
+        >>> @op(name="count", inputs={"repo": repo}, outputs={"commits": commits})
+        ... def count(repo: str):
+        ...     return {"commits": 1}
+        >>>
+        >>> @op(name="report", inputs={"commits": commits}, outputs={})
+        ... def report(commits: int):
+        ...     pass
+        >>>
+        >>> @op(name="upper", inputs={"word": word}, outputs={})
+        ... def upper(word: str):
+        ...     pass
+        >>>
+        >>> sorted(DataFlow(count, report, upper).locking_operations())
+        ['count', 'report']
+        """
+        # Definitions which are locked, or which may be derived from locked
+        # definitions
+        tainted = {
+            name
+            for name, definition in self.definitions.items()
+            if definition.lock
+        }
+        locking = set()
+        found = True
+        while found:
+            found = False
+            for instance_name, operation in self.operations.items():
+                if instance_name in locking:
+                    continue
+                if any(
+                    definition.name in tainted
+                    for definition in itertools.chain(
+                        operation.inputs.values(), operation.conditions
+                    )
+                ):
+                    locking.add(instance_name)
+                    tainted.update(
+                        definition.name
+                        for definition in operation.outputs.values()
+                    )
+                    found = True
+        return locking
+
+    def trusted_outputs(self) -> Dict[str, Dict[str, Definition]]:
+        """
+        Output definitions of each operation, by instance name then output
+        key, whose values don't need to be converted or validated when an
+        input is created from them. Definitions are interned so that all
+        operations outputting the same definition share one instance.
+
+        Examples
+        --------
+
+        >>> from dffml import *
+        >>>
+        >>> word = Definition(name="word", primitive="str")
+        >>> upper = Definition(name="upper", primitive="str", validate=str.upper)
+        >>>
+        >>> @op(name="shout", inputs={}, outputs={"word": word, "upper": upper})
+        ... def shout():
+        ...     return {"word": "hi", "upper": "hi"}
+        >>>
+        >>> DataFlow(shout).trusted_outputs()
+        {'shout': {'word': word}}
+        """
+        trusted = {}
+        for instance_name, operation in self.operations.items():
+            trusted[instance_name] = {}
+            for key, definition in operation.outputs.items():
+                if (
+                    definition.spec is not None
+                    or definition.validate is not None
+                ):
+                    continue
+                # Reuse the dataflow's instance of the definition
+                if self.definitions.get(definition.name) == definition:
+                    definition = self.definitions[definition.name]
+                trusted[instance_name][key] = definition
+        return trusted
+
+    def unreachable_operations(self) -> Set[str]:
+        """
+        Instance names of processing stage operations whose outputs can never
+        make it into the results of a context. That is, they aren't requested
+        by any output operation's spec, and they don't feed any operation which
+        is, or any output or cleanup operation. Validators are never included.
+        If the requested definitions can't be determined, nothing is.
+
+        Examples
+        --------
+
+        >>> from dffml import *
+        >>>
+        >>> @op(name="length", outputs={"length": Definition(name="length", primitive="int")})
+        ... def length(word: str):
+        ...     return {"length": len(word)}
+        >>>
+        >>> @op(name="upper", outputs={"upper": Definition(name="upper", primitive="str")})
+        ... def upper(word: str):
+        ...     return {"upper": word.upper()}
+        >>>
+        >>> dataflow = DataFlow(length, upper, GetSingle)
+        >>> dataflow.seed.append(
+        ...     Input(value=["length"], definition=GetSingle.op.inputs["spec"])
+        ... )
+        >>> dataflow.unreachable_operations()
+        {'upper'}
+        """
+        requested = self.output_definitions()
+        if requested is None:
+            return set()
+        reached = self.operations_reaching(
+            requested,
+            [
+                operation.instance_name
+                for operation in self.operations.values()
+                if operation.stage in (Stage.OUTPUT, Stage.CLEANUP)
+            ],
+        )
+        return {
+            instance_name
+            for instance_name, operation in self.operations.items()
+            if operation.stage == Stage.PROCESSING
+            and not operation.validator
+            and instance_name not in reached
+        }
+
     @classmethod
     def _resolve(cls, source: Dict):
         definitions = {}
@@ -8,6 +8,9 @@ from ..model import Model, ModelContext
 from ..util.internal import records_to_sources, list_records_to_dict
 from ..accuracy.accuracy import AccuracyScorer, AccuracyContext
 
+# Number of records predict writes back to sources at once
+PREDICT_UPDATE_BATCH_SIZE: int = 128
+
 
 async def train(model, *args: Union[BaseSource, Record, Dict[str, Any], List]):
     """
@@ -215,7 +218,8 @@ async def predict(
         filename, or one of the data :doc:`/plugins/dffml_source`.
     update : boolean, optional
         If ``True`` prediction data within records will be written back to all
-        sources given. Defaults to ``False``.
+        sources given. Records are written in batches of
+        ``PREDICT_UPDATE_BATCH_SIZE``. Defaults to ``False``.
     keep_record : boolean, optional
         If ``True`` the results will be kept as their ``Record`` objects instead
         of being converted to a ``(record.key, features, predictions)`` tuple.
@@ -284,12 +288,21 @@ async def predict(
             mctx = await astack.enter_async_context(model())
         elif isinstance(model, ModelContext):
             mctx = model
-        # Run predictions
-        async for record in mctx.predict(sctx):
-            yield record if keep_record else (
-                record.key,
-                record.features(),
-                record.predictions(),
-            )
-            if update:
-                await sctx.update(record)
+        # Records with predictions waiting to be written back to the sources
+        updated = []
+        try:
+            # Run predictions
+            async for record in mctx.predict(sctx):
+                yield record if keep_record else (
+                    record.key,
+                    record.features(),
+                    record.predictions(),
+                )
+                if update:
+                    updated.append(record)
+                    if len(updated) >= PREDICT_UPDATE_BATCH_SIZE:
+                        await sctx.update_many(updated)
+                        updated = []
+        finally:
+            if updated:
+                await sctx.update_many(updated)
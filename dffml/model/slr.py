@@ -169,12 +169,14 @@ class SLRModel(SimpleModel):
         y = []
         # Go through all records that have the feature we're training on and the
         # feature we want to predict. Since our model only supports 1 feature,
-        # the self.features list will only have one element at index 0.
-        async for record in sources.with_features(
+        # the self.features list will only have one element at index 0. Values
+        # come back a column at a time so that we don't have to look at each
+        # record individually.
+        async for columns in sources.feature_columns(
             self.features + [self.config.predict.name]
         ):
-            x.append(record.feature(self.features[0]))
-            y.append(record.feature(self.config.predict.name))
+            x.extend(columns[self.features[0]])
+            y.extend(columns[self.config.predict.name])
         # Use self.logger to report how many records are being used for training
         self.logger.debug("Number of input records: %d", len(x))
         # Save m, b, and accuracy
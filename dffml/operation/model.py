@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 from ..record import Record
 from ..base import config
@@ -107,3 +107,102 @@ async def model_predict(self, features: Dict[str, Any]) -> Dict[str, Any]:
         async with source() as sctx:
             async for record in self.mctx.predict(sctx):
                 return {"prediction": record.predictions()}
+
+
+@op(
+    name="dffml.model.predict_batch",
+    inputs={"features": model_predict.op.inputs["features"]},
+    outputs={"prediction": model_predict.op.outputs["prediction"]},
+    config_cls=ModelPredictConfig,
+    imp_enter={"model": (lambda self: self.config.model)},
+    ctx_enter={"mctx": (lambda self: self.parent.model())},
+    batch=128,
+)
+async def model_predict_batch(
+    self, features: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    Predict using dffml models. Same as :py:func:`model_predict`, but the
+    orchestrator runs up to 128 sets of features, from any of the contexts
+    being run, through the model at once.
+
+    Parameters
+    ----------
+    features : list
+        Dictionaries contaning feature name and feature value, one per
+        context.
+
+    Returns
+    -------
+    list
+        Dictionaries containing prediction, in the same order as features.
+
+    Examples
+    --------
+
+    The following example shows how to use model_predict_batch.
+
+    >>> import asyncio
+    >>> from dffml import *
+    >>>
+    >>> slr_model = SLRModel(
+    ...     features=Features(Feature("Years", int, 1)),
+    ...     predict=Feature("Salary", int, 1),
+    ...     location="tempdir",
+    ... )
+    >>> dataflow = DataFlow(
+    ...     operations={
+    ...         "prediction_using_model": model_predict_batch,
+    ...         "get_single": GetSingle,
+    ...     },
+    ...     configs={"prediction_using_model": ModelPredictConfig(model=slr_model)},
+    ... )
+    >>> dataflow.seed.append(
+    ...     Input(
+    ...         value=[model_predict_batch.op.outputs["prediction"].name],
+    ...         definition=GetSingle.op.inputs["spec"],
+    ...     )
+    ... )
+    >>>
+    >>> async def main():
+    ...     await train(
+    ...         slr_model,
+    ...         {"Years": 0, "Salary": 10},
+    ...         {"Years": 1, "Salary": 20},
+    ...         {"Years": 2, "Salary": 30},
+    ...         {"Years": 3, "Salary": 40},
+    ...     )
+    ...     inputs = {
+    ...         str(years): [
+    ...             Input(
+    ...                 value={"Years": years},
+    ...                 definition=model_predict_batch.op.inputs["features"],
+    ...             )
+    ...         ]
+    ...         for years in (4, 5)
+    ...     }
+    ...     async for ctx, results in MemoryOrchestrator.run(dataflow, inputs):
+    ...         print(ctx, results)
+    >>>
+    >>> asyncio.run(main())
+    4 {'model_predictions': {'Salary': {'confidence': 1.0, 'value': 50}}}
+    5 {'model_predictions': {'Salary': {'confidence': 1.0, 'value': 60}}}
+    """
+
+    predictions = [None] * len(features)
+    async with Sources(
+        MemorySource(
+            MemorySourceConfig(
+                records=[
+                    Record(str(i), data={"features": record_features})
+                    for i, record_features in enumerate(features)
+                ]
+            )
+        )
+    ) as source:
+        async with source() as sctx:
+            async for record in self.mctx.predict(sctx):
+                predictions[int(record.key)] = {
+                    "prediction": record.predictions()
+                }
+    return predictions
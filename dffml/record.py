@@ -176,9 +176,18 @@ class Record(object):
         ).rstrip()
 
     def merge(self, record: "Record"):
-        data = self.data.dict()
-        merge(data, record.data.dict())
-        self.data = self.RECORD_DATA(**data)
+        # Merge in place rather than round tripping both records through dict()
+        # and RECORD_DATA, this is called for every record when sources are
+        # combined
+        self.data.key = record.data.key
+        merge(self.data.features, record.data.features)
+        for target, prediction in record.data.prediction.items():
+            if target in self.data.prediction:
+                merge(self.data.prediction[target], prediction)
+            else:
+                self.data.prediction[target] = RecordPrediction(**prediction)
+        if record.data.last_updated != record.data.last_updated_default:
+            self.data.last_updated = record.data.last_updated
         self.extra.update(record.extra)  # type: ignore
 
     @property
@@ -3,18 +3,30 @@
 """
 Loads records from a csv file, using columns as features
 """
+import os
 import csv
 import ast
+import errno
 import itertools
 import asyncio
-from typing import Dict, List
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 from dataclasses import dataclass
 from contextlib import asynccontextmanager
 
 from ..record import Record
+from ..feature import Feature, Features
 from .memory import MemorySource
-from .file import FileSource, FileSourceConfig
-from ..base import config
+from .file import FileSource, JournalFileSourceConfig, JournalSourceContext
+from ..base import config, field
 from ..util.entrypoint import entrypoint
 from ..configloader.configloader import ConfigLoaders
 
@@ -28,6 +40,10 @@ class OpenCSVFile:
     lock: asyncio.Lock
     write_back_key: bool = True
     write_back_tag: bool = False
+    # Whether sources writing the file journal their records
+    journal: Optional[bool] = None
+    # Number of sources open for writing the file
+    writers: int = 0
 
     async def inc(self):
         async with self.lock:
@@ -45,16 +61,162 @@ CSV_SOURCE_CONFIG_DEFAULT_tag_COLUMN = "tag"
 CSV_SOURCE_CONFIG_DEFAULT_DELIMITER = ","
 CSV_SOURCE_CONFIG_DEFAULT_LOADFILES_NAME = None
 CSV_SOURCE_CONFIG_DEFAULT_NOSTRIP = False
+CSV_SOURCE_CONFIG_DEFAULT_CHUNK_SIZE = 1000
+
+
+def parse_literal(value: str) -> Any:
+    """
+    Parse a value as a Python literal, leaving it as a string if it isn't one
+    """
+    try:
+        return ast.literal_eval(value)
+    except (SyntaxError, ValueError):
+        return value
+
+
+def parse_bool(value: str) -> Any:
+    if value == "True":
+        return True
+    elif value == "False":
+        return False
+    return parse_literal(value)
+
+
+def typed_parser(dtype: Callable[[str], Any]) -> Callable[[str], Any]:
+    """
+    Parser converting values with dtype, falling back to parsing values which
+    dtype cannot convert as Python literals
+    """
+
+    def parse(value: str) -> Any:
+        try:
+            return dtype(value)
+        except ValueError:
+            return parse_literal(value)
+
+    return parse
+
+
+# Parsers for the values of columns of features with these dtypes
+CSV_SOURCE_DTYPE_PARSERS: Dict[type, Callable[[str], Any]] = {
+    int: typed_parser(int),
+    float: typed_parser(float),
+    str: str,
+    bool: parse_bool,
+}
+
+
+def column_parser(feature: Feature) -> Callable[[str], Any]:
+    """
+    Parser for the values of a feature's column. Features holding more than
+    one value are parsed as Python literals.
+    """
+    if feature.length != 1:
+        return parse_literal
+    return CSV_SOURCE_DTYPE_PARSERS.get(feature.dtype, parse_literal)
 
 
 @config
-class CSVSourceConfig(FileSourceConfig):
+class CSVSourceConfig(JournalFileSourceConfig):
     key: str = CSV_SOURCE_CONFIG_DEFAULT_KEY
     tag: str = CSV_SOURCE_CONFIG_DEFAULT_tag
     tagcol: str = CSV_SOURCE_CONFIG_DEFAULT_tag_COLUMN
     delimiter: str = CSV_SOURCE_CONFIG_DEFAULT_DELIMITER
     loadfiles: List[str] = CSV_SOURCE_CONFIG_DEFAULT_LOADFILES_NAME
     nostrip: bool = CSV_SOURCE_CONFIG_DEFAULT_NOSTRIP
+    features: Features = field(
+        "Features whose dtype is used to parse their column, values of other "
+        "columns are parsed as Python literals",
+        default_factory=lambda: Features(),
+    )
+    stream: bool = field(
+        "Parse records from the file as they are iterated over rather than "
+        "loading them all into memory when opened. Source is read only",
+        default=False,
+    )
+    chunk_size: int = field(
+        "Number of rows parsed at a time before other tasks may run",
+        default=CSV_SOURCE_CONFIG_DEFAULT_CHUNK_SIZE,
+    )
+
+
+class CSVColumns:
+    """
+    What each column of a CSV file holds, worked out once from its header
+    """
+
+    def __init__(self, fieldnames: List[str], config: CSVSourceConfig):
+        parsers = {
+            feature.name: column_parser(feature) for feature in config.features
+        }
+        loadfiles = config.loadfiles if config.loadfiles else []
+        self.width = len(fieldnames)
+        self.key: Optional[int] = None
+        self.tag: Optional[int] = None
+        # Index of each loadfiles column by name
+        self.loadfiles: Dict[str, int] = {}
+        # Index, name, and parser of each feature column. Parser is None for
+        # columns in loadfiles.
+        self.features: List[Tuple[int, str, Optional[Callable]]] = []
+        # Index of prediction and confidence columns by target name
+        self.predictions: Dict[str, int] = {}
+        self.confidences: Dict[str, int] = {}
+        for index, name in enumerate(fieldnames):
+            if name in loadfiles:
+                self.loadfiles[name] = index
+            if name == config.tagcol:
+                self.tag = index
+            elif name == config.key:
+                self.key = index
+            elif name.startswith("prediction_"):
+                self.predictions[name[len("prediction_") :]] = index
+            elif name.startswith("confidence_"):
+                self.confidences[name[len("confidence_") :]] = index
+            elif name in loadfiles:
+                self.features.append((index, name, None))
+            else:
+                self.features.append(
+                    (index, name, parsers.get(name, parse_literal))
+                )
+
+
+class CSVSourceContext(JournalSourceContext):
+    async def update(self, record):
+        if self.parent.config.stream:
+            raise ValueError(
+                f"{self.parent.config.filename} cannot be written to when streaming"
+            )
+        await super().update(record)
+
+    async def records(self) -> AsyncIterator[Record]:
+        if not self.parent.config.stream:
+            async for record in super().records():
+                yield record
+            return
+        async for record in self.parent.stream_records():
+            yield record
+
+    async def record(self, key: str) -> Record:
+        if not self.parent.config.stream:
+            return await super().record(key)
+        async for record in self.parent.stream_records():
+            if record.key == key:
+                return record
+        return Record(key)
+
+    async def records_by_keys(self, keys: List[str]) -> AsyncIterator[Record]:
+        if not self.parent.config.stream:
+            async for record in super().records_by_keys(keys):
+                yield record
+            return
+        # Find all the keys in one pass over the file
+        keys = set(keys)
+        async for record in self.parent.stream_records():
+            if record.key in keys:
+                keys.remove(record.key)
+                yield record
+                if not keys:
+                    return
 
 
 # CSVSource is a bit of a mess
@@ -62,9 +224,17 @@ class CSVSourceConfig(FileSourceConfig):
 class CSVSource(FileSource, MemorySource):
     """
     Uses a CSV file as the source of record feature data
+
+    With ``stream`` set records are parsed from the file as they are iterated
+    over, rather than all being loaded into memory when the source is opened.
+    The source is read only when streaming.
+
+    With ``journal`` set updated records are appended to a journal rather
+    than the whole file being rewritten on close.
     """
 
     CONFIG = CSVSourceConfig
+    CONTEXT = CSVSourceContext
 
     # Headers we've added to track data other than feature data for a record
     CSV_HEADERS = ["prediction", "confidence"]
@@ -82,10 +252,12 @@ class CSVSource(FileSource, MemorySource):
                     active=1, lock=asyncio.Lock(), write_out={}
                 )
                 self.OPEN_CSV_FILES[self.config.filename] = open_file
+                self.check_journal(open_file)
                 if fd is not None:
                     await self.read_csv(fd, open_file)
             else:
                 self.logger.debug(f"{self.config.filename} already open")
+                self.check_journal(self.OPEN_CSV_FILES[self.config.filename])
                 await self.OPEN_CSV_FILES[self.config.filename].inc()
             yield self.OPEN_CSV_FILES[self.config.filename]
 
@@ -93,101 +265,153 @@ class CSVSource(FileSource, MemorySource):
         async with self._open_csv():
             return {}
 
-    async def read_csv(self, fd, open_file):
-        dict_reader = csv.DictReader(
+    async def _open(self):
+        if not self.config.stream:
+            await super()._open()
+            return
+        if self.config.readwrite:
+            raise ValueError(
+                f"{self.config.filename} cannot be written to when streaming"
+            )
+        if not self.config.allowempty and not os.path.isfile(
+            self.config.filename
+        ):
+            raise FileNotFoundError(
+                errno.ENOENT, os.strerror(errno.ENOENT), self.config.filename,
+            )
+
+    def _reader(self, fd) -> Tuple[Optional[CSVColumns], Iterator[List[str]]]:
+        """
+        Read the header of a CSV file and work out what each column holds
+        """
+        reader = csv.reader(
             fd, delimiter=self.config.delimiter, dialect="strip"
         )
-        # Record what headers are present when the file was opened
-        if not self.config.key in dict_reader.fieldnames:
-            open_file.write_back_key = False
-        if self.config.tagcol in dict_reader.fieldnames:
-            open_file.write_back_tag = True
-        # Store all the records by their tag in write_out
-        open_file.write_out = {}
+        fieldnames = next(reader, None)
+        if fieldnames is None:
+            return None, reader
+        if not self.config.nostrip:
+            fieldnames = [name.strip() for name in fieldnames]
+        return CSVColumns(fieldnames, self.config), reader
+
+    async def parse_rows(
+        self,
+        columns: CSVColumns,
+        reader: Iterator[List[str]],
+        tag: Optional[str] = None,
+    ) -> AsyncIterator[Tuple[str, str, Dict[str, Any]]]:
+        """
+        Yields the tag, key, and record data of each row. Only rows with the
+        given tag are parsed if tag is given.
+        """
+        strip = not self.config.nostrip
         # If there is no key track row index to be used as key by tag
         index = {}
-        for row in dict_reader:
-            # Strip the keys and values of row
-            if not self.config.nostrip:
-                row = {k.strip(): v.strip() for k, v in row.items()}
-            # Grab tag from row
-            tag = row.get(self.config.tagcol, self.config.tag)
-            # Load via ConfigLoaders if loadfiles parameter is given
-            cfgl_data = {}
-            if self.config.loadfiles:
-                for loadfile in self.config.loadfiles:
-                    async with self.CONFIG_LOADER as cfgl:
-                        _, cfgl_data[loadfile] = await cfgl.load_file(
-                            row[loadfile]
-                        )
-            if self.config.tagcol in row:
-                del row[self.config.tagcol]
-            index.setdefault(tag, 0)
-            # Grab key from row
-            key = row.get(self.config.key, str(index[tag]))
-            if self.config.key in row:
-                del row[self.config.key]
-            else:
-                index[tag] += 1
-            # Record data we are going to parse from this row (must include
-            # features).
-            record_data = {}
-            # Parse headers we as the CSV source added
-            csv_meta = {}
-            row_keys = []
-            # getting all keys starting with "prediction","confidence"
-            for header in self.CSV_HEADERS:
-                row_keys.extend(
-                    list(
-                        filter(
-                            lambda x: x.startswith(header + "_"), row.keys()
-                        )
-                    )
-                )
-            # pop all prediction data from row and save in csv_meta
-            for header in row_keys:
-                value = row.get(header, None)
-                if value is not None and value != "":
-                    csv_meta[header] = row[header]
-                    # Remove from feature data
-                    del row[header]
-            # Set the features
-            features = {}
-            for _key, _value in row.items():
-                if self.config.loadfiles:
-                    if _key in self.config.loadfiles:
-                        _value = cfgl_data[_key]
-                if _value != "":
-                    try:
-                        features[_key] = ast.literal_eval(_value)
-                    except (SyntaxError, ValueError):
-                        features[_key] = _value
-            if features:
-                record_data["features"] = features
-
-            # Getting all prediction target names
-            target_keys = filter(
-                lambda x: x.startswith("prediction_"), csv_meta.keys()
-            )
-            target_keys = map(
-                lambda x: x.replace("prediction_", ""), target_keys
-            )
+        while True:
+            chunk = list(itertools.islice(reader, self.config.chunk_size))
+            if not chunk:
+                break
+            for row in chunk:
+                # Skip blank lines
+                if not row:
+                    continue
+                if strip:
+                    row = [value.strip() for value in row]
+                if len(row) < columns.width:
+                    row.extend([""] * (columns.width - len(row)))
+                # Grab tag from row
+                if columns.tag is None:
+                    row_tag = self.config.tag
+                else:
+                    row_tag = row[columns.tag]
+                index.setdefault(row_tag, 0)
+                # Grab key from row
+                if columns.key is None:
+                    key = str(index[row_tag])
+                    index[row_tag] += 1
+                else:
+                    key = row[columns.key]
+                if tag is not None and row_tag != tag:
+                    continue
+                yield row_tag, key, await self.parse_row(columns, row)
+            # Let other tasks run between chunks
+            await asyncio.sleep(0)
 
-            predictions = {
-                target_name: {
-                    "value": str(csv_meta["prediction_" + target_name]),
-                    "confidence": float(csv_meta["confidence_" + target_name]),
-                }
-                for target_name in target_keys
+    async def parse_row(
+        self, columns: CSVColumns, row: List[str]
+    ) -> Dict[str, Any]:
+        """
+        Parses a row of a CSV file into record data
+        """
+        # Load via ConfigLoaders if loadfiles parameter is given
+        cfgl_data = {}
+        for loadfile, index in columns.loadfiles.items():
+            async with self.CONFIG_LOADER as cfgl:
+                _, cfgl_data[loadfile] = await cfgl.load_file(row[index])
+        # Record data we are going to parse from this row (must include
+        # features).
+        record_data = {}
+        # Set the features
+        features = {}
+        for index, name, parse in columns.features:
+            if parse is None:
+                features[name] = cfgl_data[name]
+            elif row[index] != "":
+                features[name] = parse(row[index])
+        if features:
+            record_data["features"] = features
+        # Parse headers we as the CSV source added
+        record_data["prediction"] = {
+            target_name: {
+                "value": row[index],
+                "confidence": float(row[columns.confidences[target_name]]),
             }
-            record_data.update({"prediction": predictions})
-            # If there was no data in the row, skip it
-            if not record_data and key == str(index[tag] - 1):
-                continue
+            for target_name, index in columns.predictions.items()
+            if row[index] != ""
+        }
+        return record_data
+
+    async def read_csv(self, fd, open_file):
+        columns, reader = self._reader(fd)
+        # Store all the records by their tag in write_out
+        open_file.write_out = {}
+        if columns is None:
+            return
+        # Record what headers are present when the file was opened
+        if columns.key is None:
+            open_file.write_back_key = False
+        if columns.tag is not None:
+            open_file.write_back_tag = True
+        async for tag, key, record_data in self.parse_rows(columns, reader):
             # Add the record to our internal memory representation
             open_file.write_out.setdefault(tag, {})
             open_file.write_out[tag][key] = Record(key, data=record_data)
 
+    async def stream_records(self) -> AsyncIterator[Record]:
+        """
+        Parses records with the configured tag from the file as they are
+        iterated over, holding no more than chunk_size rows in memory
+        """
+        # Updates to records which have not yet been written to the file
+        journaled = {}
+        if getattr(self.config, "journal", False):
+            for tag, key, record_data in self.journal_records():
+                if tag == self.config.tag:
+                    journaled[key] = record_data
+        if os.path.isfile(self.config.filename):
+            with self._read_opener() as fd:
+                columns, reader = self._reader(fd)
+                if columns is not None:
+                    async for _tag, key, record_data in self.parse_rows(
+                        columns, reader, tag=self.config.tag
+                    ):
+                        if key in journaled:
+                            record_data = journaled.pop(key)
+                        yield Record(key, data=record_data)
+        # Records which were added after the file was last written
+        for key, record_data in journaled.items():
+            yield Record(key, data=record_data)
+
     async def load_fd(self, fd):
         """
         Parses a CSV stream into Record instances
@@ -202,54 +426,71 @@ class CSVSource(FileSource, MemorySource):
         """
         async with self.OPEN_CSV_FILES_LOCK:
             open_file = self.OPEN_CSV_FILES[self.config.filename]
-            open_file.write_out.setdefault(self.config.tag, {})
-            open_file.write_out[self.config.tag].update(self.mem)
+            self.release_journal(open_file)
+            # Journaled records are replayed when the file is next opened
+            if fd is not None:
+                open_file.write_out.setdefault(self.config.tag, {})
+                open_file.write_out[self.config.tag].update(self.mem)
             # Bail if not last open source for this file
             if not (await open_file.dec()):
                 return
-            # Add our headers
-            fieldnames = (
-                [] if not open_file.write_back_key else [self.config.key]
-            )
-            fieldnames.append(self.config.tagcol)
-            # Get all the feature names
-            feature_fieldnames = set()
-            prediction_fieldnames = set()
-            for tag, records in open_file.write_out.items():
-                for record in records.values():
-                    feature_fieldnames |= set(record.data.features.keys())
-                    prediction_fieldnames |= set(record.data.prediction.keys())
-            fieldnames += sorted(list(feature_fieldnames))
-            fieldnames += itertools.chain(
-                *list(
-                    map(
-                        lambda key: ("prediction_" + key, "confidence_" + key),
-                        list(prediction_fieldnames),
-                    )
-                )
-            )
-            self.logger.debug(f"fieldnames: {fieldnames}")
-            # Write out the file
-            writer = csv.DictWriter(fd, fieldnames=fieldnames)
-            writer.writeheader()
-            for tag, records in open_file.write_out.items():
-                for record in records.values():
-                    record_data = record.dict()
-                    row = {name: "" for name in fieldnames}
-                    # Always write the tag
-                    row[self.config.tagcol] = tag
-                    # Write the key if it existed
-                    if open_file.write_back_key:
-                        row[self.config.key] = record.key
-                    # Write the features
-                    for key, value in record_data.get("features", {}).items():
-                        row[key] = value
-                    # Write the prediction
-                    if "prediction" in record_data:
-                        for key, value in record_data["prediction"].items():
-                            row["prediction_" + key] = value["value"]
-                            row["confidence_" + key] = value["confidence"]
-                    writer.writerow(row)
             del self.OPEN_CSV_FILES[self.config.filename]
+            if fd is None:
+                return
+            self.write_csv(fd, open_file)
             self.logger.debug(f"{self.config.filename} written")
         self.logger.debug("%r saved %d records", self, len(self.mem))
+
+    async def compact_fd(self, fd):
+        async with self.OPEN_CSV_FILES_LOCK:
+            open_file = self.OPEN_CSV_FILES[self.config.filename]
+            for tag, key, record_data in self.journal_records():
+                open_file.write_out.setdefault(tag, {})
+                open_file.write_out[tag][key] = Record(key, data=record_data)
+            self.write_csv(fd, open_file)
+
+    def write_csv(self, fd, open_file):
+        """
+        Writes the records of every tag in an open file into a CSV stream
+        """
+        # Add our headers
+        fieldnames = [] if not open_file.write_back_key else [self.config.key]
+        fieldnames.append(self.config.tagcol)
+        # Get all the feature names
+        feature_fieldnames = set()
+        prediction_fieldnames = set()
+        for tag, records in open_file.write_out.items():
+            for record in records.values():
+                feature_fieldnames |= set(record.data.features.keys())
+                prediction_fieldnames |= set(record.data.prediction.keys())
+        fieldnames += sorted(list(feature_fieldnames))
+        fieldnames += itertools.chain(
+            *list(
+                map(
+                    lambda key: ("prediction_" + key, "confidence_" + key),
+                    list(prediction_fieldnames),
+                )
+            )
+        )
+        self.logger.debug(f"fieldnames: {fieldnames}")
+        # Write out the file
+        writer = csv.DictWriter(fd, fieldnames=fieldnames)
+        writer.writeheader()
+        for tag, records in open_file.write_out.items():
+            for record in records.values():
+                record_data = record.dict()
+                row = {name: "" for name in fieldnames}
+                # Always write the tag
+                row[self.config.tagcol] = tag
+                # Write the key if it existed
+                if open_file.write_back_key:
+                    row[self.config.key] = record.key
+                # Write the features
+                for key, value in record_data.get("features", {}).items():
+                    row[key] = value
+                # Write the prediction
+                if "prediction" in record_data:
+                    for key, value in record_data["prediction"].items():
+                        row["prediction_" + key] = value["value"]
+                        row["confidence_" + key] = value["confidence"]
+                writer.writerow(row)
@@ -1,7 +1,7 @@
 """
 Expose Pandas DataFrame as DFFML Source
 """
-from typing import AsyncIterator, List
+from typing import AsyncIterator, List, Dict, Any, Optional
 
 
 from ..record import Record
@@ -42,6 +42,38 @@ class DataFrameSourceContext(BaseSourceContext):
                 data={"features": features, "prediction": predictions},
             )
 
+    async def feature_columns(
+        self, features: List[str], batch_size: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        df = self.parent.config.dataframe
+        # Prediction columns are not features, fall back to records so that
+        # missing features are reported the same way
+        if not len(df.index) or any(
+            feature not in df.columns
+            or feature in self.parent.config.predictions
+            for feature in features
+        ):
+            async for columns in super().feature_columns(
+                features, batch_size=batch_size
+            ):
+                yield columns
+            return
+        arrays = {}
+        for feature in features:
+            # Object columns hold values such as lists, which NumPy only makes
+            # into a two dimensional array when given a list of them
+            if df[feature].dtype == object:
+                arrays[feature] = df[feature].tolist()
+            else:
+                arrays[feature] = df[feature].to_numpy()
+        if not batch_size:
+            batch_size = len(df.index)
+        for i in range(0, len(df.index), batch_size):
+            yield {
+                feature: array[i : i + batch_size]
+                for feature, array in arrays.items()
+            }
+
     async def record(self, key: str) -> Record:
         data = self.parent.config.dataframe.iloc[int(key)]
         predictions = {
@@ -1,5 +1,5 @@
 import collections
-from typing import Type, AsyncIterator, List
+from typing import Type, AsyncIterator, List, Dict, Any, Optional
 
 from ..base import config, BaseConfig
 from ..db.base import BaseDatabase, Condition
@@ -16,7 +16,10 @@ class DbSourceConfig(BaseConfig):
 
 
 class DbSourceContext(BaseSourceContext):
-    async def update(self, record: Record):
+    def row(self, record: Record) -> Dict[str, Any]:
+        """
+        Values of each model column for a record
+        """
         model_columns = self.parent.config.model_columns
         key_value_pairs = collections.OrderedDict()
         for key in model_columns:
@@ -41,17 +44,71 @@ class DbSourceContext(BaseSourceContext):
                     key_value_pairs[key] = 1
             else:
                 key_value_pairs[key] = record.data.__dict__[key]
+        return key_value_pairs
+
+    async def update(self, record: Record):
+        await self.update_many([record])
+
+    async def update_many(self, records: List[Record]):
+        rows = [self.row(record) for record in records]
         async with self.parent.db() as db_ctx:
-            await db_ctx.insert_or_update(
-                self.parent.config.table_name, key_value_pairs
+            await db_ctx.insert_or_update_many(
+                self.parent.config.table_name, rows
             )
-        self.logger.debug("update: %s", await self.record(record.key))
+        for row in rows:
+            self.logger.debug("update: %s", row)
 
     async def records(self) -> AsyncIterator[Record]:
         async with self.parent.db() as db_ctx:
             async for result in db_ctx.lookup(self.parent.config.table_name):
                 yield self.convert_to_record(result)
 
+    async def records_by_keys(self, keys: List[str]) -> AsyncIterator[Record]:
+        if not keys:
+            return
+        async with self.parent.db() as db_ctx:
+            async for result in db_ctx.lookup(
+                self.parent.config.table_name,
+                # Conditions within the inner list are joined with OR
+                conditions=[[Condition("key", "=", key) for key in keys]],
+            ):
+                yield self.convert_to_record(result)
+
+    async def feature_columns(
+        self, features: List[str], batch_size: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, List[Any]]]:
+        cols = ["feature_" + feature for feature in features]
+        # Fall back to records so that missing features are reported the same
+        # way
+        if not all(col in self.parent.config.model_columns for col in cols):
+            async for columns in super().feature_columns(
+                features, batch_size=batch_size
+            ):
+                yield columns
+            return
+        columns = {feature: [] for feature in features}
+        count = 0
+        found = False
+        async with self.parent.db() as db_ctx:
+            async for result in db_ctx.lookup(
+                self.parent.config.table_name, cols=cols
+            ):
+                for feature, col in zip(features, cols):
+                    columns[feature].append(result[col])
+                count += 1
+                if batch_size and count >= batch_size:
+                    found = True
+                    yield columns
+                    columns = {feature: [] for feature in features}
+                    count = 0
+        if count:
+            yield columns
+        elif not found:
+            async for columns in super().feature_columns(
+                features, batch_size=batch_size
+            ):
+                yield columns
+
     def convert_to_record(self, result):
         modified_record = {
             "key": "",
@@ -75,15 +132,20 @@ class DbSourceContext(BaseSourceContext):
     async def record(self, key: str):
         record = Record(key)
         async with self.parent.db() as db_ctx:
+            rows = db_ctx.lookup(
+                self.parent.config.table_name,
+                cols=None,  # None turns into *. We want all rows
+                conditions=[[Condition("key", "=", key)]],
+            )
             try:
-                row = await db_ctx.lookup(
-                    self.parent.config.table_name,
-                    cols=None,  # None turns into *. We want all rows
-                    conditions=[[Condition("key", "=", key)]],
-                ).__anext__()
+                row = await rows.__anext__()
             except StopAsyncIteration:
                 # This would happen if there is no matching row, so the async generator reached the end
                 return record
+            finally:
+                # Release the database's cursor rather than waiting for the
+                # generator to be garbage collected
+                await rows.aclose()
 
         if row is not None:
             features = {}
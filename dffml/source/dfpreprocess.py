@@ -1,5 +1,5 @@
 import pathlib
-from typing import AsyncIterator, List
+from typing import AsyncIterator, List, Optional, Tuple
 
 from ..base import config, field
 from ..configloader.configloader import BaseConfigLoader
@@ -46,6 +46,11 @@ class DataFlowPreprocessSourceConfig:
     no_strict: bool = field(
         "Do not exit on operation exceptions, just log errors", default=False,
     )
+    max_ctxs: int = field(
+        "Maximum number of records to read and run through the dataflow "
+        "before the results of earlier records have been yielded",
+        default=128,
+    )
     orchestrator: BaseOrchestrator = field(
         "Orchestrator",
         default_factory=lambda: MemoryOrchestrator.withconfig({}),
@@ -72,7 +77,15 @@ class RecordInputSetContext(BaseInputSetContext):
 
 
 class DataFlowPreprocessSourceContext(BaseSourceContext):
-    async def input_set(self, record: Record) -> List[Input]:
+    async def input_set(
+        self, record: Record, *, length: Optional[int] = None
+    ) -> List[Input]:
+        """
+        Inputs for a record. ``length`` is the length of the wrapped source,
+        it's requested from the wrapped source if needed and not given.
+        """
+        if self.parent.config.length and length is None:
+            length = await self.sctx.length()
         return (
             [
                 Input(
@@ -95,7 +108,7 @@ class DataFlowPreprocessSourceContext(BaseSourceContext):
                 if not self.parent.config.length
                 else [
                     Input(
-                        value=await self.sctx.length(),
+                        value=length,
                         definition=Definition(
                             name=self.parent.config.length, primitive="int",
                         ),
@@ -139,13 +152,25 @@ class DataFlowPreprocessSourceContext(BaseSourceContext):
                     ctx.record.evaluated(result)
                 return ctx.record
 
+    async def ctx_inputs(
+        self,
+    ) -> AsyncIterator[Tuple[RecordInputSetContext, List[Input]]]:
+        """
+        Yield the context and inputs for each record in the wrapped source. The
+        orchestrator pulls from this as it starts new contexts, so at most
+        ``max_ctxs`` records are read ahead of those which have been yielded.
+        """
+        length = None
+        if self.parent.config.length:
+            length = await self.sctx.length()
+        async for record in self.sctx.records():
+            yield RecordInputSetContext(record), await self.input_set(
+                record, length=length
+            )
+
     async def records(self) -> AsyncIterator[Record]:
         async for ctx, result in self.octx.run(
-            {
-                RecordInputSetContext(record): await self.input_set(record)
-                async for record in self.sctx.records()
-            },
-            strict=not self.parent.config.no_strict,
+            self.ctx_inputs(), strict=not self.parent.config.no_strict,
         ):
             if result:
                 ctx.record.evaluated(result)
@@ -167,7 +192,7 @@ class DataFlowPreprocessSourceContext(BaseSourceContext):
                     )
 
         self.octx = await self.parent.orchestrator(
-            self.parent.config.dataflow
+            self.parent.config.dataflow, max_ctxs=self.parent.config.max_ctxs,
         ).__aenter__()
 
         return self
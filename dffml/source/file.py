@@ -4,15 +4,20 @@ import os
 import io
 import abc
 import bz2
+import json
 import gzip
 import lzma
 import errno
 import zipfile
 from contextlib import contextmanager
 import pathlib
+from typing import Any, Dict, Iterator, Optional, Tuple
 
-from ..base import config
+from ..base import config, field
+from ..record import Record
 from .source import BaseSource
+from .memory import MemorySourceContext
+from ..util.data import export_dict
 from ..util.entrypoint import entrypoint
 
 
@@ -25,6 +30,31 @@ class FileSourceConfig:
     mkdirs: bool = False
 
 
+@config
+class JournalFileSourceConfig(FileSourceConfig):
+    journal: bool = field(
+        "Append updated records to a journal next to the file rather than "
+        "rewriting the whole file when closing. The journal is replayed when "
+        "the file is opened",
+        default=False,
+    )
+    compact_after: int = field(
+        "Rewrite the file with the records in the journal when closing if it "
+        "holds at least this many records. If 0 the file is only rewritten "
+        "when compact() is called",
+        default=0,
+    )
+
+
+class JournalSourceContext(MemorySourceContext):
+    async def update(self, record: Record):
+        await super().update(record)
+        if self.parent.config.readwrite and getattr(
+            self.parent.config, "journal", False
+        ):
+            self.parent.journal_append(record)
+
+
 @entrypoint("file")
 class FileSource(BaseSource):
     """
@@ -43,6 +73,9 @@ class FileSource(BaseSource):
         if isinstance(getattr(self.config, "filename", None), str):
             with self.config.no_enforce_immutable():
                 self.config.filename = pathlib.Path(self.config.filename)
+        # Journal opened for appending and number of records within it
+        self.journal_fd = None
+        self.journal_length = 0
 
     async def __aenter__(self) -> "BaseSourceContext":
         await self._open()
@@ -55,6 +88,13 @@ class FileSource(BaseSource):
         return {}
 
     async def _open(self):
+        await self._load()
+        if getattr(self.config, "journal", False):
+            for tag, key, data in self.journal_records():
+                if tag == self.config.tag:
+                    self.mem[key] = Record(key, data=data)
+
+    async def _load(self):
         # Create directories for default source if not exists
         filepath = pathlib.Path(self.config.filename)
         if not filepath.parent.is_dir() and self.config.mkdirs:
@@ -75,45 +115,173 @@ class FileSource(BaseSource):
                     os.strerror(errno.ENOENT),
                     self.config.filename,
                 )
+        with self._read_opener() as fd:
+            await self.load_fd(fd)
+
+    def _read_opener(self):
+        """
+        Opener for reading the file, decompressing it based on its suffix
+        """
         if self.config.filename.suffix == ".gz":
-            opener = gzip.open(self.config.filename, self.READMODE_COMPRESSED)
+            return gzip.open(self.config.filename, self.READMODE_COMPRESSED)
         elif self.config.filename.suffix == ".bz2":
-            opener = bz2.open(self.config.filename, self.READMODE_COMPRESSED)
+            return bz2.open(self.config.filename, self.READMODE_COMPRESSED)
         elif (
             self.config.filename.suffix == ".xz"
             or self.config.filename.suffix == ".lzma"
         ):
-            opener = lzma.open(self.config.filename, self.READMODE_COMPRESSED)
+            return lzma.open(self.config.filename, self.READMODE_COMPRESSED)
         elif self.config.filename.suffix == ".zip":
-            opener = self.zip_opener_helper()
-        else:
-            opener = open(self.config.filename, self.READMODE)
-        with opener as fd:
-            await self.load_fd(fd)
+            return self.zip_opener_helper()
+        return open(self.config.filename, self.READMODE)
+
+    def _write_opener(self, path: Optional[pathlib.Path] = None):
+        """
+        Opener for writing the file, or path in its place, compressing it
+        based on the file's suffix
+        """
+        if self.config.filename.suffix == ".zip":
+            if path is None:
+                return self.zip_closer_helper()
+            return self.zip_closer_helper(path)
+        if path is None:
+            path = self.config.filename
+        if self.config.filename.suffix == ".gz":
+            return gzip.open(path, self.WRITEMODE_COMPRESSED)
+        elif self.config.filename.suffix == ".bz2":
+            return bz2.open(path, self.WRITEMODE_COMPRESSED)
+        elif (
+            self.config.filename.suffix == ".xz"
+            or self.config.filename.suffix == ".lzma"
+        ):
+            return lzma.open(path, self.WRITEMODE_COMPRESSED)
+        return open(path, self.WRITEMODE, newline="")
 
     async def _close(self):
+        if not self.config.readwrite:
+            return
+        if not getattr(self.config, "journal", False):
+            with self._write_opener() as fd:
+                await self.dump_fd(fd)
+            return
+        if self.journal_fd is not None:
+            self.journal_fd.close()
+            self.journal_fd = None
+        if (
+            self.config.compact_after
+            and self.journal_length >= self.config.compact_after
+        ):
+            await self.compact()
+        # Records are already in the journal, release the file without
+        # writing it
+        await self.dump_fd(None)
+
+    def check_journal(self, open_file) -> None:
+        """
+        Raise a ValueError if the file is open for writing by a source whose
+        ``journal`` option differs. Sources which journal don't add their
+        records to the state shared by sources open on the same file, so the
+        file can't be written correctly by either. ``open_file`` is the shared
+        state, its ``journal`` attribute is set while any source has the file
+        open for writing, and ``writers`` counts them.
+        """
+        if not self.config.readwrite:
+            return
+        journal = getattr(self.config, "journal", False)
+        if open_file.writers and open_file.journal != journal:
+            raise ValueError(
+                f"{self.config.filename} is already open for writing with journal={open_file.journal}"
+            )
+        open_file.journal = journal
+        open_file.writers += 1
+
+    def release_journal(self, open_file) -> None:
+        """
+        Called when a source which called :py:meth:`check_journal` is closed
+        """
         if self.config.readwrite:
-            if self.config.filename.suffix == ".gz":
-                close = gzip.open(
-                    self.config.filename, self.WRITEMODE_COMPRESSED
-                )
-            elif self.config.filename.suffix == ".bz2":
-                close = bz2.open(
-                    self.config.filename, self.WRITEMODE_COMPRESSED
-                )
-            elif (
-                self.config.filename.suffix == ".xz"
-                or self.config.filename.suffix == ".lzma"
-            ):
-                close = lzma.open(
-                    self.config.filename, self.WRITEMODE_COMPRESSED
+            open_file.writers -= 1
+
+    @property
+    def journal_path(self) -> pathlib.Path:
+        """
+        Journal of updated records, kept next to the file
+        """
+        return self.config.filename.with_name(
+            self.config.filename.name + ".journal"
+        )
+
+    def journal_records(self) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """
+        Yields the tag, key, and data of each record in the journal, oldest
+        first
+        """
+        self.journal_length = 0
+        if not self.journal_path.is_file():
+            return
+        with open(self.journal_path) as fd:
+            for line in fd:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Last line may be partially written if we were killed
+                    self.logger.warning(
+                        "%s: Skipping malformed journal entry: %r",
+                        self.journal_path,
+                        line,
+                    )
+                    continue
+                self.journal_length += 1
+                yield entry["tag"], entry["key"], entry["data"]
+
+    def journal_append(self, record: Record) -> None:
+        """
+        Append an updated record to the journal
+        """
+        if self.journal_fd is None:
+            self.journal_fd = open(self.journal_path, "a")
+        self.journal_fd.write(
+            json.dumps(
+                export_dict(
+                    tag=self.config.tag, key=record.key, data=record.dict()
                 )
-            elif self.config.filename.suffix == ".zip":
-                close = self.zip_closer_helper()
-            else:
-                close = open(self.config.filename, self.WRITEMODE, newline="")
-            with close as fd:
-                await self.dump_fd(fd)
+            )
+            + "\n"
+        )
+        self.journal_fd.flush()
+        self.journal_length += 1
+
+    async def compact(self):
+        """
+        Rewrite the file with the records in the journal applied to it, then
+        empty the journal. Must be called while the source is open.
+
+        The new file is written next to the old one and then replaces it, so
+        the file is never left partially written. The journal is replayed
+        again if it isn't emptied, which gives the same records.
+        """
+        compacting = self.config.filename.with_name(
+            self.config.filename.name + ".compacting"
+        )
+        try:
+            with self._write_opener(compacting) as fd:
+                await self.compact_fd(fd)
+            with open(compacting, "rb") as fd:
+                os.fsync(fd.fileno())
+            os.replace(compacting, self.config.filename)
+        finally:
+            if compacting.exists():
+                compacting.unlink()
+        with open(self.journal_path, "w"):
+            pass
+        self.journal_length = 0
+        self.logger.debug("%s compacted", self.config.filename)
+
+    async def compact_fd(self, fd):
+        """
+        Write the contents of the file with the records in the journal applied
+        """
+        raise NotImplementedError
 
     @contextmanager
     def zip_opener_helper(self):
@@ -125,9 +293,11 @@ class FileSource(BaseSource):
                     yield fd
 
     @contextmanager
-    def zip_closer_helper(self):
+    def zip_closer_helper(self, path: Optional[pathlib.Path] = None):
         with zipfile.ZipFile(
-            self.config.filename, self.WRITEMODE, compression=zipfile.ZIP_BZIP2
+            self.config.filename if path is None else path,
+            self.WRITEMODE,
+            compression=zipfile.ZIP_BZIP2,
         ) as archive:
             with archive.open(
                 self.__class__.__qualname__,
@@ -143,7 +313,10 @@ class FileSource(BaseSource):
 
     @abc.abstractmethod
     async def dump_fd(self, fd):
-        pass  # pragma: no cover
+        """
+        Write records to fd. fd is None when records were journaled, in which
+        case the file should not be written.
+        """
 
 
 @config
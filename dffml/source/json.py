@@ -4,11 +4,11 @@ import json
 import asyncio
 from dataclasses import dataclass
 from contextlib import asynccontextmanager
-from typing import Dict
+from typing import Dict, Optional
 
 from ..record import Record
 from .memory import MemorySource
-from .file import FileSource, FileSourceConfig
+from .file import FileSource, JournalFileSourceConfig, JournalSourceContext
 from ..util.entrypoint import entrypoint
 from ..util.data import export_dict
 
@@ -17,7 +17,7 @@ from .log import LOGGER
 LOGGER = LOGGER.getChild("json")
 
 
-class JSONSourceConfig(FileSourceConfig):
+class JSONSourceConfig(JournalFileSourceConfig):
     pass  # pragma: no cov
 
 
@@ -26,6 +26,10 @@ class OpenJSONFile:
     data: Dict[str, Dict]
     active: int
     lock: asyncio.Lock
+    # Whether sources writing the file journal their records
+    journal: Optional[bool] = None
+    # Number of sources open for writing the file
+    writers: int = 0
 
     async def inc(self):
         async with self.lock:
@@ -42,9 +46,13 @@ class JSONSource(FileSource, MemorySource):
     """
     JSONSource reads and write from a JSON file on open / close. Otherwise
     stored in memory.
+
+    With ``journal`` set updated records are appended to a journal rather
+    than the whole file being rewritten on close.
     """
 
     CONFIG = JSONSourceConfig
+    CONTEXT = JournalSourceContext
     OPEN_JSON_FILES: Dict[str, OpenJSONFile] = {}
     OPEN_JSON_FILES_LOCK: asyncio.Lock = asyncio.Lock()
 
@@ -56,12 +64,14 @@ class JSONSource(FileSource, MemorySource):
                 self.OPEN_JSON_FILES[self.config.filename] = OpenJSONFile(
                     data={}, active=1, lock=asyncio.Lock()
                 )
+                self.check_journal(self.OPEN_JSON_FILES[self.config.filename])
                 if fd is not None:
                     self.OPEN_JSON_FILES[
                         self.config.filename
                     ].data = json.load(fd)
             else:
                 self.logger.debug(f"{self.config.filename} already open")
+                self.check_journal(self.OPEN_JSON_FILES[self.config.filename])
                 await self.OPEN_JSON_FILES[self.config.filename].inc()
             yield
 
@@ -81,12 +91,23 @@ class JSONSource(FileSource, MemorySource):
     async def dump_fd(self, fd):
         async with self.OPEN_JSON_FILES_LOCK:
             records = self.OPEN_JSON_FILES[self.config.filename].data
-            records[self.config.tag] = {
-                record.key: record.dict() for record in self.mem.values()
-            }
-            self.logger.debug(f"{self.config.filename} updated")
+            self.release_journal(self.OPEN_JSON_FILES[self.config.filename])
+            # Journaled records are replayed when the file is next opened
+            if fd is not None:
+                records[self.config.tag] = {
+                    record.key: record.dict() for record in self.mem.values()
+                }
+                self.logger.debug(f"{self.config.filename} updated")
             if await self.OPEN_JSON_FILES[self.config.filename].dec():
                 del self.OPEN_JSON_FILES[self.config.filename]
-                json.dump(export_dict(result=records)["result"], fd)
-                self.logger.debug(f"{self.config.filename} written")
+                if fd is not None:
+                    json.dump(export_dict(result=records)["result"], fd)
+                    self.logger.debug(f"{self.config.filename} written")
         LOGGER.debug("%r saved %d records", self, len(self.mem))
+
+    async def compact_fd(self, fd):
+        async with self.OPEN_JSON_FILES_LOCK:
+            records = self.OPEN_JSON_FILES[self.config.filename].data
+            for tag, key, data in self.journal_records():
+                records.setdefault(tag, {})[key] = data
+            json.dump(export_dict(result=records)["result"], fd)
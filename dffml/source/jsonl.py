@@ -0,0 +1,485 @@
+# SPDX-License-Identifier: MIT
+# Copyright (c) 2020 Intel Corporation
+"""
+Loads records from a JSON Lines file, one record per line
+"""
+import os
+import bz2
+import json
+import operator
+import itertools
+import lzma
+import zlib
+import errno
+import gzip
+import pathlib
+import zipfile
+from dataclasses import dataclass
+from contextlib import contextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from ..record import Record
+from ..base import config, field
+from .source import BaseSourceContext
+from .file import FileSource, FileSourceConfig
+from ..util.entrypoint import entrypoint
+
+# Tag of lines which have no tag
+JSONL_SOURCE_DEFAULT_TAG = "untagged"
+JSONL_SOURCE_CONFIG_DEFAULT_BLOCK_SIZE = 64 * 1024
+# Bytes read from the file at a time
+JSONL_SOURCE_READ_SIZE = 64 * 1024
+
+# Where a line starts. Offset of the block it starts in and the offset of
+# the line within the decompressed block. Uncompressed files are a single
+# block.
+Location = Tuple[int, int]
+
+# Compressor and decompressor of each block by file suffix. Each compressed
+# block is a complete stream, files made of many blocks can be read by the
+# regular decompression tools.
+JSONL_SOURCE_COMPRESSION: Dict[str, Tuple[Callable, Callable]] = {
+    ".gz": (gzip.compress, lambda: zlib.decompressobj(zlib.MAX_WBITS | 16)),
+    ".bz2": (bz2.compress, bz2.BZ2Decompressor),
+    ".xz": (lzma.compress, lzma.LZMADecompressor),
+    ".lzma": (lzma.compress, lzma.LZMADecompressor),
+}
+
+
+@config
+class JSONLinesSourceConfig(FileSourceConfig):
+    block_size: int = field(
+        "Records added to compressed files are written in independently "
+        "compressed blocks of about this many bytes. Reading a record only "
+        "decompresses the block it is in",
+        default=JSONL_SOURCE_CONFIG_DEFAULT_BLOCK_SIZE,
+    )
+    cache_index: bool = field(
+        "Save the location of each record in a file next to the source so "
+        "it need not be rebuilt the next time the source is opened",
+        default=True,
+    )
+
+
+@dataclass
+class OpenJSONLinesFile:
+    index: Dict[str, Dict[str, Location]]
+    active: int
+    changed: bool = False
+
+
+class JSONLinesSourceContext(BaseSourceContext):
+    async def update(self, record: Record):
+        self.parent.append(record)
+
+    async def records(self) -> AsyncIterator[Record]:
+        index = self.parent.index.get(self.parent.config.tag, {})
+        pending = dict(self.parent.pending)
+        for location, line in self.parent.lines():
+            tag, key, data = self.parent.parse(line)
+            # Skip lines for other tags and lines which were updated later
+            if tag != self.parent.config.tag or index.get(key) != location:
+                continue
+            if key in pending:
+                yield pending.pop(key)
+            else:
+                yield Record(key, data=data)
+        # Records which are not yet in the file
+        for record in pending.values():
+            yield record
+
+    async def record(self, key: str) -> Record:
+        async for record in self.records_by_keys([key]):
+            return record
+        return Record(key)
+
+    async def records_by_keys(self, keys: List[str]) -> AsyncIterator[Record]:
+        index = self.parent.index.get(self.parent.config.tag, {})
+        locations = []
+        for key in keys:
+            if key in self.parent.pending:
+                yield self.parent.pending[key]
+            elif key in index:
+                locations.append(index[key])
+        # Read lines in the order they are in the file so that each block is
+        # only decompressed once
+        for line in self.parent.read_lines(sorted(locations)):
+            _tag, key, data = self.parent.parse(line)
+            yield Record(key, data=data)
+
+
+@entrypoint("jsonl")
+class JSONLinesSource(FileSource):
+    """
+    Reads and writes records in a JSON Lines file, one record per line.
+
+    The location of each record in the file is indexed when the source is
+    opened, so looking up a record reads only its line. Updated records are
+    appended to the file, so writing does not depend on the size of the file.
+
+    Compressed files (``.gz``, ``.bz2``, ``.xz``, ``.lzma``, ``.zip``) are
+    written as a series of independently compressed blocks which can still be
+    read by the regular decompression tools. Compressed files not written as
+    blocks are a single block, and looking up a record means decompressing
+    everything before it.
+    """
+
+    CONFIG = JSONLinesSourceConfig
+    CONTEXT = JSONLinesSourceContext
+    OPEN_JSONL_FILES: Dict[pathlib.Path, OpenJSONLinesFile] = {}
+
+    def __init__(self, config):
+        super().__init__(config)
+        # Location of the latest line for each key by tag, shared with other
+        # sources open on the same file
+        self.open_file: Optional[OpenJSONLinesFile] = None
+        # Records not yet written to the file
+        self.pending: Dict[str, Record] = {}
+        # Lines of pending records, if they are to be written
+        self.pending_lines: Dict[str, bytes] = {}
+        # Size of the lines of records waiting to be written
+        self.pending_size = 0
+
+    @property
+    def index(self) -> Dict[str, Dict[str, Location]]:
+        return self.open_file.index
+
+    @property
+    def compressed(self) -> bool:
+        return (
+            self.config.filename.suffix in JSONL_SOURCE_COMPRESSION
+            or self.config.filename.suffix == ".zip"
+        )
+
+    @property
+    def index_path(self) -> pathlib.Path:
+        """
+        Cached index of the location of each record
+        """
+        return self.config.filename.with_name(
+            self.config.filename.name + ".index"
+        )
+
+    async def _open(self):
+        self.pending = {}
+        self.pending_lines = {}
+        self.pending_size = 0
+        if self.config.filename in self.OPEN_JSONL_FILES:
+            self.logger.debug(f"{self.config.filename} already open")
+            self.open_file = self.OPEN_JSONL_FILES[self.config.filename]
+            self.open_file.active += 1
+            return
+        # Create directories for default source if not exists
+        if not self.config.filename.parent.is_dir() and self.config.mkdirs:
+            self.config.filename.parent.mkdir(parents=True)
+        if not self.config.filename.is_file() and not self.config.allowempty:
+            raise FileNotFoundError(
+                errno.ENOENT, os.strerror(errno.ENOENT), self.config.filename,
+            )
+        self.logger.debug(f"{self.config.filename} first open")
+        self.open_file = OpenJSONLinesFile(index={}, active=1)
+        if self.config.filename.is_file() and not self.load_index():
+            for location, line in self.lines():
+                tag, key, _data = self.parse(line)
+                self.index.setdefault(tag, {})[key] = location
+            self.open_file.changed = True
+            self.logger.debug(
+                "%r indexed %d records",
+                self,
+                len(self.index.get(self.config.tag, {})),
+            )
+        self.OPEN_JSONL_FILES[self.config.filename] = self.open_file
+
+    async def _close(self):
+        if self.config.readwrite:
+            self.flush()
+        self.open_file.active -= 1
+        # Index is saved by the last source open on the file
+        if self.open_file.active > 0:
+            return
+        del self.OPEN_JSONL_FILES[self.config.filename]
+        if (
+            self.open_file.changed
+            and self.config.cache_index
+            and self.config.filename.is_file()
+        ):
+            try:
+                self.save_index()
+            except OSError as error:
+                self.logger.debug("Could not cache index: %s", error)
+
+    def load_index(self) -> bool:
+        """
+        Load the cached index if it was saved since the file last changed
+        """
+        if not self.config.cache_index or not self.index_path.is_file():
+            return False
+        cached = json.loads(self.index_path.read_text())
+        stat = self.config.filename.stat()
+        if (
+            cached["size"] != stat.st_size
+            or cached["mtime_ns"] != stat.st_mtime_ns
+        ):
+            return False
+        self.open_file.index = {
+            tag: {key: tuple(location) for key, location in keys.items()}
+            for tag, keys in cached["tags"].items()
+        }
+        return True
+
+    def save_index(self):
+        stat = self.config.filename.stat()
+        self.index_path.write_text(
+            json.dumps(
+                {
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "tags": self.index,
+                }
+            )
+        )
+        self.open_file.changed = False
+
+    def parse(self, line: bytes) -> Tuple[str, str, Dict[str, Any]]:
+        """
+        Tag, key, and record data of a line
+        """
+        data = json.loads(line)
+        return data.pop("tag", JSONL_SOURCE_DEFAULT_TAG), data["key"], data
+
+    def append(self, record: Record):
+        """
+        Add a record to the end of the file, or wait to do so until the block
+        it will be written in is full if the file is compressed
+        """
+        self.pending[record.key] = record
+        if not self.config.readwrite:
+            return
+        self.pending_lines[record.key] = self.dump(record)
+        self.pending_size += len(self.pending_lines[record.key])
+        if not self.compressed or self.pending_size >= self.config.block_size:
+            self.flush()
+
+    def dump(self, record: Record) -> bytes:
+        return (
+            json.dumps({"tag": self.config.tag, **record.export()})
+            + "\n"
+        ).encode()
+
+    def flush(self):
+        """
+        Write records waiting to be written to the end of the file as a block
+        """
+        if not self.pending_lines:
+            return
+        block_data = b"".join(self.pending_lines.values())
+        if self.config.filename.suffix == ".zip":
+            with zipfile.ZipFile(
+                self.config.filename, "a", compression=zipfile.ZIP_BZIP2
+            ) as archive:
+                block = len(archive.infolist())
+                archive.writestr(
+                    f"{self.__class__.__qualname__}.{block}", block_data
+                )
+        else:
+            with open(self.config.filename, "a+b") as fd:
+                block = fd.tell()
+                if not self.compressed and block:
+                    # Don't append to the last line if it has no newline
+                    fd.seek(block - 1)
+                    if fd.read(1) != b"\n":
+                        fd.write(b"\n")
+                        block += 1
+                if self.config.filename.suffix in JSONL_SOURCE_COMPRESSION:
+                    compress, _ = JSONL_SOURCE_COMPRESSION[
+                        self.config.filename.suffix
+                    ]
+                    fd.write(compress(block_data))
+                else:
+                    fd.write(block_data)
+        index = self.index.setdefault(self.config.tag, {})
+        offset = 0
+        for key, line in self.pending_lines.items():
+            if self.compressed:
+                index[key] = (block, offset)
+            else:
+                index[key] = (block + offset, 0)
+            offset += len(line)
+        self.pending = {}
+        self.pending_lines = {}
+        self.pending_size = 0
+        self.open_file.changed = True
+
+    @contextmanager
+    def _open_blocks(
+        self,
+    ) -> Iterator[Callable[[int], Iterator[Tuple[int, bytes]]]]:
+        """
+        Yields a function which yields the offset of the block and the
+        decompressed data of each chunk of the file, starting from a block
+        """
+        if self.config.filename.suffix == ".zip":
+            with zipfile.ZipFile(self.config.filename) as archive:
+
+                def blocks(start: int = 0):
+                    members = archive.infolist()
+                    for block in range(start, len(members)):
+                        with archive.open(members[block]) as fd:
+                            for data in iter(
+                                lambda: fd.read(JSONL_SOURCE_READ_SIZE), b""
+                            ):
+                                yield block, data
+
+                yield blocks
+            return
+        with open(self.config.filename, "rb") as fd:
+            if self.config.filename.suffix not in JSONL_SOURCE_COMPRESSION:
+
+                def blocks(start: int = 0):
+                    fd.seek(start)
+                    for data in iter(
+                        lambda: fd.read(JSONL_SOURCE_READ_SIZE), b""
+                    ):
+                        yield start, data
+
+                yield blocks
+                return
+            _, decompressor_cls = JSONL_SOURCE_COMPRESSION[
+                self.config.filename.suffix
+            ]
+
+            def blocks(start: int = 0):
+                fd.seek(start)
+                block = start
+                position = start
+                decompressor = decompressor_cls()
+                for raw in iter(lambda: fd.read(JSONL_SOURCE_READ_SIZE), b""):
+                    position += len(raw)
+                    while raw:
+                        data = decompressor.decompress(raw)
+                        if data:
+                            yield block, data
+                        if not decompressor.eof:
+                            break
+                        # Next block starts with data after the end of this
+                        # one
+                        raw = decompressor.unused_data
+                        block = position - len(raw)
+                        decompressor = decompressor_cls()
+
+            yield blocks
+
+    def lines(self) -> Iterator[Tuple[Location, bytes]]:
+        """
+        Yields the location and contents of each line in the file
+        """
+        if not self.config.filename.is_file():
+            return
+        with self._open_blocks() as blocks:
+            block = None
+            position = 0
+            location = None
+            partial = []
+            for data_block, data in blocks():
+                if self.compressed and data_block != block:
+                    # A line ends with the block it started in, even if it
+                    # has no newline
+                    if partial and b"".join(partial).strip():
+                        yield location, b"".join(partial)
+                    partial = []
+                    block = data_block
+                    position = 0
+                start = 0
+                while start < len(data):
+                    if not partial:
+                        location = (
+                            (block, position)
+                            if self.compressed
+                            else (position, 0)
+                        )
+                    end = data.find(b"\n", start)
+                    if end == -1:
+                        partial.append(data[start:])
+                        position += len(data) - start
+                        break
+                    partial.append(data[start : end + 1])
+                    position += end + 1 - start
+                    start = end + 1
+                    line = b"".join(partial)
+                    partial = []
+                    if line.strip():
+                        yield location, line
+            if partial and b"".join(partial).strip():
+                yield location, b"".join(partial)
+
+    def read_lines(self, locations: List[Location]) -> Iterator[bytes]:
+        """
+        Yields the line at each location, locations must be sorted
+        """
+        with self._open_blocks() as blocks:
+            for block, block_locations in itertools.groupby(
+                locations, key=operator.itemgetter(0)
+            ):
+                # Lines end with the block they started in
+                yield from self._read_block_lines(
+                    itertools.takewhile(
+                        lambda chunk: chunk[0] == block, blocks(block)
+                    ),
+                    [offset for _, offset in block_locations],
+                )
+
+    @staticmethod
+    def _read_block_lines(
+        chunks: Iterator[Tuple[int, bytes]], offsets: List[int]
+    ) -> Iterator[bytes]:
+        """
+        Yields the line at each offset within the data starting at a block
+        """
+        offsets = iter(offsets)
+        offset = next(offsets)
+        # Offset of the start of buffer within the data
+        position = 0
+        buffer = b""
+        for _block, data in chunks:
+            buffer += data
+            while True:
+                start = offset - position
+                if start >= len(buffer):
+                    # Skip data before the line
+                    position += len(buffer)
+                    buffer = b""
+                    break
+                end = buffer.find(b"\n", start)
+                if end == -1:
+                    # Line continues in the next chunk
+                    position = offset
+                    buffer = buffer[start:]
+                    break
+                yield buffer[start : end + 1]
+                offset = next(offsets, None)
+                if offset is None:
+                    return
+        # Last line may not end with a newline
+        if buffer:
+            yield buffer[offset - position :]
+
+    async def load_fd(self, fd):
+        """
+        Not used. Records are read from the file line by line as they are
+        needed, rather than loaded when it is opened.
+        """
+
+    async def dump_fd(self, fd):
+        """
+        Not used. Updated records are appended to the file by :py:meth:`flush`,
+        rather than the file being rewritten when it is closed.
+        """
@@ -6,7 +6,8 @@ source project's source URL.
 """
 import abc
 import unittest
-from typing import AsyncIterator, List, Optional, Callable
+import importlib
+from typing import AsyncIterator, List, Optional, Callable, Dict, Any
 
 from ..base import (
     BaseDataFlowFacilitatorObjectContext,
@@ -41,10 +42,83 @@ class NoRecordsWithMatchingFeaturesHelper(unittest.TestCase):
         super().__init__(methodName="defaultTestResult")
 
 
+async def _records_batched(
+    records: AsyncIterator[Record], batch_size: int
+) -> AsyncIterator[List[Record]]:
+    """
+    Group records into lists of at most ``batch_size`` records
+    """
+    batch = []
+    async for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _records_to_feature_columns(
+    records: AsyncIterator[Record],
+    features: List[str],
+    batch_size: Optional[int] = None,
+) -> AsyncIterator[Dict[str, List[Any]]]:
+    """
+    Transpose records into columns of feature values, ``batch_size`` records
+    at a time. All records are expected to have all the features.
+    """
+    columns = {feature: [] for feature in features}
+    count = 0
+    async for record in records:
+        for feature in features:
+            columns[feature].append(record.feature(feature))
+        count += 1
+        if batch_size and count >= batch_size:
+            yield columns
+            columns = {feature: [] for feature in features}
+            count = 0
+    if count:
+        yield columns
+
+
 class BaseSourceContext(BaseDataFlowFacilitatorObjectContext):
     def __init__(self, parent: "BaseSource") -> None:
         self.parent = parent
 
+    async def records_by_keys(self, keys: List[str]) -> AsyncIterator[Record]:
+        """
+        Yields the records with the given keys, in any order. Keys without a
+        record in the source may be skipped.
+
+        The default implementation calls :py:meth:`record` for each key.
+        Sources which can look up many keys at once, for instance with a
+        single database query, should override this. It is used to merge
+        records from multiple sources a batch at a time.
+        """
+        for key in keys:
+            yield await self.record(key)
+
+    async def feature_columns(
+        self, features: List[str], batch_size: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, List[Any]]]:
+        """
+        Yields dictionaries mapping each feature name to a column of values,
+        one value per record with all the features. Each column holds at most
+        ``batch_size`` values, all values are yielded at once if it is not
+        given.
+
+        The default implementation transposes the records yielded from
+        :py:meth:`records`. Sources which store their data by column, or which
+        can select columns, should override this to avoid creating a
+        :py:class:`Record` for every row.
+        """
+        sctx = SourcesContext(None)
+        sctx.append(self)
+        async for columns in _records_to_feature_columns(
+            sctx.with_features(features), features, batch_size
+        ):
+            yield columns
+
     @abc.abstractmethod
     async def update(self, record: Record):
         """
@@ -71,6 +145,17 @@ class BaseSourceContext(BaseDataFlowFacilitatorObjectContext):
         {'key': 'one', 'features': {'feed': 'face'}, 'extra': {}}
         """
 
+    async def update_many(self, records: List[Record]):
+        """
+        Updates many records for a source, in order.
+
+        The default implementation calls :py:meth:`update` for each record.
+        Sources which can write many records at once, for instance within one
+        database transaction, should override this.
+        """
+        for record in records:
+            await self.update(record)
+
     @abc.abstractmethod
     async def records(self) -> AsyncIterator[Record]:
         """
@@ -134,6 +219,10 @@ class BaseSource(BaseDataFlowFacilitatorObject):
 
 
 class SourcesContext(AsyncContextManagerListContext):
+    # Number of records from the first source to look up in the other sources
+    # at once
+    MERGE_BATCH_SIZE: int = 128
+
     async def update(self, record: Record):
         """
         Updates a record for a source
@@ -142,21 +231,48 @@ class SourcesContext(AsyncContextManagerListContext):
         for source in self:
             await source.update(record)
 
+    async def update_many(self, records: List[Record]):
+        """
+        Updates many records for all sources
+        """
+        for source in self:
+            await source.update_many(records)
+
     async def records(
         self, validation: Optional[Callable[[Record], bool]] = None
     ) -> AsyncIterator[Record]:
         """
         Retrieves records from all sources
+
+        Records are iterated from the first source. Records with the same keys
+        are looked up in the other sources ``MERGE_BATCH_SIZE`` records at a
+        time and merged into them.
         """
-        for source in self:
+        if not self.data:
+            return
+        # NOTE In Python 3.7.3 self[1:] works, however in Python >
+        # 3.7.3 only self.data works
+        source, other_sources = self.data[0], self.data[1:]
+        if not other_sources:
             async for record in source.records():
-                # NOTE In Python 3.7.3 self[1:] works, however in Python >
-                # 3.7.3 only self.data works
-                for other_source in self.data[1:]:
-                    record.merge(await other_source.record(record.key))
                 if validation is None or validation(record):
                     yield record
-            break
+            return
+        async for batch in _records_batched(
+            source.records(), self.MERGE_BATCH_SIZE
+        ):
+            keys = [record.key for record in batch]
+            for other_source in other_sources:
+                others = {
+                    other.key: other
+                    async for other in other_source.records_by_keys(keys)
+                }
+                for record in batch:
+                    if record.key in others:
+                        record.merge(others[record.key])
+            for record in batch:
+                if validation is None or validation(record):
+                    yield record
 
     async def record(self, key: str):
         """
@@ -205,6 +321,53 @@ class SourcesContext(AsyncContextManagerListContext):
                 f"{available_features}. Searched {count[0]} records.",
             )
 
+    async def feature_columns(
+        self, features: List[str], batch_size: Optional[int] = None
+    ) -> AsyncIterator[Dict[str, List[Any]]]:
+        """
+        Yields dictionaries mapping each feature name to a column of values,
+        one value per record with all the features. Records are the same as
+        those yielded by :py:meth:`with_features`.
+
+        When there is only one source, and records are not being filtered by a
+        subclass, that source's columns are used directly.
+        """
+        if (
+            len(self.data) == 1
+            and type(self).records is SourcesContext.records
+        ):
+            async for columns in self.data[0].feature_columns(
+                features, batch_size=batch_size
+            ):
+                yield columns
+            return
+        async for columns in _records_to_feature_columns(
+            self.with_features(features), features, batch_size
+        ):
+            yield columns
+
+    async def feature_arrays(
+        self,
+        features: List[str],
+        dtype: Optional[Any] = None,
+        batch_size: Optional[int] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Same as :py:meth:`feature_columns` but each column is a NumPy array.
+        Features with a length greater than one become two dimensional
+        arrays, with one row per record.
+
+        NumPy must be installed to use this method.
+        """
+        np = importlib.import_module("numpy")
+        async for columns in self.feature_columns(
+            features, batch_size=batch_size
+        ):
+            yield {
+                feature: np.asarray(column, dtype=dtype)
+                for feature, column in columns.items()
+            }
+
 
 class Sources(AsyncContextManagerList):
 
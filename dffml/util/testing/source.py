@@ -3,6 +3,7 @@
 import os
 import abc
 import random
+import pathlib
 import tempfile
 
 from ...record import Record, RecordPrediction
@@ -130,3 +131,127 @@ class FileSourceTest(SourceTest):
                     self.assertIn("feed", record.features())
                     record = await lctx.record("0")
                     self.assertIn("face", record.features())
+
+
+class JournalFileSourceTest(FileSourceTest):
+    """
+    Test case class used to test a FileSource implementation which supports
+    journaling updated records.
+    """
+
+    async def test_journal(self):
+        with tempfile.TemporaryDirectory() as testdir:
+            self.testfile = os.path.join(testdir, str(random.random()))
+            source = await self.setUpSource()
+            source.config = source.config._replace(journal=True)
+            async with source:
+                async with source() as sctx:
+                    await sctx.update(
+                        Record("0", data={"features": {"feed": 1}})
+                    )
+                    await sctx.update(
+                        Record("1", data={"features": {"face": 2}})
+                    )
+            # Records are only in the journal
+            self.assertFalse(os.path.exists(self.testfile))
+            self.assertTrue(source.journal_path.is_file())
+            async with source:
+                async with source() as sctx:
+                    record = await sctx.record("0")
+                    self.assertEqual(record.feature("feed"), 1)
+                    await sctx.update(
+                        Record("0", data={"features": {"feed": 3}})
+                    )
+                    await source.compact()
+                    self.assertTrue(os.path.exists(self.testfile))
+                    self.assertEqual(source.journal_path.read_text(), "")
+                    await sctx.update(
+                        Record("2", data={"features": {"dead": 4}})
+                    )
+            # Closing writes the file once the journal is long enough
+            source.config = source.config._replace(compact_after=1)
+            async with source:
+                pass
+            self.assertEqual(source.journal_path.read_text(), "")
+            # Compacted file holds all the records without the journal
+            source.config = source.config._replace(journal=False)
+            async with source:
+                async with source() as sctx:
+                    records = {
+                        record.key: record.features()
+                        async for record in sctx.records()
+                    }
+            self.assertEqual(
+                records,
+                {"0": {"feed": 3}, "1": {"face": 2}, "2": {"dead": 4}},
+            )
+
+    async def test_journal_mixed(self):
+        with tempfile.TemporaryDirectory() as testdir:
+            self.testfile = os.path.join(testdir, str(random.random()))
+            journaled = await self.setUpSource()
+            journaled.config = journaled.config._replace(journal=True)
+            rewritten = await self.setUpSource()
+            rewritten.config = rewritten.config._replace(tag="other")
+            async with journaled:
+                # Sources writing the same file must agree on journaling
+                with self.assertRaises(ValueError):
+                    async with rewritten:
+                        pass  # pragma: no cover
+                reader = await self.setUpSource()
+                reader.config = reader.config._replace(readwrite=False)
+                async with reader:
+                    pass
+            # The file can be opened either way once the other is closed
+            async with rewritten:
+                async with rewritten() as sctx:
+                    await sctx.update(
+                        Record("0", data={"features": {"feed": 1}})
+                    )
+            async with rewritten:
+                async with rewritten() as sctx:
+                    record = await sctx.record("0")
+            self.assertEqual(record.feature("feed"), 1)
+
+    async def test_compact_failed(self):
+        with tempfile.TemporaryDirectory() as testdir:
+            self.testfile = os.path.join(testdir, str(random.random()))
+            source = await self.setUpSource()
+            source.config = source.config._replace(journal=True)
+            async with source:
+                async with source() as sctx:
+                    await sctx.update(
+                        Record("0", data={"features": {"feed": 1}})
+                    )
+                    await source.compact()
+                    await sctx.update(
+                        Record("0", data={"features": {"feed": 2}})
+                    )
+                    compacted = pathlib.Path(self.testfile).read_bytes()
+
+                    async def compact_fd(fd):
+                        fd.write(source.compact_fd.__name__)
+                        raise OSError("No space left on device")
+
+                    compact_fd_orig = source.compact_fd
+                    source.compact_fd = compact_fd
+                    with self.assertRaisesRegex(OSError, "No space"):
+                        await source.compact()
+                    source.compact_fd = compact_fd_orig
+            # The file and the journal are as they were
+            self.assertEqual(
+                pathlib.Path(self.testfile).read_bytes(), compacted
+            )
+            self.assertEqual(
+                sorted(os.listdir(testdir)),
+                sorted(
+                    [
+                        pathlib.Path(self.testfile).name,
+                        source.journal_path.name,
+                    ]
+                ),
+            )
+            async with source:
+                async with source() as sctx:
+                    record = await sctx.record("0")
+            self.assertEqual(record.feature("feed"), 2)
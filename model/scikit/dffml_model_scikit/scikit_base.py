@@ -8,7 +8,7 @@ import pathlib
 import logging
 import importlib
 
-from typing import AsyncIterator, Tuple, Any, NamedTuple, Union
+from typing import AsyncIterator, Tuple, Any, NamedTuple, Union, List
 
 from sklearn.multioutput import MultiOutputClassifier, MultiOutputRegressor
 
@@ -49,6 +49,7 @@ class ScikitConfig(ModelConfig, NamedTuple):
     location: pathlib.Path
     predict: Union[Feature, Features]
     features: Features
+    predict_batch_size: int = 4096
 
 
 class Scikit(Model):
@@ -116,7 +117,7 @@ class ScikitContext(ModelContext):
             [
                 "{}{}".format(k, v)
                 for k, v in self.parent.config._asdict().items()
-                if k not in ["features", "predict"]
+                if k not in ["features", "predict", "predict_batch_size"]
             ]
         )
         return secure_hash(
@@ -129,6 +130,7 @@ class ScikitContext(ModelContext):
             del config["location"]
             del config["predict"]
             del config["features"]
+            del config["predict_batch_size"]
             self.parent.clf = self.parent.SCIKIT_MODEL(**config)
         self.estimator_type = self.parent.clf._estimator_type
         return self
@@ -140,26 +142,25 @@ class ScikitContext(ModelContext):
         xdata = []
         ydata = []
         ### np.hstack helps flatten the lists wihtout splitting strings.
-        async for record in sources.with_features(
+        async for columns in sources.feature_arrays(
             list(self.np.hstack(self.features + [self.predictions]))
         ):
-            feature_data = []
-            predict_data = []
-            for feature in record.features(self.features).values():
-                feature_data.extend(
-                    [feature] if self.np.isscalar(feature) else feature
+            # column_stack flattens features with a length greater than one
+            xdata.append(
+                self.np.column_stack(
+                    [columns[feature] for feature in self.features]
                 )
-            xdata.append(feature_data)
+            )
             if self.is_multi:
-                for feature in record.features(self.predictions).values():
-                    predict_data.extend(
-                        [feature] if self.np.isscalar(feature) else feature
+                ydata.append(
+                    self.np.column_stack(
+                        [columns[feature] for feature in self.predictions]
                     )
+                )
             else:
-                predict_data = record.feature(self.predictions)
-            ydata.append(predict_data)
-        xdata = self.np.array(xdata)
-        ydata = self.np.array(ydata)
+                ydata.append(columns[self.predictions])
+        xdata = self.np.concatenate(xdata)
+        ydata = self.np.concatenate(ydata)
         self.logger.info("Number of input records: {}".format(len(xdata)))
         if (
             self.is_multi
@@ -176,44 +177,63 @@ class ScikitContext(ModelContext):
         self.parent.clf.fit(xdata, ydata)
         self.is_trained = True
 
+    async def _batches(
+        self, sources: SourcesContext
+    ) -> AsyncIterator[List[Record]]:
+        """
+        Group records with the features we need into lists of at most
+        ``predict_batch_size`` records, so that the model is called once per
+        batch rather than once per record.
+        """
+        batch = []
+        async for record in sources.with_features(self.features):
+            batch.append(record)
+            if len(batch) >= self.parent.config.predict_batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
     async def predict(
         self, sources: SourcesContext
     ) -> AsyncIterator[Tuple[Record, Any, float]]:
         if not self.is_trained:
             raise ModelNotTrained("Train model before prediction.")
-        async for record in sources.with_features(self.features):
-            record_data = []
-            for feature in record.features(self.features).values():
-                record_data.extend(
-                    [feature] if self.np.isscalar(feature) else feature
-                )
-            to_predict = self.np.array([record_data])
-            self.logger.debug(
-                "Predicted Value of {} for {}: {}".format(
+        target = self.predictions
+        async for records in self._batches(sources):
+            to_predict = []
+            for record in records:
+                record_data = []
+                for feature in record.features(self.features).values():
+                    record_data.extend(
+                        [feature] if self.np.isscalar(feature) else feature
+                    )
+                to_predict.append(record_data)
+            to_predict = self.np.array(to_predict)
+            predictions = self.parent.clf.predict(to_predict)
+            for record, record_data, prediction in zip(
+                records, to_predict, predictions
+            ):
+                self.logger.debug(
+                    "Predicted Value of %s for %s: %s",
                     self.parent.config.predict,
-                    to_predict,
-                    self.parent.clf.predict(to_predict),
+                    record_data,
+                    prediction,
                 )
-            )
-            target = self.predictions
-            if self.is_multi:
-                for t in range(len(target)):
+                if self.is_multi:
+                    for t in range(len(target)):
+                        record.predicted(
+                            target[t], prediction[t], self.confidence,
+                        )
+                else:
                     record.predicted(
-                        target[t],
-                        self.parent.clf.predict(to_predict)[0][t],
+                        target,
+                        self.parent.config.predict.dtype(prediction)
+                        if self.parent.config.predict.dtype is not str
+                        else prediction,
                         self.confidence,
                     )
-            else:
-                record.predicted(
-                    target,
-                    self.parent.config.predict.dtype(
-                        self.parent.clf.predict(to_predict)[0]
-                    )
-                    if self.parent.config.predict.dtype is not str
-                    else self.parent.clf.predict(to_predict)[0],
-                    self.confidence,
-                )
-            yield record
+                yield record
 
 
 class ScikitContextUnsprvised(ScikitContext):
@@ -223,15 +243,19 @@ class ScikitContextUnsprvised(ScikitContext):
             del config["location"]
             del config["features"]
             del config["predict"]
+            del config["predict_batch_size"]
             self.parent.clf = self.parent.SCIKIT_MODEL(**config)
         return self
 
     async def train(self, sources: Sources):
         xdata = []
-        async for record in sources.with_features(self.features):
-            feature_data = record.features(self.features)
-            xdata.append(list(feature_data.values()))
-        xdata = self.np.array(xdata)
+        async for columns in sources.feature_arrays(self.features):
+            xdata.append(
+                self.np.column_stack(
+                    [columns[feature] for feature in self.features]
+                )
+            )
+        xdata = self.np.concatenate(xdata)
         self.logger.info("Number of input records: {}".format(len(xdata)))
         self.parent.clf.fit(xdata)
         self.is_trained = True
@@ -257,25 +281,32 @@ class ScikitContextUnsprvised(ScikitContext):
                         yield label
 
                 labels = yield_labels()
-                predictor = lambda predict: [next(labels)]
+                predictor = lambda predict: [next(labels) for _ in predict]
         else:
             raise NotImplementedError(
                 f"Model is not a clusterer: {self.parent.clf._estimator_type}"
             )
 
-        async for record in sources.with_features(self.features):
-            feature_data = record.features(self.features)
-            predict = self.np.array([list(feature_data.values())])
-            prediction = predictor(predict)
-            self.logger.debug(
-                "Predicted cluster for {}: {}".format(predict, prediction)
+        target = self.parent.config.predict.name
+        async for records in self._batches(sources):
+            predict = self.np.array(
+                [
+                    list(record.features(self.features).values())
+                    for record in records
+                ]
             )
-            target = self.parent.config.predict.name
-            record.predicted(
-                target,
-                self.parent.config.predict.dtype(prediction[0])
-                if self.parent.config.predict.dtype is not str
-                else prediction[0],
-                self.confidence,
-            )
-            yield record
+            predictions = predictor(predict)
+            for record, record_data, prediction in zip(
+                records, predict, predictions
+            ):
+                self.logger.debug(
+                    "Predicted cluster for %s: %s", record_data, prediction
+                )
+                record.predicted(
+                    target,
+                    self.parent.config.predict.dtype(prediction)
+                    if self.parent.config.predict.dtype is not str
+                    else prediction,
+                    self.confidence,
+                )
+                yield record
@@ -132,6 +132,13 @@ for entry_point_name, name, cls in [
             "features": (Features, field("Features to train on")),
         },
         **config_fields,
+        "predict_batch_size": (
+            int,
+            field(
+                "Number of records to pass to the model in each call to predict",
+                default=4096,
+            ),
+        ),
     }
 
     if estimator_type in unsupervised_estimators:
@@ -193,6 +193,32 @@ class TestScikitModel:
                     elif self.MODEL_TYPE == "CLUSTERING":
                         self.assertIn(prediction, [-1, 0, 1, 2, 3, 4, 5, 6, 7])
 
+    async def test_03_predict_batched(self):
+        target = (
+            self.model.config.predict.names()
+            if self.is_multi
+            else self.model.config.predict.name
+        )
+        predictions = {}
+        for predict_batch_size in [4096, 3]:
+            model = self.MODEL(
+                self.model.config._replace(
+                    predict_batch_size=predict_batch_size
+                )
+            )
+            async with self.sources as sources, model:
+                async with sources() as sctx, model() as mctx:
+                    predictions[predict_batch_size] = {
+                        record.key: [
+                            v["value"]
+                            for v in record.predictions(target).values()
+                        ]
+                        if self.is_multi
+                        else record.prediction(target).value
+                        async for record in mctx.predict(sctx)
+                    }
+        self.assertEqual(predictions[4096], predictions[3])
+
 
 FEATURE_DATA_CLASSIFICATION = [
     [5, 1, 1, 1, 2, 1, 3, 1, 1, 2],
@@ -206,7 +206,7 @@ async def get_sentences(text: str, spacy_model: str) -> List[str]:
     return sentences
 
 
-@op
+@op(cache=True)
 async def count_vectorizer(
     text: List[str],
     encoding: str = "utf-8",
@@ -292,7 +292,7 @@ def collect_data(data_example):
     return {"status": True}
 
 
-@op
+@op(cache=True)
 async def tfidf_vectorizer(
     text: List[str],
     encoding: str = "utf-8",
@@ -390,6 +390,7 @@ embedding_def = Definition(name="embedding", primitive="generic")
         "pad_token": pad_token_def,
     },
     outputs={"embedding": embedding_def},
+    cache=True,
 )
 async def get_embedding(
     text: str, max_len: int, pad_token: str, spacy_model: str
@@ -0,0 +1,332 @@
+"""
+Benchmarks for the memory orchestrator
+
+Usage::
+
+    $ python scripts/bench_memory_orchestrator.py dispatch -inputs 10000
+    $ python scripts/bench_memory_orchestrator.py dispatch -inputs 1000 -step 250 -naive
+    $ python scripts/bench_memory_orchestrator.py executor -ctxs 64
+    $ python scripts/bench_memory_orchestrator.py processes -ctxs 64 -workers 4
+    $ python scripts/bench_memory_orchestrator.py contexts -ctxs 1000000
+    $ python scripts/bench_memory_orchestrator.py operations -ops 100000
+    $ python scripts/bench_memory_orchestrator.py allocations -ops 1000
+"""
+import sys
+import time
+import tracemalloc
+import asyncio
+import argparse
+
+from dffml import (
+    op,
+    Input,
+    DataFlow,
+    Definition,
+    MemoryOrchestrator,
+    MemoryOperationImplementationNetwork,
+    ProcessPoolOrchestrator,
+)
+
+
+COUNT = Definition(name="bench_count", primitive="int")
+VALUE = Definition(name="bench_value", primitive="int")
+
+
+@op(inputs={"count": COUNT}, outputs={"value": VALUE})
+async def bench_produce(count: int):
+    """
+    Each output becomes a new input set within the same context, so the
+    context grows by one input every time a value is yielded.
+    """
+    for i in range(0, count):
+        yield {"value": i}
+
+
+@op(inputs={"value": VALUE, "count": COUNT}, outputs={})
+async def bench_consume(value: int, count: int):
+    pass
+
+
+@op(inputs={"value": VALUE}, outputs={})
+async def bench_noop(value: int):
+    pass
+
+
+FANOUT = Definition(name="bench_fanout", primitive="int")
+
+
+@op(
+    inputs={"value": VALUE},
+    outputs={"first": FANOUT, "second": FANOUT, "third": FANOUT},
+)
+def bench_fanout(value: int):
+    """
+    Many small outputs, each of which becomes a new input
+    """
+    return {"first": value, "second": value + 1, "third": value + 2}
+
+
+CPU_ITERATIONS = Definition(name="bench_cpu_iterations", primitive="int")
+
+
+@op(inputs={"iterations": CPU_ITERATIONS}, outputs={})
+def bench_cpu(iterations: int):
+    """
+    CPU bound operation which holds the GIL while it runs
+    """
+    total = 0
+    for i in range(0, iterations):
+        total += i * i
+    return {}
+
+
+async def dispatch(args):
+    """
+    Time taken to dispatch each new input as a single context grows
+    """
+    dataflow = DataFlow.auto(bench_produce, bench_consume)
+    print(f"{'inputs in context':>20} {'seconds':>10} {'usec per input':>16}")
+    for inputs in range(args.step, args.inputs + 1, args.step):
+        orchestrator = MemoryOrchestrator()
+        if args.naive:
+            orchestrator = MemoryOrchestrator(no_semi_naive=True)
+        start = time.perf_counter()
+        async with orchestrator:
+            async with orchestrator(dataflow) as octx:
+                async for _ctx, _results in octx.run(
+                    [Input(value=inputs, definition=COUNT)]
+                ):
+                    pass
+        elapsed = time.perf_counter() - start
+        print(
+            f"{inputs:>20} {elapsed:>10.2f} {(elapsed / inputs) * 1000000:>16.2f}"
+        )
+
+
+async def executor(args):
+    """
+    Time taken to run a CPU bound non-async operation in many contexts with
+    each executor
+    """
+    dataflow = DataFlow.auto(bench_cpu)
+    print(f"{'executor':>10} {'seconds':>10} {'speedup':>10}")
+    inline = None
+    for executor in ["inline", "thread", "process"]:
+        orchestrator = MemoryOrchestrator(
+            opimp_network=MemoryOperationImplementationNetwork(
+                executor=executor, workers=args.workers
+            )
+        )
+        start = time.perf_counter()
+        async with orchestrator:
+            async with orchestrator(dataflow) as octx:
+                async for _ctx, _results in octx.run(
+                    {
+                        str(i): [
+                            Input(
+                                value=args.iterations,
+                                definition=CPU_ITERATIONS,
+                            )
+                        ]
+                        for i in range(0, args.ctxs)
+                    }
+                ):
+                    pass
+        elapsed = time.perf_counter() - start
+        if inline is None:
+            inline = elapsed
+        print(f"{executor:>10} {elapsed:>10.2f} {inline / elapsed:>10.2f}")
+
+
+async def processes(args):
+    """
+    Time taken to run a CPU bound operation in many contexts with the memory
+    orchestrator and with the process pool orchestrator
+    """
+    dataflow = DataFlow.auto(bench_cpu)
+    print(f"{'orchestrator':>12} {'seconds':>10} {'speedup':>10}")
+    memory = None
+    for name, orchestrator in [
+        ("memory", MemoryOrchestrator()),
+        ("process", ProcessPoolOrchestrator(workers=args.workers)),
+    ]:
+        start = time.perf_counter()
+        async with orchestrator:
+            async with orchestrator(dataflow) as octx:
+                async for _ctx, _results in octx.run(
+                    {
+                        str(i): [
+                            Input(
+                                value=args.iterations,
+                                definition=CPU_ITERATIONS,
+                            )
+                        ]
+                        for i in range(0, args.ctxs)
+                    }
+                ):
+                    pass
+        elapsed = time.perf_counter() - start
+        if memory is None:
+            memory = elapsed
+        print(f"{name:>12} {elapsed:>10.2f} {memory / elapsed:>10.2f}")
+
+
+async def contexts(args):
+    """
+    Memory in use as many contexts are run through the same orchestrator
+    context
+    """
+    dataflow = DataFlow.auto(bench_cpu)
+    orchestrator = MemoryOrchestrator(retain_ctxs=args.retain)
+    print(
+        f"{'contexts':>10} {'seconds':>10} {'current KiB':>12} {'peak KiB':>12}"
+    )
+    tracemalloc.start()
+    start = time.perf_counter()
+    async with orchestrator:
+        async with orchestrator(dataflow) as octx:
+            for batch in range(0, args.ctxs, args.batch):
+                batch_end = min(batch + args.batch, args.ctxs)
+                async for _ctx, _results in octx.run(
+                    {
+                        str(i): [Input(value=1, definition=CPU_ITERATIONS)]
+                        for i in range(batch, batch_end)
+                    }
+                ):
+                    pass
+                current, peak = tracemalloc.get_traced_memory()
+                print(
+                    f"{batch_end:>10} "
+                    f"{time.perf_counter() - start:>10.2f} "
+                    f"{current // 1024:>12} {peak // 1024:>12}"
+                )
+    tracemalloc.stop()
+
+
+async def operations(args):
+    """
+    Time taken to run many trivial operations within each context, all of
+    which are dispatched at once
+    """
+    dataflow = DataFlow.auto(bench_noop)
+    print(f"{'operations':>12} {'seconds':>10} {'usec per operation':>20}")
+    orchestrator = MemoryOrchestrator()
+    start = time.perf_counter()
+    async with orchestrator:
+        async with orchestrator(dataflow) as octx:
+            async for _ctx, _results in octx.run(
+                {
+                    str(i): [
+                        Input(value=j, definition=VALUE)
+                        for j in range(0, args.ops)
+                    ]
+                    for i in range(0, args.ctxs)
+                }
+            ):
+                pass
+    elapsed = time.perf_counter() - start
+    operations = args.ops * args.ctxs
+    print(
+        f"{operations:>12} {elapsed:>10.2f} "
+        f"{(elapsed / operations) * 1000000:>20.2f}"
+    )
+
+
+async def allocations(args):
+    """
+    Memory blocks and bytes allocated per dispatched operation, which are
+    still in use once the context has completed. The context is retained so
+    that the inputs created from operation outputs are kept.
+    """
+    dataflow = DataFlow.auto(bench_fanout)
+    print(
+        f"{'operations':>12} {'seconds':>10} {'blocks per op':>14} {'bytes per op':>14}"
+    )
+    orchestrator = MemoryOrchestrator(retain_ctxs=-1)
+    async with orchestrator:
+        async with orchestrator(dataflow) as octx:
+            tracemalloc.start()
+            blocks = sys.getallocatedblocks()
+            start = time.perf_counter()
+            async for _ctx, _results in octx.run(
+                [Input(value=i, definition=VALUE) for i in range(0, args.ops)]
+            ):
+                pass
+            elapsed = time.perf_counter() - start
+            blocks = sys.getallocatedblocks() - blocks
+            current, _peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    print(
+        f"{args.ops:>12} {elapsed:>10.2f} "
+        f"{blocks / args.ops:>14.1f} {current / args.ops:>14.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    parser_dispatch = subparsers.add_parser("dispatch", help=dispatch.__doc__)
+    parser_dispatch.set_defaults(func=dispatch)
+    parser_dispatch.add_argument("-inputs", type=int, default=10000)
+    parser_dispatch.add_argument("-step", type=int, default=2000)
+    parser_dispatch.add_argument(
+        "-naive",
+        action="store_true",
+        help="Generate all permutations of inputs (disable semi-naive mode)",
+    )
+
+    parser_executor = subparsers.add_parser("executor", help=executor.__doc__)
+    parser_executor.set_defaults(func=executor)
+    parser_executor.add_argument("-ctxs", type=int, default=64)
+    parser_executor.add_argument("-iterations", type=int, default=1000000)
+    parser_executor.add_argument(
+        "-workers",
+        type=int,
+        default=None,
+        help="Maximum number of workers in the thread and process pools",
+    )
+
+    parser_processes = subparsers.add_parser(
+        "processes", help=processes.__doc__
+    )
+    parser_processes.set_defaults(func=processes)
+    parser_processes.add_argument("-ctxs", type=int, default=64)
+    parser_processes.add_argument("-iterations", type=int, default=1000000)
+    parser_processes.add_argument(
+        "-workers",
+        type=int,
+        default=None,
+        help="Number of worker processes, defaults to the number of CPUs",
+    )
+
+    parser_contexts = subparsers.add_parser("contexts", help=contexts.__doc__)
+    parser_contexts.set_defaults(func=contexts)
+    parser_contexts.add_argument("-ctxs", type=int, default=1000000)
+    parser_contexts.add_argument("-batch", type=int, default=10000)
+    parser_contexts.add_argument(
+        "-retain",
+        type=int,
+        default=0,
+        help="Number of completed contexts to retain, negative to keep all",
+    )
+
+    parser_operations = subparsers.add_parser(
+        "operations", help=operations.__doc__
+    )
+    parser_operations.set_defaults(func=operations)
+    parser_operations.add_argument("-ops", type=int, default=100000)
+    parser_operations.add_argument("-ctxs", type=int, default=1)
+
+    parser_allocations = subparsers.add_parser(
+        "allocations", help=allocations.__doc__
+    )
+    parser_allocations.set_defaults(func=allocations)
+    parser_allocations.add_argument("-ops", type=int, default=1000)
+
+    args = parser.parse_args()
+    asyncio.run(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
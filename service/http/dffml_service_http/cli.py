@@ -237,6 +237,11 @@ class ServerConfig(TLSCMDConfig, MultiCommCMDConfig):
     allow_caching: bool = field(
         "Allow caching of HTTP responses", action="store_true", default=False,
     )
+    profile: bool = field(
+        "Record timings of dataflows run via MultiComm routes, served as Prometheus metrics at /metrics",
+        action="store_true",
+        default=False,
+    )
     models: Model = field(
         "Models configured on start",
         default_factory=lambda: AsyncContextManagerList(),
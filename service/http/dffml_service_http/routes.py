@@ -28,6 +28,7 @@ from dffml.df.memory import (
     MemoryInputSetConfig,
     StringInputSetContext,
 )
+from dffml.df.profile import OrchestratorProfiler
 from dffml.model import Model
 from dffml.base import MissingConfig
 from dffml.util.data import traverse_get
@@ -365,7 +366,9 @@ class Routes(BaseMultiCommContext):
 
         # Run the operation in an orchestrator
         # TODO(dfass) Create the orchestrator on startup of the HTTP API itself
-        async with MemoryOrchestrator() as orchestrator:
+        async with MemoryOrchestrator(
+            profiler=request.app["profiler"]
+        ) as orchestrator:
             # TODO(dfass) Create octx on dataflow registration
             async with orchestrator(config.dataflow) as octx:
                 results = {
@@ -565,6 +568,13 @@ class Routes(BaseMultiCommContext):
 
         return web.json_response(files)
 
+    async def metrics(self, request):
+        return web.Response(
+            text=request.app["profiler"].prometheus(),
+            content_type="text/plain",
+            headers={"Cache-Control": "no-cache"},
+        )
+
     async def list_sources(self, request):
         return web.json_response(
             {
@@ -957,6 +967,11 @@ class Routes(BaseMultiCommContext):
         self.app["multicomm_contexts"] = {"self": self}
         self.app["multicomm_routes"] = {}
         self.app["source_records_iterkeys"] = {}
+        # Records where time is spent running dataflows, served as metrics.
+        # Trace events are never exported so none are kept
+        self.app["profiler"] = (
+            OrchestratorProfiler(max_events=0) if self.profile else None
+        )
 
         # Instantiate sources if they aren't instantiated yet
         for i, source in enumerate(self.sources):
@@ -1090,6 +1105,9 @@ class Routes(BaseMultiCommContext):
         # Serve api.js
         if self.js:
             self.routes.append(("GET", "/api.js", self.api_js))
+        # Serve metrics of dataflows run
+        if self.profile:
+            self.routes.append(("GET", "/metrics", self.metrics))
         # Add all the routes and make them cors if needed
         for route in self.routes:
             route = self.app.router.add_route(*route)
@@ -120,13 +120,16 @@ class ServerException(Exception):
 
 
 class TestRoutesRunning:
+    # Config options given to the server, other than its port and TLS
+    SERVER_KWARGS = {}
+
     async def setUp(self):
         self.exit_stack = contextlib.AsyncExitStack()
         await self.exit_stack.__aenter__()
         self.tserver = await self.exit_stack.enter_async_context(
             ServerRunner.patch(Server)
         )
-        self.cli = Server(port=0, insecure=True)
+        self.cli = Server(port=0, insecure=True, **self.SERVER_KWARGS)
         await self.tserver.start(self.cli.run())
         # Set up client
         self.session = await self.exit_stack.enter_async_context(
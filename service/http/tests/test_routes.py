@@ -151,6 +151,39 @@ class TestRoutesServiceFiles(TestRoutesRunning, AsyncTestCase):
                 pass  # pramga: no cov
 
 
+class TestRoutesServiceMetrics(TestRoutesRunning, AsyncTestCase):
+    SERVER_KWARGS = {"profile": True}
+
+    async def test_success(self):
+        url: str = "/some/url"
+        async with self.post(
+            f"/multicomm/self/register",
+            json={
+                "path": url,
+                "output_mode": "json",
+                "asynchronous": False,
+                "dataflow": HELLO_WORLD_DATAFLOW.export(),
+            },
+        ) as r:
+            self.assertEqual(await r.json(), OK)
+        async with self.get(url):
+            pass
+        async with self.get("/metrics") as r:
+            metrics = await r.text()
+        self.assertIn(
+            'dffml_operation_seconds_count{operation="hello_blank"} 1', metrics
+        )
+        self.assertIn("dffml_context_seconds_count 1", metrics)
+
+
+class TestRoutesServiceMetricsNotProfiling(TestRoutesRunning, AsyncTestCase):
+    async def test_not_found(self):
+        self.assertIsNone(self.cli.app["profiler"])
+        with self.assertRaisesRegex(ServerException, "Not Found"):
+            async with self.get("/metrics"):
+                pass  # pramga: no cov
+
+
 class TestRoutesList(TestRoutesRunning, AsyncTestCase):
     async def test_sources(self):
         async with self.get("/list/sources") as r:
@@ -84,6 +84,7 @@ setup(
         "dffml.source": [
             "csv = dffml.source.csv:CSVSource",
             "json = dffml.source.json:JSONSource",
+            "jsonl = dffml.source.jsonl:JSONLinesSource",
             "memory = dffml.source.memory:MemorySource",
             "idx1 = dffml.source.idx1:IDX1Source",
             "idx3 = dffml.source.idx3:IDX3Source",
@@ -118,6 +119,7 @@ setup(
             "dffml.dataflow.run = dffml.operation.dataflow:run_dataflow",
             # Model
             "dffml.model.predict = dffml.operation.model:model_predict",
+            "dffml.model.predict_batch = dffml.operation.model:model_predict_batch",
             # io
             "AcceptUserInput = dffml.operation.io:AcceptUserInput",
             "print_output = dffml.operation.io:print_output",
@@ -150,13 +152,17 @@ setup(
             "convert_list_to_records = dffml.operation.source:convert_list_to_records",
             "convert_records_to_list = dffml.operation.source:convert_records_to_list",
         ],
-        "dffml.kvstore": ["memory = dffml.df.memory:MemoryKeyValueStore"],
+        "dffml.kvstore": [
+            "memory = dffml.df.memory:MemoryKeyValueStore",
+            "sqlite = dffml.df.sqlite:SqliteKeyValueStore",
+        ],
         "dffml.input.network": ["memory = dffml.df.memory:MemoryInputNetwork"],
         "dffml.operation.network": [
             "memory = dffml.df.memory:MemoryOperationNetwork"
         ],
         "dffml.redundancy.checker": [
-            "memory = dffml.df.memory:MemoryRedundancyChecker"
+            "memory = dffml.df.memory:MemoryRedundancyChecker",
+            "memory.set = dffml.df.memory:MemorySetRedundancyChecker",
         ],
         "dffml.lock.network": ["memory = dffml.df.memory:MemoryLockNetwork"],
         "dffml.operation.implementation.network": [
@@ -164,6 +170,7 @@ setup(
         ],
         "dffml.orchestrator": [
             "memory = dffml.df.memory:MemoryOrchestrator",
+            "process = dffml.df.process:ProcessPoolOrchestrator",
             "ssh = dffml.df.ssh:SSHOrchestrator",
             "kubernetes.job = dffml.df.kubernetes:JobKubernetesOrchestrator",
         ],
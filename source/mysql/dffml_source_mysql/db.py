@@ -1,4 +1,5 @@
 import ssl
+import itertools
 from typing import Dict, Any, List, Optional, AsyncIterator
 
 import aiomysql
@@ -67,16 +68,30 @@ class MySQLDatabaseContext(SQLDatabaseContext):
         await self.conn.execute(query, query_values)
 
     async def insert_or_update(self, table_name: str, data: Dict[str, Any]):
-        col_exp = ", ".join([f"`{col}`" for col in data])
-        query = (
-            f"INSERT INTO {table_name} "
-            + f"( {col_exp} )"
-            + f" VALUES( {', '.join([self.BIND_DECLARATION] * len(data))} ) "
-            + " ON DUPLICATE KEY UPDATE "
-            + " ,".join([f"`{col}` = {self.BIND_DECLARATION}" for col in data])
-        )
-        vals = list(data.values()) * 2
-        await self.conn.execute(query, vals)
+        await self.insert_or_update_many(table_name, [data])
+
+    async def insert_or_update_many(
+        self, table_name: str, data: List[Dict[str, Any]]
+    ) -> None:
+        # Rows with the same columns are written with one statement
+        for cols, rows in itertools.groupby(
+            data, key=lambda row: tuple(row.keys())
+        ):
+            col_exp = ", ".join([f"`{col}`" for col in cols])
+            # Updated values reference the inserted row rather than being
+            # bound a second time, so that executemany sends a single
+            # multi-row INSERT
+            query = (
+                f"INSERT INTO {table_name} "
+                + f"( {col_exp} )"
+                + f" VALUES ( {', '.join([self.BIND_DECLARATION] * len(cols))} ) "
+                + " ON DUPLICATE KEY UPDATE "
+                + " ,".join([f"`{col}` = VALUES(`{col}`)" for col in cols])
+            )
+            self.logger.debug(query)
+            await self.conn.executemany(
+                query, [list(row.values()) for row in rows]
+            )
 
     async def __aenter__(self) -> "MySQLDatabaseContext":
         self.__conn = self.parent.db.cursor(aiomysql.DictCursor)
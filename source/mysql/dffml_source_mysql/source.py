@@ -1,7 +1,8 @@
 import ssl
-from typing import AsyncIterator, Dict, Tuple
+from typing import Any, AsyncIterator, Dict, List, Tuple
 
 import aiomysql
+from aiomysql.cursors import RE_INSERT_VALUES
 
 from dffml import config, field
 from dffml.record import Record
@@ -45,7 +46,10 @@ class MySQLSourceConfig:
 
 
 class MySQLSourceContext(BaseSourceContext):
-    async def update(self, record: Record):
+    def bindings(self, record: Record) -> Dict[str, Any]:
+        """
+        Values of each column for a record, starting with the key
+        """
         # Column name of value mapping
         bindings = {self.parent.config.key: record.key}
         # Features
@@ -69,16 +73,57 @@ class MySQLSourceContext(BaseSourceContext):
                     bindings[confidence_column_name] = predictions[
                         feature_name
                     ]["confidence"]
+        return bindings
+
+    def update_values(self, bindings: Dict[str, Any]) -> List[Any]:
+        """
+        Arguments to the update query for a record's bindings
+        """
         # Bindings should be the values for each column, where the value for the
         # key is not repeated for the UPDATE. If using REPLACE INTO, don't
         # repeat values
         values = list(bindings.values())
         if not "REPLACE" in self.parent.config.update.upper():
             values += list(bindings.values())[1:]
+        return values
+
+    async def update(self, record: Record):
+        bindings = self.bindings(record)
         # Execute the update query
-        await self.conn.execute(self.parent.config.update, values)
+        await self.conn.execute(
+            self.parent.config.update, self.update_values(bindings)
+        )
         self.logger.debug("Updated: %s: %r", record.key, bindings)
 
+    def update_batches(self) -> bool:
+        """
+        Whether the update query can be run for many records at once.
+        ``executemany`` batches ``INSERT`` and ``REPLACE`` queries into a
+        single statement by repeating their ``VALUES (...)``, which only works
+        if there are no placeholders after them, as there are in
+        ``ON DUPLICATE KEY UPDATE col=%s``.
+        """
+        match = RE_INSERT_VALUES.match(self.parent.config.update)
+        return match is None or "%" not in match.group(3)
+
+    async def update_many(self, records: List[Record]):
+        all_bindings = [self.bindings(record) for record in records]
+        if self.update_batches():
+            # Execute the update query for all records at once
+            await self.conn.executemany(
+                self.parent.config.update,
+                [self.update_values(bindings) for bindings in all_bindings],
+            )
+        else:
+            # Execute the update query for each record. They are all committed
+            # together when the context is exited
+            for bindings in all_bindings:
+                await self.conn.execute(
+                    self.parent.config.update, self.update_values(bindings)
+                )
+        for record, bindings in zip(records, all_bindings):
+            self.logger.debug("Updated: %s: %r", record.key, bindings)
+
     def row_to_record(self, row):
         features = {}
         predictions = {}
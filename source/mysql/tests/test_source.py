@@ -1,12 +1,19 @@
 import socket
 import inspect
 import contextlib
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
+import aiomysql
+
+from dffml.record import Record
 from dffml.util.testing.source import SourceTest
 from dffml.util.asynctestcase import AsyncTestCase
 
-from dffml_source_mysql.source import MySQLSourceConfig, MySQLSource
+from dffml_source_mysql.source import (
+    MySQLSourceConfig,
+    MySQLSource,
+    MySQLSourceContext,
+)
 
 from dffml_source_mysql.util.mysql_docker import mysql, DOCKER_ENV
 
@@ -99,3 +106,79 @@ CREATE TABLE IF NOT EXISTS `record_data` (
 
     async def setUpSource(self):
         return MySQLSource(self.source_config)
+
+
+class RecordingCursor(aiomysql.Cursor):
+    """
+    Cursor which formats queries the way aiomysql does, but records them
+    rather than sending them to a server
+    """
+
+    def __init__(self):
+        super().__init__(
+            Mock(loop=None, encoding="utf8", escape=lambda value: repr(value))
+        )
+        self.queries = []
+
+    async def execute(self, query, args=None):
+        if isinstance(query, (bytes, bytearray)):
+            query = query.decode()
+        self.queries.append(" ".join(self.mogrify(query, args).split()))
+        return 1
+
+
+class TestMySQLSourceUpdateMany(AsyncTestCase):
+    async def update_many(self, update):
+        source = MySQLSource(
+            user="user",
+            password="password",
+            db="db",
+            key="key",
+            features={"f1": "f1"},
+            predictions={"target": ("target", None)},
+            update=update,
+            record="SELECT * FROM t WHERE `key`=%s",
+            records="SELECT * FROM t",
+        )
+        sctx = MySQLSourceContext(source)
+        sctx.conn = RecordingCursor()
+        await sctx.update_many(
+            [
+                Record(
+                    str(i),
+                    data={
+                        "features": {"f1": i},
+                        "prediction": {
+                            "target": {"value": i * 2, "confidence": 1.0}
+                        },
+                    },
+                )
+                for i in range(2)
+            ]
+        )
+        return sctx.conn.queries
+
+    async def test_on_duplicate_key_placeholders(self):
+        self.assertEqual(
+            await self.update_many(
+                "INSERT INTO t (`key`, `f1`, `target`) VALUES (%s,%s,%s) "
+                "ON DUPLICATE KEY UPDATE `f1`=%s, `target`=%s"
+            ),
+            [
+                "INSERT INTO t (`key`, `f1`, `target`) VALUES ('0',0,0) "
+                "ON DUPLICATE KEY UPDATE `f1`=0, `target`=0",
+                "INSERT INTO t (`key`, `f1`, `target`) VALUES ('1',1,2) "
+                "ON DUPLICATE KEY UPDATE `f1`=1, `target`=2",
+            ],
+        )
+
+    async def test_replace(self):
+        self.assertEqual(
+            await self.update_many(
+                "REPLACE INTO t (`key`, `f1`, `target`) VALUES (%s,%s,%s)"
+            ),
+            [
+                "REPLACE INTO t (`key`, `f1`, `target`) VALUES "
+                "('0',0,0),('1',1,2)"
+            ],
+        )
@@ -100,3 +100,115 @@ class TestSqlDatabase(AsyncTestCase):
             await db_ctx.insert_or_update(self.table_name, data)
             results = [row async for row in db_ctx.lookup(self.table_name)]
             self.assertEqual(results, expected)
+
+    async def test_5_insert_or_update_many(self):
+        data = [
+            {"key": 12, "firstName": "Bill"},
+            {"key": 13, "firstName": "Jane", "lastName": "Doe", "age": 21},
+            {"key": 14, "firstName": "Jim", "lastName": "Doe", "age": 22},
+            {"key": 12, "lastName": "Smith"},
+        ]
+        expected = [
+            {"key": 12, "firstName": "Bill", "lastName": "Smith", "age": 40.0},
+            {"key": 13, "firstName": "Jane", "lastName": "Doe", "age": 21.0},
+            {"key": 14, "firstName": "Jim", "lastName": "Doe", "age": 22.0},
+        ]
+        async with self.sdb() as db_ctx:
+            await db_ctx.insert_or_update_many(self.table_name, data)
+            results = [row async for row in db_ctx.lookup(self.table_name)]
+            self.assertEqual(results, expected)
+
+    async def test_6_lookup_streams(self):
+        sdb = SqliteDatabase(
+            SqliteDatabaseConfig(
+                filename=self.database_name, fetch_size=2, wal=True
+            )
+        )
+        async with sdb, sdb() as db_ctx:
+            rows = db_ctx.lookup(self.table_name, ["key"])
+            first = await rows.__anext__()
+            # Writes and other lookups don't wait for an unfinished lookup
+            await db_ctx.insert_or_update(
+                self.table_name, {"key": 15, "firstName": "Jo"}
+            )
+            others = [row async for row in db_ctx.lookup(self.table_name)]
+            remaining = [row async for row in rows]
+        self.assertEqual([row["key"] for row in others], [12, 13, 14, 15])
+        # The unfinished lookup reads from the database as it was when it
+        # started
+        self.assertEqual(
+            [first] + remaining, [{"key": key} for key in (12, 13, 14)]
+        )
+
+    async def test_7_insert_or_update_unique(self):
+        async with self.sdb() as db_ctx:
+            await db_ctx.create_table(
+                "uniqueTable",
+                {
+                    "id": "INTEGER PRIMARY KEY AUTOINCREMENT",
+                    "name": "TEXT UNIQUE",
+                    "v": "INT",
+                },
+            )
+            # Rows without the primary key conflict on the unique column
+            await db_ctx.insert_or_update("uniqueTable", {"name": "a", "v": 1})
+            await db_ctx.insert_or_update("uniqueTable", {"name": "a", "v": 2})
+            # Rows with the primary key which conflict on the unique column
+            # update the conflicting row, including its primary key
+            await db_ctx.insert_or_update_many(
+                "uniqueTable",
+                [
+                    {"id": 2, "name": "b", "v": 3},
+                    {"id": 3, "name": "b", "v": 4},
+                ],
+            )
+            results = [row async for row in db_ctx.lookup("uniqueTable")]
+        self.assertEqual(
+            results,
+            [
+                {"id": 1, "name": "a", "v": 2},
+                {"id": 3, "name": "b", "v": 4},
+            ],
+        )
+
+    async def test_8_write_while_looking_up(self):
+        sdb = SqliteDatabase(
+            SqliteDatabaseConfig(filename=self.database_name, fetch_size=2)
+        )
+        async with sdb, sdb() as db_ctx:
+            await db_ctx.create_table(
+                "pagedTable", {"key": "INTEGER PRIMARY KEY", "v": "INT"}
+            )
+            await db_ctx.insert_or_update_many(
+                "pagedTable", [{"key": key, "v": 0} for key in range(50)]
+            )
+            # Without wal, a lookup doesn't keep the database locked between
+            # pages, so rows can be written as they are read
+            async for row in db_ctx.lookup("pagedTable"):
+                await db_ctx.insert_or_update(
+                    "pagedTable", {"key": row["key"], "v": row["key"] + 1}
+                )
+            results = [
+                row
+                async for row in db_ctx.lookup(
+                    "pagedTable", ["v"], [[["key", ">", 1]]]
+                )
+            ]
+        self.assertEqual(results, [{"v": key + 1} for key in range(2, 50)])
+
+    async def test_9_lookup_without_rowid(self):
+        sdb = SqliteDatabase(
+            SqliteDatabaseConfig(filename=self.database_name, fetch_size=2)
+        )
+        async with sdb, sdb() as db_ctx:
+            db_ctx.parent.cursor.execute(
+                "CREATE TABLE noRowid (`key` TEXT PRIMARY KEY, `v` INT) "
+                + "WITHOUT ROWID"
+            )
+            await db_ctx.insert_or_update_many(
+                "noRowid", [{"key": str(key), "v": key} for key in range(3)]
+            )
+            results = [row async for row in db_ctx.lookup("noRowid")]
+        self.assertEqual(
+            results, [{"key": str(key), "v": key} for key in range(3)]
+        )
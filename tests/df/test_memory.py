@@ -1,9 +1,17 @@
+import os
+import sys
+import asyncio
+import concurrent.futures
+import itertools
+import subprocess
+import threading
 from unittest.mock import patch
 
 from dffml import (
     run,
     DataFlow,
     GetSingle,
+    GetMulti,
     Input,
     Definition,
     op,
@@ -12,13 +20,21 @@ from dffml import (
 )
 from dffml.util.cli.arg import Arg, parse_unknown
 from dffml.util.entrypoint import entrypoint
-from dffml.df.types import Definition, DataFlow, Input
-from dffml.df.base import op, BaseKeyValueStore
+from dffml.df.types import Definition, DataFlow, Input, Parameter
+from dffml.df.base import op, BaseKeyValueStore, StringInputSetContext
 from dffml.df.memory import (
     MemoryKeyValueStore,
     MemoryRedundancyChecker,
     MemoryRedundancyCheckerConfig,
+    MemorySetRedundancyChecker,
+    MemoryParameterSet,
+    MemoryParameterSetConfig,
     MemoryOrchestrator,
+    MemoryOperationImplementationNetwork,
+    MemoryLockNetworkContext,
+    NotificationSet,
+    OperationTrace,
+    cache_key_default,
 )
 from dffml.util.asynctestcase import AsyncTestCase
 
@@ -201,3 +217,1013 @@ class TestMemoryOperationImplementationNetworkContext(AsyncTestCase):
         except OperationException as error:
             self.assertEqual(error.__cause__.__class__, Exception)
             self.assertEqual(error.__cause__.args[0], "Failure 2")
+
+
+@op(outputs={"result": Definition(name="thread_ident", primitive="int")})
+def thread_ident(value: int) -> int:
+    return {"result": threading.get_ident()}
+
+
+@op(
+    outputs={"result": Definition(name="process_id", primitive="int")},
+    executor="process",
+)
+def process_id(value: int) -> int:
+    return {"result": os.getpid()}
+
+
+@config
+class AddConfigConfig:
+    amount: int
+
+
+@op(
+    inputs={"value": Definition(name="add_value", primitive="int")},
+    outputs={"result": Definition(name="added", primitive="int")},
+    config_cls=AddConfigConfig,
+    executor="process",
+)
+def add_config(value: int, config: AddConfigConfig) -> int:
+    return {"result": value + config.amount}
+
+
+@op(outputs={}, max_concurrency=2)
+async def count_concurrent(self, value: int):
+    self.parent.running = getattr(self.parent, "running", 0) + 1
+    self.parent.max_running = max(
+        getattr(self.parent, "max_running", 0), self.parent.running
+    )
+    await asyncio.sleep(0.01)
+    self.parent.running -= 1
+
+
+class TestMemoryOperationImplementationNetworkExecutor(AsyncTestCase):
+    async def run_results(self, orchestrator, opimp, *values):
+        dataflow = DataFlow.auto(opimp, GetSingle)
+        dataflow.seed.append(
+            Input(
+                value=[opimp.op.outputs["result"].name],
+                definition=GetSingle.op.inputs["spec"],
+            )
+        )
+        results = []
+        async with orchestrator:
+            async with orchestrator(dataflow) as octx:
+                async for _ctx, ctx_results in octx.run(
+                    {
+                        str(value): [
+                            Input(
+                                value=value,
+                                definition=list(opimp.op.inputs.values())[0],
+                            )
+                        ]
+                        for value in values
+                    }
+                ):
+                    results.append(ctx_results)
+                return octx, results
+
+    async def test_inline_by_default(self):
+        _octx, results = await self.run_results(
+            MemoryOrchestrator(), thread_ident, 1
+        )
+        self.assertEqual(
+            results, [{"thread_ident": threading.get_ident()}],
+        )
+
+    async def test_thread(self):
+        _octx, results = await self.run_results(
+            MemoryOrchestrator(
+                opimp_network=MemoryOperationImplementationNetwork(
+                    executor="thread"
+                )
+            ),
+            thread_ident,
+            1,
+        )
+        self.assertNotEqual(
+            results, [{"thread_ident": threading.get_ident()}],
+        )
+
+    async def test_process(self):
+        _octx, results = await self.run_results(
+            MemoryOrchestrator(), process_id, 1, 2
+        )
+        self.assertEqual(len(results), 2)
+        for ctx_results in results:
+            self.assertNotEqual(ctx_results["process_id"], os.getpid())
+
+    async def test_process_uses_config(self):
+        dataflow = DataFlow.auto(add_config, GetSingle)
+        dataflow.configs[add_config.op.name] = {"amount": 40}
+        dataflow.seed.append(
+            Input(value=["added"], definition=GetSingle.op.inputs["spec"])
+        )
+        async with MemoryOrchestrator() as orchestrator:
+            async with orchestrator(dataflow) as octx:
+                async for _ctx, results in octx.run(
+                    [Input(value=2, definition=add_config.op.inputs["value"])]
+                ):
+                    self.assertEqual(results, {"added": 42})
+
+    async def test_max_concurrency(self):
+        for orchestrator, expected in [
+            (MemoryOrchestrator(), 2),
+            (
+                MemoryOrchestrator(
+                    opimp_network=MemoryOperationImplementationNetwork(
+                        max_concurrency={count_concurrent.op.name: 1}
+                    )
+                ),
+                1,
+            ),
+        ]:
+            with self.subTest(expected=expected):
+                dataflow = DataFlow.auto(count_concurrent)
+                async with orchestrator:
+                    async with orchestrator(dataflow) as octx:
+                        async for _ in octx.run(
+                            [
+                                Input(
+                                    value=i,
+                                    definition=count_concurrent.op.inputs[
+                                        "value"
+                                    ],
+                                )
+                                for i in range(0, 10)
+                            ]
+                        ):
+                            pass
+                        opimp = octx.nctx.operations[count_concurrent.op.name]
+                        self.assertEqual(opimp.max_running, expected)
+
+
+@op(
+    inputs={"number": Definition(name="number", primitive="int")},
+    outputs={"result": Definition(name="number_plus_one", primitive="int")},
+)
+async def add_one(number: int):
+    return {"result": number + 1}
+
+
+class TestMemoryInputNetworkContext(AsyncTestCase):
+    async def test_match_plans_compiled_on_initialize(self):
+        dataflow = DataFlow.auto(add_one, GetSingle)
+        async with MemoryOrchestrator() as orchestrator:
+            async with orchestrator(dataflow) as octx:
+                plans = octx.ictx.match_plans[dataflow]
+                self.assertIn(add_one.op.name, plans)
+                self.assertEqual(
+                    plans[add_one.op.name].inputs["number"][0].definitions,
+                    (add_one.op.inputs["number"].name,),
+                )
+
+    async def test_gather_inputs_by_definition(self):
+        dataflow = DataFlow.auto(add_one, GetSingle)
+        numbers = [
+            Input(value=i, definition=add_one.op.inputs["number"])
+            for i in range(0, 3)
+        ]
+        async with MemoryOrchestrator() as orchestrator:
+            async with orchestrator(dataflow) as octx:
+                ctx = await octx.ictx.sadd(
+                    "numbers",
+                    *numbers,
+                    # Inputs from the same origin with other definitions
+                    # should not be considered
+                    *[
+                        Input(value=i, definition=GetSingle.op.inputs["spec"])
+                        for i in range(0, 3)
+                    ],
+                )
+                gathered = [
+                    [
+                        parameter.origin
+                        async for parameter in parameter_set.parameters()
+                    ]
+                    async for parameter_set in octx.ictx.gather_inputs(
+                        octx.rctx,
+                        dataflow.operations[add_one.op.name],
+                        dataflow,
+                        ctx=ctx,
+                    )
+                ]
+        self.assertEqual(gathered, [[item] for item in numbers])
+
+
+class TestNotificationSet(AsyncTestCase):
+    async def test_added_fifo(self):
+        notification_set = NotificationSet()
+        async with notification_set() as nctx:
+            for i in range(0, 3):
+                await nctx.add(i)
+            self.assertEqual(
+                [await nctx.added() for _ in range(0, 3)],
+                [(True, 0), (True, 1), (False, 2)],
+            )
+
+    async def test_drain(self):
+        notification_set = NotificationSet()
+        async with notification_set() as nctx:
+            drained = asyncio.create_task(nctx.drain())
+            await asyncio.sleep(0)
+            self.assertFalse(drained.done())
+            for i in range(0, 3):
+                await nctx.add(i)
+            self.assertEqual(await drained, [0, 1, 2])
+            self.assertFalse(notification_set.notification_items)
+
+    async def test_multiple_waiters(self):
+        notification_set = NotificationSet()
+        async with notification_set() as nctx:
+            waiters = [asyncio.create_task(nctx.added()) for _ in range(0, 2)]
+            await asyncio.sleep(0)
+            await nctx.add(0)
+            await asyncio.sleep(0)
+            # Only one waiter gets the item, the other keeps waiting
+            self.assertEqual(sum([waiter.done() for waiter in waiters]), 1)
+            await nctx.add(1)
+            self.assertEqual(
+                sorted([(await waiter)[1] for waiter in waiters]), [0, 1]
+            )
+
+
+SLEEP_VALUE = Definition(name="sleep_value", primitive="int")
+SLEPT_VALUE = Definition(name="slept_value", primitive="int")
+
+
+@op(inputs={"value": SLEEP_VALUE}, outputs={"value": SLEPT_VALUE})
+async def sleep_value(value: int):
+    await asyncio.sleep(value / 1000)
+    return {"value": value}
+
+
+class TestMemoryOrchestratorContextScheduling(AsyncTestCase):
+    async def test_operations_complete_one_at_a_time(self):
+        dataflow = DataFlow.auto(sleep_value, GetMulti)
+        dataflow.seed.append(
+            Input(
+                value=[sleep_value.op.outputs["value"].name],
+                definition=GetMulti.op.inputs["spec"],
+            )
+        )
+        async with MemoryOrchestrator() as orchestrator:
+            async with orchestrator(dataflow) as octx:
+                results = {
+                    (await ctx.handle()).as_string(): result
+                    async for ctx, result in octx.run(
+                        {
+                            str(i): [
+                                Input(value=j, definition=SLEEP_VALUE)
+                                for j in reversed(range(0, 20))
+                            ]
+                            for i in range(0, 3)
+                        }
+                    )
+                }
+        self.assertEqual(len(results), 3)
+        for result in results.values():
+            self.assertEqual(
+                sorted(result[sleep_value.op.outputs["value"].name]),
+                list(range(0, 20)),
+            )
+
+
+BATCH_NUMBER = Definition(name="batch_number", primitive="int")
+BATCH_DOUBLED = Definition(name="batch_doubled", primitive="int")
+
+
+@op(
+    inputs={"number": BATCH_NUMBER},
+    outputs={"doubled": BATCH_DOUBLED},
+    batch=4,
+)
+async def double_batch(number):
+    double_batch.calls.append(list(number))
+    return [{"doubled": value * 2} for value in number]
+
+
+@op(
+    inputs={"number": BATCH_NUMBER},
+    outputs={"doubled": BATCH_DOUBLED},
+    batch=4,
+)
+async def double_batch_missing_output(number):
+    return [{"doubled": value * 2} for value in number[1:]]
+
+
+class TestMemoryOperationImplementationNetworkBatch(AsyncTestCase):
+    async def run_batched(self, operation, numbers):
+        dataflow = DataFlow.auto(operation, GetSingle)
+        dataflow.seed.append(
+            Input(
+                value=[BATCH_DOUBLED.name],
+                definition=GetSingle.op.inputs["spec"],
+            )
+        )
+        async with MemoryOrchestrator() as orchestrator:
+            async with orchestrator(dataflow) as octx:
+                return {
+                    (await ctx.handle()).as_string(): result[
+                        BATCH_DOUBLED.name
+                    ]
+                    async for ctx, result in octx.run(
+                        {
+                            str(i): [Input(value=i, definition=BATCH_NUMBER)]
+                            for i in numbers
+                        }
+                    )
+                }
+
+    async def test_batches_across_contexts(self):
+        double_batch.calls = []
+        results = await self.run_batched(double_batch, range(0, 10))
+        self.assertEqual(results, {str(i): i * 2 for i in range(0, 10)})
+        self.assertEqual(
+            sorted(double_batch.calls),
+            [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]],
+        )
+
+    async def test_wrong_number_of_outputs(self):
+        with self.assertRaises(OperationException):
+            await self.run_batched(double_batch_missing_output, range(0, 4))
+
+    def test_export(self):
+        exported = double_batch.op._replace(batch_wait=5).export()
+        self.assertEqual(exported["batch"], 4)
+        self.assertEqual(exported["batch_wait"], 5)
+        self.assertNotIn("batch", add_one.op.export())
+
+
+class TestMemorySetRedundancyChecker(AsyncTestCase):
+    @staticmethod
+    def parameter_set(ctx, *inputs):
+        return MemoryParameterSet(
+            MemoryParameterSetConfig(
+                ctx=StringInputSetContext(ctx),
+                parameters=[
+                    Parameter(
+                        key=str(i),
+                        value=item.value,
+                        origin=item,
+                        definition=item.definition,
+                    )
+                    for i, item in enumerate(inputs)
+                ],
+            )
+        )
+
+    async def test_take_if_non_existant(self):
+        a = Input(value=1, definition=CONDITION)
+        b = Input(value=2, definition=CONDITION)
+        async with MemorySetRedundancyChecker() as rchecker:
+            async with rchecker() as rctx:
+                taken = [
+                    taken
+                    async for _, taken in rctx.take_if_non_existant(
+                        add_one.op,
+                        self.parameter_set("first", a, b),
+                        # Order of inputs does not matter
+                        self.parameter_set("first", b, a),
+                        self.parameter_set("second", a, b),
+                        self.parameter_set("first", a),
+                    )
+                ]
+                self.assertEqual(taken, [True, False, True, True])
+                self.assertTrue(
+                    await rctx.exists(
+                        add_one.op, self.parameter_set("second", b, a)
+                    )
+                )
+                self.assertFalse(
+                    await rctx.exists(
+                        add_one.op, self.parameter_set("second", b)
+                    )
+                )
+                await rctx.add(add_one.op, self.parameter_set("second", b))
+                self.assertTrue(
+                    await rctx.exists(
+                        add_one.op, self.parameter_set("second", b)
+                    )
+                )
+
+    async def test_orchestrator_default(self):
+        async with MemoryOrchestrator() as orchestrator:
+            async with orchestrator(DataFlow.auto(add_one)) as octx:
+                self.assertIsInstance(
+                    octx.rctx.parent, MemoryRedundancyChecker
+                )
+
+    async def test_orchestrator(self):
+        async with MemoryOrchestrator(
+            rchecker=MemorySetRedundancyChecker()
+        ) as orchestrator:
+            async with orchestrator(DataFlow.auto(add_one)) as octx:
+                self.assertIsInstance(
+                    octx.rctx.parent, MemorySetRedundancyChecker
+                )
+
+
+@op(
+    inputs={
+        "number": Definition(name="locked_number", primitive="int", lock=True)
+    },
+    outputs={"result": Definition(name="number", primitive="int")},
+)
+async def use_locked(number: int):
+    return {"result": number}
+
+
+class TestMemoryOrchestratorContextLifecycle(AsyncTestCase):
+    async def run_ctxs(self, orchestrator, num_ctxs):
+        dataflow = DataFlow.auto(use_locked, add_one)
+        async with orchestrator:
+            async with orchestrator(dataflow) as octx:
+                async for _ in octx.run(
+                    {
+                        str(i): [
+                            Input(
+                                value=i,
+                                definition=use_locked.op.inputs["number"],
+                            )
+                        ]
+                        for i in range(0, num_ctxs)
+                    }
+                ):
+                    pass
+                return octx
+
+    async def test_removed_when_complete(self):
+        octx = await self.run_ctxs(
+            MemoryOrchestrator(
+                retain_ctxs=0, rchecker=MemorySetRedundancyChecker()
+            ),
+            20,
+        )
+        self.assertFalse(octx.ictx.ctxhd)
+        self.assertFalse(octx.ictx.input_notification_set)
+        self.assertFalse(octx.ictx.ctx_notification_set.notification_items)
+        self.assertFalse(octx.rctx.taken)
+        self.assertFalse(octx.lctx.locks)
+        self.assertFalse(octx.lctx.ctx_locks)
+        self.assertFalse(octx.lctx.lock_ctxs)
+
+    async def test_retain_ctxs(self):
+        octx = await self.run_ctxs(
+            MemoryOrchestrator(
+                retain_ctxs=2, rchecker=MemorySetRedundancyChecker()
+            ),
+            10,
+        )
+        self.assertEqual(len(octx.ictx.ctxhd), 2)
+        self.assertEqual(len(octx.rctx.taken), 2)
+        self.assertEqual(len(octx.lctx.locks), 2)
+        self.assertEqual(
+            set(octx.ictx.ctxhd),
+            {
+                (await ctx.handle()).as_string()
+                for ctx in list(octx.retained)
+            },
+        )
+
+    async def test_retain_all(self):
+        # Completed contexts are kept by default
+        octx = await self.run_ctxs(MemoryOrchestrator(), 10)
+        self.assertEqual(len(octx.ictx.ctxhd), 10)
+        self.assertEqual(len(octx.lctx.locks), 10)
+
+
+class TestMemoryOrchestratorStreaming(AsyncTestCase):
+    async def test_async_iterator_bounded_by_max_ctxs(self):
+        pulled = []
+
+        async def ctx_inputs():
+            for i in range(0, 10):
+                pulled.append(i)
+                yield str(i), [
+                    Input(value=i, definition=use_locked.op.inputs["number"])
+                ]
+
+        results = {}
+        dataflow = DataFlow.auto(use_locked, add_one, GetSingle)
+        dataflow.seed.append(
+            Input(
+                value=[add_one.op.outputs["result"].name],
+                definition=GetSingle.op.inputs["spec"],
+            )
+        )
+        async with MemoryOrchestrator(
+            max_ctxs=2, retain_ctxs=0
+        ) as orchestrator:
+            async with orchestrator(dataflow) as octx:
+                async for ctx, ctx_results in octx.run(ctx_inputs()):
+                    if not results:
+                        # Contexts are only pulled from the iterator as they
+                        # are started
+                        self.assertLess(len(pulled), 10)
+                    self.assertLessEqual(len(octx.ictx.ctxhd), 2)
+                    results[(await ctx.handle()).as_string()] = ctx_results
+        self.assertEqual(
+            results,
+            {
+                str(i): {add_one.op.outputs["result"].name: i + 1}
+                for i in range(0, 10)
+            },
+        )
+
+
+@op(
+    inputs={
+        "a": Definition(name="pair_a", primitive="int"),
+        "b": Definition(name="pair_b", primitive="int"),
+    },
+    outputs={},
+)
+async def record_pair(self, a: int, b: int):
+    self.parent.pairs.append((a, b))
+
+
+@op(
+    inputs={"a": Definition(name="pair_a", primitive="int")},
+    outputs={"b": Definition(name="pair_b", primitive="int")},
+    expand=["b"],
+)
+async def make_b(a: int):
+    return {"b": [a * 10, a * 100]}
+
+
+class TestMemoryOrchestratorSemiNaive(AsyncTestCase):
+    async def run_pairs(self, orchestrator, *inputs):
+        dataflow = DataFlow.auto(record_pair, make_b)
+        async with orchestrator:
+            async with orchestrator(dataflow) as octx:
+                octx.nctx.operations[record_pair.op.name].pairs = []
+                async for _ in octx.run(list(inputs)):
+                    pass
+                return sorted(octx.nctx.operations[record_pair.op.name].pairs)
+
+    async def test_same_as_naive(self):
+        inputs = [
+            Input(value=i, definition=make_b.op.inputs["a"])
+            for i in range(1, 4)
+        ]
+        semi_naive = await self.run_pairs(MemoryOrchestrator(), *inputs)
+        naive = await self.run_pairs(
+            MemoryOrchestrator(no_semi_naive=True), *inputs
+        )
+        self.assertEqual(semi_naive, naive)
+        # Key value store backed redundancy checker behaves the same
+        kvstore_backed = await self.run_pairs(
+            MemoryOrchestrator(rchecker=MemoryRedundancyChecker()), *inputs
+        )
+        self.assertEqual(semi_naive, kvstore_backed)
+        # Every pairing runs exactly once
+        self.assertEqual(len(semi_naive), 3 * 6)
+        self.assertEqual(len(set(semi_naive)), 3 * 6)
+
+    async def test_condition_added_after_inputs(self):
+        ran = []
+
+        @op(conditions=[CONDITION])
+        async def condition_test(hi: str):
+            ran.append(hi)
+
+        @op(outputs={"result": CONDITION})
+        async def make_condition(hi: str):
+            return {"result": True}
+
+        dataflow = DataFlow(
+            operations={
+                "condition_test": condition_test,
+                "make_condition": make_condition,
+            },
+        )
+        async with MemoryOrchestrator() as orchestrator:
+            async with orchestrator(dataflow) as octx:
+                async for _ in octx.run(
+                    [
+                        Input(
+                            value="hello",
+                            definition=condition_test.op.inputs["hi"],
+                        )
+                    ]
+                ):
+                    pass
+
+        self.assertEqual(ran, ["hello"])
+
+
+@op(outputs={"length": Definition(name="prune_length", primitive="int")})
+def prune_length(word: str):
+    return {"length": len(word)}
+
+
+@op(outputs={"upper": Definition(name="prune_upper", primitive="str")})
+def prune_upper(word: str):
+    return {"upper": word.upper()}
+
+
+@op(
+    inputs={"upper": prune_upper.op.outputs["upper"]},
+    outputs={"reversed": Definition(name="prune_reversed", primitive="str")},
+)
+def prune_reverse(upper: str):
+    return {"reversed": upper[::-1]}
+
+
+class TestMemoryOrchestratorPrune(AsyncTestCase):
+    def dataflow(self, *requested):
+        dataflow = DataFlow(
+            prune_length, prune_upper, prune_reverse, GetSingle
+        )
+        dataflow.seed.append(
+            Input(
+                value=list(requested), definition=GetSingle.op.inputs["spec"]
+            )
+        )
+        return dataflow
+
+    def test_unreachable_operations(self):
+        self.assertEqual(
+            self.dataflow("prune_length").unreachable_operations(),
+            {prune_upper.op.name, prune_reverse.op.name},
+        )
+        # Operations feeding the requested definition are kept
+        self.assertEqual(
+            self.dataflow("prune_reversed").unreachable_operations(),
+            {prune_length.op.name},
+        )
+        # Nothing can be pruned without output operations
+        self.assertEqual(
+            DataFlow(prune_length, prune_upper).unreachable_operations(),
+            set(),
+        )
+
+    async def test_prune(self):
+        for prune in (False, True):
+            with self.subTest(prune=prune):
+                orchestrator = (
+                    MemoryOrchestrator(prune=True)
+                    if prune
+                    else MemoryOrchestrator()
+                )
+                async with orchestrator:
+                    async with orchestrator(
+                        self.dataflow("prune_length")
+                    ) as octx:
+                        async for _ctx, results in octx.run(
+                            [
+                                Input(
+                                    value="hello",
+                                    definition=prune_length.op.inputs["word"],
+                                )
+                            ]
+                        ):
+                            self.assertEqual(results, {"prune_length": 5})
+                        self.assertEqual(
+                            octx.pruned,
+                            {prune_upper.op.name, prune_reverse.op.name}
+                            if prune
+                            else set(),
+                        )
+                        self.assertEqual(
+                            prune_upper.op.name in octx.nctx.operations,
+                            not prune,
+                        )
+
+
+class TestMemoryKeyValueStore(AsyncTestCase):
+    async def test_max_entries(self):
+        async with MemoryKeyValueStore(max_entries=2) as kvstore:
+            async with kvstore() as kvctx:
+                await kvctx.set("a", b"a")
+                await kvctx.set("b", b"b")
+                # Using a makes b the least recently used
+                self.assertEqual(await kvctx.get("a"), b"a")
+                await kvctx.set("c", b"c")
+                self.assertEqual(await kvctx.get("a"), b"a")
+                self.assertIsNone(await kvctx.get("b"))
+                self.assertEqual(await kvctx.get("c"), b"c")
+
+
+@op(
+    inputs={"word": Definition(name="cached_word", primitive="str")},
+    outputs={"length": Definition(name="cached_length", primitive="int")},
+    cache=True,
+)
+async def cached_length(self, word: str):
+    self.parent.calls.append(word)
+    return {"length": len(word)}
+
+
+class TestMemoryOperationImplementationNetworkCache(AsyncTestCase):
+    async def run_words(self, opimp_network, **contexts):
+        dataflow = DataFlow(cached_length, GetSingle)
+        dataflow.seed.append(
+            Input(
+                value=[cached_length.op.outputs["length"].name],
+                definition=GetSingle.op.inputs["spec"],
+            )
+        )
+        # One context at a time so that each sees the outputs cached by the
+        # last
+        orchestrator = MemoryOrchestrator(
+            opimp_network=opimp_network, max_ctxs=1
+        )
+        async with orchestrator:
+            async with orchestrator(dataflow) as octx:
+                octx.nctx.operations[cached_length.op.name].calls = []
+                results = {}
+                async for ctx, ctx_results in octx.run(
+                    {
+                        ctx_string: [
+                            Input(
+                                value=word,
+                                definition=cached_length.op.inputs["word"],
+                            )
+                        ]
+                        for ctx_string, word in contexts.items()
+                    }
+                ):
+                    results[(await ctx.handle()).as_string()] = ctx_results
+                return (
+                    results,
+                    octx.nctx.operations[cached_length.op.name].calls,
+                )
+
+    async def test_cache(self):
+        results, calls = await self.run_words(
+            MemoryOperationImplementationNetwork(cache=MemoryKeyValueStore()),
+            a="hello",
+            b="hello",
+            c="hi",
+        )
+        self.assertEqual(
+            results,
+            {
+                "a": {"cached_length": 5},
+                "b": {"cached_length": 5},
+                "c": {"cached_length": 2},
+            },
+        )
+        # Contexts a and b have the same input value
+        self.assertEqual(calls, ["hello", "hi"])
+
+    async def test_no_cache(self):
+        _results, calls = await self.run_words(
+            MemoryOperationImplementationNetwork(), a="hello", b="hello"
+        )
+        self.assertEqual(calls, ["hello", "hello"])
+
+    async def test_ttl(self):
+        with patch("dffml.df.memory.time") as mock_time:
+            # Ten seconds pass between each call to time()
+            mock_time.time.side_effect = itertools.count(0, 10)
+            _results, calls = await self.run_words(
+                MemoryOperationImplementationNetwork(
+                    cache=MemoryKeyValueStore(),
+                    cache_ttl={cached_length.op.name: 5},
+                ),
+                a="hello",
+                b="hello",
+            )
+        self.assertEqual(calls, ["hello", "hello"])
+
+    def test_cache_key_default(self):
+        # Set iteration order depends on the hash seed of the process
+        keys = set()
+        for seed in range(0, 4):
+            keys.add(
+                subprocess.check_output(
+                    [
+                        sys.executable,
+                        "-c",
+                        "import json;"
+                        + "from dffml.df.memory import cache_key_default;"
+                        + "print(json.dumps({'words': set('abcdefgh')}, "
+                        + "sort_keys=True, default=cache_key_default))",
+                    ],
+                    env={
+                        **os.environ,
+                        "PYTHONHASHSEED": str(seed),
+                        "PYTHONPATH": os.pathsep.join(sys.path),
+                    },
+                )
+            )
+        self.assertEqual(
+            keys, {b'{"words": ["a", "b", "c", "d", "e", "f", "g", "h"]}\n'}
+        )
+        self.assertEqual(
+            cache_key_default(new_input_uid), f"{__name__}.new_input_uid"
+        )
+        with self.assertRaises(TypeError):
+            cache_key_default(object())
+
+
+class TestMemoryLockNetworkBypass(AsyncTestCase):
+    async def test_only_locking_operations_acquire(self):
+        dataflow = DataFlow.auto(use_locked, add_one, prune_upper)
+        # add_one is given outputs derived from locked inputs
+        self.assertEqual(
+            dataflow.locking_operations(),
+            {use_locked.op.name, add_one.op.name},
+        )
+        acquired = []
+        acquire = MemoryLockNetworkContext.acquire
+
+        def record_acquire(self, parameter_set, *, operation=None):
+            acquired.append(operation.instance_name)
+            return acquire(self, parameter_set, operation=operation)
+
+        with patch.object(
+            MemoryLockNetworkContext, "acquire", record_acquire
+        ):
+            async with MemoryOrchestrator() as orchestrator:
+                async with orchestrator(dataflow) as octx:
+                    async for _ctx, results in octx.run(
+                        [
+                            Input(
+                                value=1,
+                                definition=use_locked.op.inputs["number"],
+                            ),
+                            Input(
+                                value="hello",
+                                definition=prune_upper.op.inputs["word"],
+                            ),
+                        ]
+                    ):
+                        pass
+        self.assertEqual(
+            sorted(acquired), sorted([use_locked.op.name, add_one.op.name])
+        )
+
+    def test_lock_inputs(self):
+        locked = Input(value=1, definition=use_locked.op.inputs["number"])
+        child = Input(
+            value=1,
+            definition=use_locked.op.outputs["result"],
+            parents=[locked],
+        )
+        grandchild = Input(
+            value=2,
+            definition=add_one.op.outputs["result"],
+            parents=[child],
+        )
+        self.assertEqual(locked.lock_inputs, {locked})
+        self.assertEqual(grandchild.lock_inputs, {locked})
+        self.assertEqual(grandchild.ancestors(), {locked, child})
+
+
+@op(
+    inputs={"word": Definition(name="trusted_word", primitive="str")},
+    outputs={
+        "length": Definition(name="trusted_length", primitive="int"),
+        "upper": Definition(
+            name="trusted_upper", primitive="str", validate=str.upper
+        ),
+    },
+)
+def trusted_outputs(word: str):
+    return {"length": len(word), "upper": word}
+
+
+def new_input_uid():
+    return Input(value=1, definition=add_one.op.inputs["number"]).uid
+
+
+class TestInputTrusted(AsyncTestCase):
+    def test_slots(self):
+        item = Input(value=1, definition=add_one.op.inputs["number"])
+        self.assertFalse(hasattr(item, "__dict__"))
+        with self.assertRaises(AttributeError):
+            item.extra = True
+
+    def test_uid(self):
+        first = Input(value=1, definition=add_one.op.inputs["number"])
+        second = Input(value=1, definition=add_one.op.inputs["number"])
+        self.assertIsInstance(first.uid, int)
+        self.assertGreater(second.uid, first.uid)
+        given = Input(
+            value=1, definition=add_one.op.inputs["number"], uid="given"
+        )
+        self.assertEqual(given.uid, "given")
+
+    def test_uid_other_process(self):
+        # Ids from another process, such as a previous run whose results were
+        # saved, don't collide with ours
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1) as pool:
+            other = pool.submit(new_input_uid).result()
+        self.assertNotEqual(other // 2 ** 64, new_input_uid() // 2 ** 64)
+
+    def test_trusted_lock_inputs(self):
+        locked = Input(value=1, definition=use_locked.op.inputs["number"])
+        child = Input.trusted(
+            1,
+            use_locked.op.outputs["result"],
+            [locked],
+            (use_locked.op.name, "result"),
+            True,
+            locked.lock_inputs,
+        )
+        self.assertEqual(child.lock_inputs, {locked})
+        self.assertEqual(child.ancestors(), {locked})
+
+    async def test_run_dispatch(self):
+        dataflow = DataFlow.auto(trusted_outputs)
+        # Outputs with a validate function are not trusted
+        self.assertEqual(
+            dataflow.trusted_outputs(),
+            {
+                trusted_outputs.op.name: {
+                    "length": dataflow.definitions["trusted_length"]
+                }
+            },
+        )
+        # Retain the context so that its inputs can be inspected
+        async with MemoryOrchestrator(retain_ctxs=-1) as orchestrator:
+            async with orchestrator(dataflow) as octx:
+                async for _ctx, _results in octx.run(
+                    {
+                        "hello": [
+                            Input(
+                                value="hello",
+                                definition=trusted_outputs.op.inputs["word"],
+                            )
+                        ]
+                    }
+                ):
+                    pass
+                outputs = {
+                    origin[1]: items[0]
+                    for origin, items in octx.ictx.ctxhd[
+                        "hello"
+                    ].by_origin.items()
+                    if origin != "seed"
+                }
+        self.assertEqual(outputs["upper"].value, "HELLO")
+        self.assertEqual(outputs["length"].value, 5)
+        self.assertIs(
+            outputs["length"].definition,
+            dataflow.definitions["trusted_length"],
+        )
+
+
+class Unprintable:
+    """
+    Value which fails if it is converted to a string
+    """
+
+    def __len__(self):
+        return 3
+
+    def __repr__(self):
+        raise AssertionError("Value was converted to a string")
+
+
+@op(
+    inputs={"value": Definition(name="trace_value", primitive="object")},
+    outputs={"length": Definition(name="trace_length", primitive="int")},
+)
+def trace_length(value):
+    return {"length": len(value)}
+
+
+class TestMemoryOperationImplementationNetworkTrace(AsyncTestCase):
+    async def test_trace(self):
+        events = []
+        orchestrator = MemoryOrchestrator(
+            opimp_network=MemoryOperationImplementationNetwork(
+                trace=events.append
+            )
+        )
+        async with orchestrator:
+            async with orchestrator(DataFlow.auto(trace_length)) as octx:
+                # Inputs aren't converted to strings unless debug logging is
+                # enabled
+                with patch.object(
+                    octx.nctx.logger, "isEnabledFor", return_value=False
+                ):
+                    async for _ctx, _results in octx.run(
+                        {
+                            "unprintable": [
+                                Input(
+                                    value=Unprintable(),
+                                    definition=trace_length.op.inputs["value"],
+                                )
+                            ]
+                        }
+                    ):
+                        pass
+        self.assertEqual(
+            [(trace.event, trace.instance_name) for trace in events],
+            [("start", trace_length.op.name), ("stop", trace_length.op.name)],
+        )
+        for trace in events:
+            self.assertIsInstance(trace, OperationTrace)
+            self.assertEqual(trace.input_sizes, {"value": 3})
+            self.assertEqual(
+                (await trace.ctx.handle()).as_string(), "unprintable"
+            )
+        self.assertIsNone(events[0].duration)
+        self.assertGreaterEqual(events[1].duration, 0)
+        self.assertIsNone(events[1].error)
@@ -0,0 +1,124 @@
+import os
+import asyncio
+
+from dffml import DataFlow, Input, GetSingle, Definition, op
+from dffml.df.base import OperationException
+from dffml.df.memory import MemoryOrchestrator
+from dffml.df.process import ProcessPoolOrchestrator
+from dffml.util.asynctestcase import AsyncTestCase
+
+
+NUMBER = Definition(name="process_number", primitive="int")
+PID = Definition(name="process_pid", primitive="int")
+SQUARE = Definition(name="process_square", primitive="int")
+
+
+@op(inputs={"number": NUMBER}, outputs={"pid": PID, "square": SQUARE})
+def process_square(number: int):
+    if number < 0:
+        raise ValueError("Negative number")
+    if number == 13:
+        # Worker exits without sending a result
+        os._exit(1)
+    return {"pid": os.getpid(), "square": number * number}
+
+
+class TestProcessPoolOrchestrator(AsyncTestCase):
+    async def run_numbers(
+        self,
+        *numbers,
+        strict=True,
+        orchestrator_cls=ProcessPoolOrchestrator,
+        origin="seed",
+        **kwargs,
+    ):
+        dataflow = DataFlow(process_square, GetSingle)
+        dataflow.seed.append(
+            Input(
+                value=[PID.name, SQUARE.name],
+                definition=GetSingle.op.inputs["spec"],
+            )
+        )
+        results = {}
+        async with orchestrator_cls(**kwargs) as orchestrator:
+            async with orchestrator(dataflow) as octx:
+                async for ctx, ctx_results in octx.run(
+                    {
+                        str(number): [
+                            Input(
+                                value=number, definition=NUMBER, origin=origin
+                            )
+                        ]
+                        for number in numbers
+                    },
+                    strict=strict,
+                ):
+                    results[(await ctx.handle()).as_string()] = ctx_results
+        return results
+
+    async def test_run(self):
+        results = await self.run_numbers(*range(0, 8), workers=2)
+        self.assertEqual(
+            {ctx: result[SQUARE.name] for ctx, result in results.items()},
+            {str(number): number * number for number in range(0, 8)},
+        )
+        pids = {result[PID.name] for result in results.values()}
+        # Contexts are run by both workers, neither of which is this process
+        self.assertEqual(len(pids), 2)
+        self.assertNotIn(os.getpid(), pids)
+
+    async def test_max_ctxs(self):
+        results = await self.run_numbers(*range(0, 4), workers=2, max_ctxs=1)
+        self.assertEqual(
+            {ctx: result[SQUARE.name] for ctx, result in results.items()},
+            {str(number): number * number for number in range(0, 4)},
+        )
+
+    async def test_error(self):
+        with self.assertRaisesRegex(OperationException, "Negative number"):
+            await self.run_numbers(1, -1, workers=1)
+
+    async def test_error_not_strict(self):
+        results = await self.run_numbers(1, -1, workers=1, strict=False)
+        self.assertEqual(results["1"][SQUARE.name], 1)
+        self.assertEqual(results["-1"], {})
+
+    async def test_worker_exited(self):
+        results = await self.run_numbers(
+            1, 13, 2, 3, workers=2, max_ctxs=1, strict=False
+        )
+        # Only the context the worker was running when it exited fails, the
+        # rest are run by the remaining worker
+        self.assertEqual(results["13"], {})
+        self.assertEqual(
+            {
+                ctx: result[SQUARE.name]
+                for ctx, result in results.items()
+                if ctx != "13"
+            },
+            {"1": 1, "2": 4, "3": 9},
+        )
+
+    async def test_all_workers_exited(self):
+        # Contexts started after the only worker exited fail rather than wait
+        # on it forever
+        results = await asyncio.wait_for(
+            self.run_numbers(13, 1, workers=1, max_ctxs=1, strict=False), 30
+        )
+        self.assertEqual(results, {"13": {}, "1": {}})
+
+    async def test_origin(self):
+        # Inputs which don't come from the seed aren't used by operations
+        # whose inputs come from the seed
+        origin = ("process_elsewhere", "number")
+        self.assertEqual(
+            await self.run_numbers(
+                2, workers=1, origin=origin, strict=False
+            ),
+            await self.run_numbers(
+                2,
+                orchestrator_cls=MemoryOrchestrator,
+                origin=origin,
+                strict=False,
+            ),
+        )
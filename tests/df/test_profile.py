@@ -0,0 +1,119 @@
+import json
+import pathlib
+import tempfile
+
+from dffml.df.types import DataFlow, Input
+from dffml.df.memory import MemoryOrchestrator, OperationTrace
+from dffml.df.profile import Histogram, OrchestratorProfiler
+from dffml.util.asynctestcase import AsyncTestCase
+
+from .test_memory import use_locked, add_one
+
+
+class TestHistogram(AsyncTestCase):
+    def test_cumulative(self):
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value)
+        self.assertEqual(
+            histogram.cumulative(), [("0.1", 2), ("1.0", 3), ("+Inf", 4)]
+        )
+        self.assertEqual(histogram.count, 4)
+        self.assertAlmostEqual(histogram.total, 2.65)
+
+
+class TestOrchestratorProfiler(AsyncTestCase):
+    async def run_profiled(self, profiler, num_ctxs):
+        dataflow = DataFlow.auto(use_locked, add_one)
+        async with MemoryOrchestrator(profiler=profiler) as orchestrator:
+            async with orchestrator(dataflow) as octx:
+                async for _ctx, _results in octx.run(
+                    {
+                        str(i): [
+                            Input(
+                                value=i,
+                                definition=use_locked.op.inputs["number"],
+                            )
+                        ]
+                        for i in range(0, num_ctxs)
+                    }
+                ):
+                    pass
+
+    async def test_summary(self):
+        profiler = OrchestratorProfiler()
+        await self.run_profiled(profiler, 3)
+        summary = profiler.summary()
+        for operation in (use_locked, add_one):
+            self.assertEqual(
+                summary["operations"][operation.op.name]["count"], 3
+            )
+            self.assertEqual(
+                summary["operations"][operation.op.name]["errors"], 0
+            )
+        self.assertEqual(
+            set(summary["phases"]),
+            {"gather_inputs", "redundancy_check", "lock"},
+        )
+        self.assertEqual(summary["contexts"]["count"], 3)
+        self.assertEqual(
+            sorted(summary["contexts"]["by_context"]), ["0", "1", "2"]
+        )
+        self.assertGreater(summary["tasks"]["max_pending"], 0)
+        self.assertEqual(summary["tasks"]["pending"], 0)
+
+    async def test_chrome_trace(self):
+        profiler = OrchestratorProfiler()
+        await self.run_profiled(profiler, 2)
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = pathlib.Path(tempdir, "trace.json")
+            profiler.save(path)
+            trace = json.loads(path.read_text())
+        events = trace["traceEvents"]
+        # Each context is named and gets its own row
+        names = {
+            event["args"]["name"]: event["tid"]
+            for event in events
+            if event["ph"] == "M"
+        }
+        self.assertEqual(sorted(names), ["0", "1"])
+        operations = [
+            event
+            for event in events
+            if event["ph"] == "X" and event["cat"] == "operation"
+        ]
+        self.assertEqual(len(operations), 4)
+        for event in operations:
+            self.assertIn(event["tid"], names.values())
+            self.assertGreaterEqual(event["dur"], 0)
+
+    async def test_max_events(self):
+        profiler = OrchestratorProfiler(max_events=5)
+        await self.run_profiled(profiler, 3)
+        self.assertEqual(len(profiler.events), 5)
+        self.assertGreater(profiler.dropped, 0)
+        # Aggregates are still complete
+        self.assertEqual(profiler.summary()["contexts"]["count"], 3)
+
+    def test_prometheus(self):
+        profiler = OrchestratorProfiler(buckets=(1.0,))
+        profiler.trace(OperationTrace("start", 'say "hi"', None, {}))
+        profiler.trace(
+            OperationTrace(
+                "stop", 'say "hi"', None, {}, 0.5, ValueError("failed")
+            )
+        )
+        metrics = profiler.prometheus()
+        self.assertIn(
+            'dffml_operation_seconds_bucket{operation="say \\"hi\\"",le="1.0"} 1',
+            metrics,
+        )
+        self.assertIn(
+            'dffml_operation_seconds_count{operation="say \\"hi\\""} 1',
+            metrics,
+        )
+        self.assertIn(
+            'dffml_operation_errors_total{operation="say \\"hi\\""} 1', metrics
+        )
+        self.assertIn("dffml_context_seconds_count 0", metrics)
+        self.assertIn("dffml_pending_tasks 0", metrics)
@@ -0,0 +1,182 @@
+import sqlite3
+from unittest.mock import patch
+
+from dffml import DataFlow, Input, GetSingle, Definition, op
+from dffml.df import types
+from dffml.df.memory import MemoryOrchestrator, MemoryRedundancyChecker
+from dffml.df.sqlite import SqliteKeyValueStore
+from dffml.util.asynctestcase import AsyncTestCase, non_existant_tempfile
+
+
+class TestSqliteKeyValueStore(AsyncTestCase):
+    async def test_persists(self):
+        with non_existant_tempfile() as filename:
+            async with SqliteKeyValueStore(filename=filename) as kvstore:
+                async with kvstore() as kvctx:
+                    self.assertIsNone(await kvctx.get("feed"))
+                    await kvctx.set("feed", b"face")
+                    await kvctx.set("dead", b"beef")
+                    await kvctx.set("dead", b"babe")
+            async with SqliteKeyValueStore(filename=filename) as kvstore:
+                async with kvstore() as kvctx:
+                    self.assertEqual(await kvctx.get("feed"), b"face")
+                    self.assertEqual(await kvctx.get("dead"), b"babe")
+
+    async def test_conditional_set(self):
+        with non_existant_tempfile() as filename:
+            async with SqliteKeyValueStore(filename=filename) as kvstore:
+                async with kvstore() as kvctx:
+                    checker = lambda value: value != b"\x01"
+                    self.assertTrue(
+                        await kvctx.conditional_set(
+                            "feed", b"\x01", checker=checker
+                        )
+                    )
+                    self.assertFalse(
+                        await kvctx.conditional_set(
+                            "feed", b"\x01", checker=checker
+                        )
+                    )
+
+    async def test_batch(self):
+        with non_existant_tempfile() as filename:
+            async with SqliteKeyValueStore(
+                filename=filename, batch_size=2
+            ) as kvstore:
+                async with kvstore() as kvctx:
+                    await kvctx.set("feed", b"face")
+                    # Pending writes are visible before they are written
+                    self.assertEqual(await kvctx.get("feed"), b"face")
+                    with sqlite3.connect(filename) as db:
+                        self.assertEqual(
+                            db.execute("SELECT * FROM kvstore").fetchall(), []
+                        )
+                    await kvctx.set("dead", b"beef")
+                    with sqlite3.connect(filename) as db:
+                        self.assertEqual(
+                            len(
+                                db.execute("SELECT * FROM kvstore").fetchall()
+                            ),
+                            2,
+                        )
+
+
+CALLS = []
+
+
+@op(
+    inputs={"number": Definition(name="resume_number", primitive="int")},
+    outputs={"result": Definition(name="resume_doubled", primitive="int")},
+)
+async def resume_double(number: int):
+    CALLS.append(number)
+    return {"result": number * 2}
+
+
+class TestMemoryOrchestratorResume(AsyncTestCase):
+    async def run_numbers(self, filename, *numbers, dataflow=None):
+        if dataflow is None:
+            dataflow = DataFlow(resume_double, GetSingle)
+        dataflow.seed.append(
+            Input(
+                value=[resume_double.op.outputs["result"].name],
+                definition=GetSingle.op.inputs["spec"],
+            )
+        )
+        orchestrator = MemoryOrchestrator(
+            resume=SqliteKeyValueStore(filename=filename)
+        )
+        CALLS.clear()
+        async with orchestrator:
+            async with orchestrator(dataflow) as octx:
+                return {
+                    (await ctx.handle()).as_string(): results
+                    async for ctx, results in octx.run(
+                        {
+                            str(number): [
+                                Input(
+                                    value=number,
+                                    definition=resume_double.op.inputs[
+                                        "number"
+                                    ],
+                                )
+                            ]
+                            for number in numbers
+                        }
+                    )
+                }
+
+    async def test_resume(self):
+        with non_existant_tempfile() as filename:
+            results = await self.run_numbers(filename, 1, 2)
+            self.assertEqual(sorted(CALLS), [1, 2])
+            # Only the new context is run
+            resumed = await self.run_numbers(filename, 1, 2, 3)
+            self.assertEqual(CALLS, [3])
+            self.assertEqual(
+                resumed, {**results, "3": {"resume_doubled": 6}}
+            )
+
+    async def test_resume_other_dataflow(self):
+        with non_existant_tempfile() as filename:
+            results = await self.run_numbers(filename, 1, 2)
+            # Results saved by a different dataflow are not resumed
+            rerun = await self.run_numbers(
+                filename,
+                1,
+                2,
+                dataflow=DataFlow(
+                    operations={
+                        "double": resume_double,
+                        "get_single": GetSingle,
+                    }
+                ),
+            )
+            self.assertEqual(sorted(CALLS), [1, 2])
+            self.assertEqual(rerun, results)
+
+
+class TestPersistentRedundancyChecker(AsyncTestCase):
+    async def run_numbers(self, filename, *numbers):
+        dataflow = DataFlow(resume_double, GetSingle)
+        dataflow.seed.append(
+            Input(
+                value=[resume_double.op.outputs["result"].name],
+                definition=GetSingle.op.inputs["spec"],
+            )
+        )
+        orchestrator = MemoryOrchestrator(
+            rchecker=MemoryRedundancyChecker(
+                kvstore=SqliteKeyValueStore(filename=filename)
+            )
+        )
+        CALLS.clear()
+        async with orchestrator:
+            async with orchestrator(dataflow) as octx:
+                return {
+                    (await ctx.handle()).as_string(): results
+                    async for ctx, results in octx.run(
+                        {
+                            str(number): [
+                                Input(
+                                    value=number,
+                                    definition=resume_double.op.inputs[
+                                        "number"
+                                    ],
+                                )
+                            ]
+                            for number in numbers
+                        }
+                    )
+                }
+
+    async def test_new_process(self):
+        with non_existant_tempfile() as filename:
+            # Input ids start over for each run, as they would if each run
+            # was its own process
+            with patch.object(types, "_INPUT_UIDS", types._input_uids()):
+                first = await self.run_numbers(filename, 1)
+            with patch.object(types, "_INPUT_UIDS", types._input_uids()):
+                second = await self.run_numbers(filename, 1)
+            self.assertEqual(CALLS, [1])
+            self.assertEqual(first, second)
@@ -3,18 +3,20 @@
 import tempfile
 import os
 import csv
+import gzip
 import random
 import pathlib
 import inspect
 
 from dffml.source.csv import CSVSource, CSVSourceConfig
-from dffml.util.testing.source import FileSourceTest
+from dffml.util.testing.source import JournalFileSourceTest
 from dffml.util.asynctestcase import AsyncTestCase
 from dffml.record import Record
+from dffml.feature import Feature, Features
 from dffml.util.cli.arg import parse_unknown
 
 
-class TestCSVSource(FileSourceTest, AsyncTestCase):
+class TestCSVSource(JournalFileSourceTest, AsyncTestCase):
     async def setUpSource(self):
         return CSVSource(
             CSVSourceConfig(
@@ -110,3 +112,104 @@ class TestCSVSource(FileSourceTest, AsyncTestCase):
                     record_b = await sctx.record("b")
                     self.assertEqual(record_a.feature("ValueColumn"), 42)
                     self.assertEqual(record_b.feature("ValueColumn"), 420)
+
+    async def test_stream(self):
+        with tempfile.TemporaryDirectory() as testdir:
+            testfile = pathlib.Path(testdir, "stream.csv.gz")
+            with gzip.open(testfile, "wt") as fd:
+                fd.write(
+                    inspect.cleandoc(
+                        """
+                        key,tag,count,label,values,prediction_label,confidence_label
+                        a,untagged,42,007,"[1, 2]",yes,0.5
+                        b,other,1,2,,,
+                        c,untagged,1.5,,,,
+                        """
+                    )
+                )
+            async with CSVSource(
+                CSVSourceConfig(
+                    filename=testfile,
+                    stream=True,
+                    chunk_size=1,
+                    features=Features(
+                        Feature("count", int, 1),
+                        Feature("label", str, 1),
+                        Feature("values", int, 2),
+                    ),
+                )
+            ) as source:
+                async with source() as sctx:
+                    records = {
+                        record.key: record async for record in sctx.records()
+                    }
+                    self.assertEqual(sorted(records), ["a", "c"])
+                    self.assertEqual(
+                        records["a"].features(),
+                        {"count": 42, "label": "007", "values": [1, 2]},
+                    )
+                    self.assertEqual(
+                        records["a"].prediction("label"),
+                        {"value": "yes", "confidence": 0.5},
+                    )
+                    # Values the dtype cannot convert are parsed as literals
+                    self.assertEqual(records["c"].features(), {"count": 1.5})
+                    record = await sctx.record("c")
+                    self.assertEqual(record.feature("count"), 1.5)
+                    self.assertEqual(
+                        (await sctx.record("b")).features(), {}
+                    )
+                    self.assertEqual(
+                        sorted(
+                            [
+                                record.key
+                                async for record in sctx.records_by_keys(
+                                    ["c", "a", "z"]
+                                )
+                            ]
+                        ),
+                        ["a", "c"],
+                    )
+                    with self.assertRaisesRegex(
+                        ValueError, "cannot be written to when streaming"
+                    ):
+                        await sctx.update(Record("d"))
+
+    async def test_stream_readwrite(self):
+        with self.assertRaises(ValueError):
+            async with CSVSource(
+                CSVSourceConfig(
+                    filename="feedface.csv",
+                    stream=True,
+                    readwrite=True,
+                    allowempty=True,
+                )
+            ):
+                pass  # pragma: no cover
+
+    async def test_stream_journal(self):
+        with tempfile.TemporaryDirectory() as testdir:
+            testfile = pathlib.Path(testdir, "journal.csv")
+            testfile.write_text("key,value\na,1\nb,2\n")
+            config = CSVSourceConfig(
+                filename=testfile, readwrite=True, journal=True
+            )
+            async with CSVSource(config) as source:
+                async with source() as sctx:
+                    await sctx.update(
+                        Record("b", data={"features": {"value": 20}})
+                    )
+                    await sctx.update(
+                        Record("c", data={"features": {"value": 30}})
+                    )
+            async with CSVSource(
+                config._replace(readwrite=False, stream=True)
+            ) as source:
+                async with source() as sctx:
+                    self.assertEqual(
+                        {
+                            record.key: record.feature("value")
+                            async for record in sctx.records()
+                        },
+                        {"a": 1, "b": 20, "c": 30},
+                    )
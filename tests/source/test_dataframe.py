@@ -7,6 +7,7 @@ from dffml import (
     AsyncTestCase,
     DataFrameSource,
     DataFrameSourceConfig,
+    Sources,
 )
 
 
@@ -101,3 +102,29 @@ class TestDataFrameSource(AsyncTestCase):
                 "C": {"confidence": 0.0, "value": 14},
             },
         )
+
+    async def test_feature_arrays_vector(self):
+        df = pd.DataFrame(
+            [{"A": 1, "V": [1.0, 2.0]}, {"A": 2, "V": [3.0, 4.0]}]
+        )
+        sources = Sources(
+            DataFrameSource(DataFrameSourceConfig(dataframe=df))
+        )
+        async with sources, sources() as sctx:
+            columns = [
+                columns
+                async for columns in sctx.feature_arrays(
+                    ["A", "V"], batch_size=1
+                )
+            ]
+        self.assertEqual(len(columns), 2)
+        # Features with a length greater than one are two dimensional
+        self.assertEqual(columns[0]["V"].shape, (1, 2))
+        self.assertEqual(columns[0]["V"].dtype.kind, "f")
+        self.assertEqual(
+            [column["V"].tolist() for column in columns],
+            [[[1.0, 2.0]], [[3.0, 4.0]]],
+        )
+        self.assertEqual(
+            [column["A"].tolist() for column in columns], [[1], [2]]
+        )
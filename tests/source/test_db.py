@@ -6,6 +6,8 @@ from typing import Dict
 from dffml.db.sqlite import SqliteDatabaseConfig, SqliteDatabase
 from dffml.util.asynctestcase import AsyncTestCase
 from dffml.util.testing.source import SourceTest
+from dffml.record import Record
+from dffml.source.source import Sources, NoRecordsWithMatchingFeatures
 from dffml.source.db import DbSource, DbSourceConfig
 
 
@@ -75,6 +77,114 @@ class TestDbSource(AsyncTestCase, SourceTest):
     async def setUpSource(self):
         return DbSource(self.source_config)
 
+    async def test_records_by_keys(self):
+        async with await self.setUpSource() as source:
+            async with source() as sctx:
+                for i in range(20, 25):
+                    await sctx.update(
+                        Record(
+                            str(i),
+                            data={
+                                "features": {
+                                    "PetalLength": float(i),
+                                    "PetalWidth": 0.0,
+                                    "SepalLength": 0.0,
+                                    "SepalWidth": 0.0,
+                                }
+                            },
+                        )
+                    )
+                records = {
+                    record.key: record
+                    async for record in sctx.records_by_keys(
+                        ["20", "22", "24", "not_a_key"]
+                    )
+                }
+        self.assertEqual(set(records), {"20", "22", "24"})
+        for key, record in records.items():
+            self.assertEqual(record.feature("PetalLength"), float(key))
+
+    async def test_feature_columns(self):
+        features = ["PetalLength", "SepalWidth"]
+        async with Sources(await self.setUpSource()) as sources:
+            async with sources() as sctx:
+                for i in range(10, 15):
+                    await sctx.update(
+                        Record(
+                            str(i),
+                            data={
+                                "features": {
+                                    "PetalLength": float(i),
+                                    "PetalWidth": 0.0,
+                                    "SepalLength": 0.0,
+                                    "SepalWidth": float(-i),
+                                }
+                            },
+                        )
+                    )
+                expected = {feature: [] for feature in features}
+                async for record in sctx.with_features(features):
+                    for feature in features:
+                        expected[feature].append(record.feature(feature))
+                for batch_size in [None, 2]:
+                    with self.subTest(batch_size=batch_size):
+                        columns = {feature: [] for feature in features}
+                        async for batch in sctx.feature_columns(
+                            features, batch_size=batch_size
+                        ):
+                            if batch_size:
+                                self.assertLessEqual(
+                                    len(batch["PetalLength"]), batch_size
+                                )
+                            for feature in features:
+                                columns[feature].extend(batch[feature])
+                        self.assertEqual(columns, expected)
+                with self.assertRaises(NoRecordsWithMatchingFeatures):
+                    async for _ in sctx.feature_columns(["not_a_feature"]):
+                        pass  # pragma: no cover
+
+    async def test_update_many(self):
+        records = [
+            Record(
+                str(i),
+                data={
+                    "features": {
+                        "PetalLength": float(i),
+                        "PetalWidth": 0.0,
+                        "SepalLength": 0.0,
+                        "SepalWidth": 0.0,
+                    },
+                    "prediction": {
+                        "target_name": {"value": "setosa", "confidence": 0.5}
+                    },
+                },
+            )
+            for i in range(30, 35)
+        ]
+        async with await self.setUpSource() as source:
+            async with source() as sctx:
+                await sctx.update_many(records)
+                # Updating again replaces the existing rows
+                records[0].evaluated({"PetalWidth": 1.0})
+                await sctx.update_many(records[:1])
+                found = {
+                    record.key: record
+                    async for record in sctx.records_by_keys(
+                        [record.key for record in records]
+                    )
+                }
+        self.assertEqual(set(found), {record.key for record in records})
+        self.assertEqual(found["30"].feature("PetalWidth"), 1.0)
+        for record in records:
+            self.assertEqual(
+                found[record.key].feature("PetalLength"),
+                record.feature("PetalLength"),
+            )
+            self.assertEqual(
+                found[record.key].prediction("target_name"),
+                {"value": "setosa", "confidence": 0.5},
+            )
+
 
 # TODO: Potential shortcoming: Is there a way to call this source from the CLI and pass the db object (e.g. SqliteDatabase)?
 # dffml list records -sources primary=dbsource -source-db_implementation sqlite -source-table_name testTable -source-db ??? -source-model_columns "key feature_PetalLength feature_PetalWidth feature_SepalLength feature_SepalWidth target_name_confidence target_name_value"
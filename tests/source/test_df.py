@@ -5,7 +5,11 @@ from dffml.source.dfpreprocess import (
 from dffml.util.asynctestcase import AsyncTestCase
 from dffml.feature import Features, Feature
 from dffml.source.source import Sources
-from dffml.source.memory import MemorySource, MemorySourceConfig
+from dffml.source.memory import (
+    MemorySource,
+    MemorySourceConfig,
+    MemorySourceContext,
+)
 from dffml.record import Record
 from dffml.df.base import op
 from dffml.df.types import Input, DataFlow, Definition, InputFlow
@@ -82,6 +86,21 @@ TEST_DATAFLOW1.seed = [
 ]
 
 
+class ReadCountingMemorySourceContext(MemorySourceContext):
+    async def records(self):
+        async for record in super().records():
+            self.parent.read.append(record.key)
+            yield record
+
+
+class ReadCountingMemorySource(MemorySource):
+    CONTEXT = ReadCountingMemorySourceContext
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.read = []
+
+
 class TestDataFlowSource(AsyncTestCase):
     @classmethod
     def setUpClass(self):
@@ -126,3 +145,32 @@ class TestDataFlowSource(AsyncTestCase):
         for i, record in enumerate(NEW_RECORDS):
             with self.subTest(i=i):
                 self.assertDictEqual(record.features(), records[i].features())
+
+    async def test_records_streamed(self):
+        records = [
+            Record(
+                str(i),
+                data={
+                    "features": {name: i for name in TEST_FEATURE.names()}
+                },
+            )
+            for i in range(0, 20)
+        ]
+        wrapped = ReadCountingMemorySource(MemorySourceConfig(records=records))
+        yielded = {}
+        async with DataFlowPreprocessSource(
+            DataFlowPreprocessSourceConfig(
+                source=wrapped,
+                dataflow=TEST_DATAFLOW1,
+                features=TEST_FEATURE,
+                max_ctxs=2,
+            )
+        ) as source:
+            async with source() as dfsctx:
+                async for record in dfsctx.records():
+                    if not yielded:
+                        # Records are read as they are needed rather than all
+                        # before the first is yielded
+                        self.assertLess(len(wrapped.read), len(records))
+                    yielded[record.key] = record.feature("Years")
+        self.assertEqual(yielded, {str(i): i * 10 for i in range(0, 20)})
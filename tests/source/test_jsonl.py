@@ -0,0 +1,131 @@
+import os
+import gzip
+import json
+import random
+import pathlib
+import tempfile
+
+from dffml.record import Record
+from dffml.source.jsonl import JSONLinesSource, JSONLinesSourceConfig
+from dffml.util.testing.source import FileSourceTest
+from dffml.util.asynctestcase import AsyncTestCase
+
+
+class TestJSONLinesSource(FileSourceTest, AsyncTestCase):
+    async def setUpSource(self):
+        return JSONLinesSource(
+            JSONLinesSourceConfig(
+                filename=self.testfile, allowempty=True, readwrite=True
+            )
+        )
+
+    async def test_append(self):
+        for extension in ["", ".gz", ".bz2", ".xz", ".zip"]:
+            with self.subTest(extension=extension):
+                with tempfile.TemporaryDirectory() as testdir:
+                    self.testfile = pathlib.Path(
+                        testdir, "records.jsonl" + extension
+                    )
+                    source = await self.setUpSource()
+                    # Small blocks so that records span many blocks
+                    source.config = source.config._replace(block_size=64)
+                    async with source:
+                        async with source() as sctx:
+                            for i in range(100):
+                                await sctx.update(
+                                    Record(
+                                        str(i), data={"features": {"i": i}}
+                                    )
+                                )
+                            # Update a record already in the file
+                            await sctx.update(
+                                Record("0", data={"features": {"i": -1}})
+                            )
+                    self.assertTrue(source.index_path.is_file())
+                    for cache_index in (True, False):
+                        source.config = source.config._replace(
+                            cache_index=cache_index
+                        )
+                        async with source:
+                            async with source() as sctx:
+                                records = {
+                                    record.key: record.feature("i")
+                                    async for record in sctx.records()
+                                }
+                                self.assertEqual(len(records), 100)
+                                self.assertEqual(records["0"], -1)
+                                self.assertEqual(records["99"], 99)
+                                record = await sctx.record("42")
+                                self.assertEqual(record.feature("i"), 42)
+                                self.assertEqual(
+                                    {
+                                        record.key: record.feature("i")
+                                        async for record in sctx.records_by_keys(
+                                            ["98", "0", "missing", "3"]
+                                        )
+                                    },
+                                    {"98": 98, "0": -1, "3": 3},
+                                )
+
+    async def test_compressed_single_block(self):
+        with tempfile.TemporaryDirectory() as testdir:
+            testfile = pathlib.Path(testdir, "records.jsonl.gz")
+            # Written as one block by something other than the source
+            with gzip.open(testfile, "wt") as fd:
+                for i in range(10):
+                    fd.write(
+                        json.dumps({"key": str(i), "features": {"i": i}})
+                        + "\n"
+                    )
+            async with JSONLinesSource(filename=testfile) as source:
+                async with source() as sctx:
+                    record = await sctx.record("7")
+                    self.assertEqual(record.feature("i"), 7)
+                    self.assertEqual(
+                        len([record async for record in sctx.records()]), 10
+                    )
+
+    async def test_no_trailing_newline(self):
+        for extension in ["", ".gz"]:
+            with self.subTest(extension=extension):
+                with tempfile.TemporaryDirectory() as testdir:
+                    testfile = pathlib.Path(
+                        testdir, "records.jsonl" + extension
+                    )
+                    # Written by something else, without a newline after the
+                    # last line
+                    lines = "\n".join(
+                        json.dumps({"key": str(i), "features": {"i": i}})
+                        for i in range(5)
+                    )
+                    if extension:
+                        with gzip.open(testfile, "wt") as fd:
+                            fd.write(lines)
+                    else:
+                        testfile.write_text(lines)
+                    source = JSONLinesSource(
+                        filename=testfile, readwrite=True
+                    )
+                    async with source:
+                        async with source() as sctx:
+                            await sctx.update(
+                                Record("5", data={"features": {"i": 5}})
+                            )
+                    for cache_index in (True, False):
+                        source.config = source.config._replace(
+                            cache_index=cache_index
+                        )
+                        async with source:
+                            async with source() as sctx:
+                                self.assertEqual(
+                                    {
+                                        record.key: record.feature("i")
+                                        async for record in sctx.records()
+                                    },
+                                    {str(i): i for i in range(6)},
+                                )
+                                for key in ("4", "5"):
+                                    record = await sctx.record(key)
+                                    self.assertEqual(
+                                        record.feature("i"), int(key)
+                                    )
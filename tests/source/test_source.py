@@ -0,0 +1,155 @@
+from dffml.record import Record
+from dffml.source.source import (
+    Sources,
+    SubsetSources,
+    ValidationSources,
+    NoRecordsWithMatchingFeatures,
+)
+from dffml.source.memory import (
+    MemorySource,
+    MemorySourceConfig,
+    MemorySourceContext,
+)
+from dffml.util.asynctestcase import AsyncTestCase
+
+
+class KeyCountingMemorySourceContext(MemorySourceContext):
+    async def record(self, key):
+        self.parent.record_calls += 1
+        return await super().record(key)
+
+    async def records_by_keys(self, keys):
+        self.parent.records_by_keys_calls += 1
+        for key in keys:
+            if key in self.parent.mem:
+                yield self.parent.mem[key]
+
+
+class KeyCountingMemorySource(MemorySource):
+    CONTEXT = KeyCountingMemorySourceContext
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.record_calls = 0
+        self.records_by_keys_calls = 0
+
+
+class TestSourcesMerge(AsyncTestCase):
+    async def test_records_merged_in_batches(self):
+        first = MemorySource(
+            MemorySourceConfig(
+                records=[
+                    Record(str(i), data={"features": {"x": i}})
+                    for i in range(0, 10)
+                ]
+            )
+        )
+        second = KeyCountingMemorySource(
+            MemorySourceConfig(
+                records=[
+                    Record(
+                        str(i),
+                        data={
+                            "features": {"y": i * 2},
+                            "prediction": {
+                                "z": {"value": -i, "confidence": 0.5}
+                            },
+                        },
+                    )
+                    for i in range(0, 10, 2)
+                ]
+            )
+        )
+        sources = Sources(first, second)
+        async with sources:
+            async with sources() as sctx:
+                sctx.MERGE_BATCH_SIZE = 4
+                records = {
+                    record.key: record async for record in sctx.records()
+                }
+        self.assertEqual(list(records), [str(i) for i in range(0, 10)])
+        self.assertEqual(second.records_by_keys_calls, 3)
+        self.assertEqual(second.record_calls, 0)
+        for i in range(0, 10):
+            with self.subTest(key=str(i)):
+                record = records[str(i)]
+                if i % 2:
+                    self.assertEqual(record.features(), {"x": i})
+                    self.assertFalse(record.data.prediction)
+                else:
+                    self.assertEqual(record.features(), {"x": i, "y": i * 2})
+                    self.assertEqual(record.prediction("z").value, -i)
+                    self.assertEqual(record.prediction("z").confidence, 0.5)
+
+
+class TestSourcesFeatureColumns(AsyncTestCase):
+    async def setUp(self):
+        await super().setUp()
+        self.records = [
+            Record(str(i), data={"features": {"x": i, "y": i * 2}})
+            for i in range(0, 10)
+        ] + [Record("no_y", data={"features": {"x": -1}})]
+        self.source = MemorySource(MemorySourceConfig(records=self.records))
+
+    async def columns(self, sources, features, batch_size=None):
+        async with sources as sources:
+            async with sources() as sctx:
+                return [
+                    columns
+                    async for columns in sctx.feature_columns(
+                        features, batch_size=batch_size
+                    )
+                ]
+
+    async def test_all_at_once(self):
+        self.assertEqual(
+            await self.columns(Sources(self.source), ["x", "y"]),
+            [{"x": list(range(0, 10)), "y": list(range(0, 20, 2))}],
+        )
+
+    async def test_batch_size(self):
+        self.assertEqual(
+            await self.columns(Sources(self.source), ["x", "y"], 4),
+            [
+                {"x": [0, 1, 2, 3], "y": [0, 2, 4, 6]},
+                {"x": [4, 5, 6, 7], "y": [8, 10, 12, 14]},
+                {"x": [8, 9], "y": [16, 18]},
+            ],
+        )
+
+    async def test_multiple_sources(self):
+        other = MemorySource(
+            MemorySourceConfig(
+                records=[
+                    Record(str(i), data={"features": {"z": -i}})
+                    for i in range(0, 10)
+                ]
+            )
+        )
+        self.assertEqual(
+            await self.columns(Sources(self.source, other), ["x", "z"]),
+            [{"x": list(range(0, 10)), "z": [-i for i in range(0, 10)]}],
+        )
+
+    async def test_filtered(self):
+        with self.subTest(sources="ValidationSources"):
+            self.assertEqual(
+                await self.columns(
+                    ValidationSources(
+                        lambda record: record.feature("x") % 2, self.source
+                    ),
+                    ["x"],
+                ),
+                [{"x": [1, 3, 5, 7, 9, -1]}],
+            )
+        with self.subTest(sources="SubsetSources"):
+            self.assertEqual(
+                await self.columns(
+                    SubsetSources(self.source, keys=["2", "4"]), ["x", "y"]
+                ),
+                [{"x": [2, 4], "y": [4, 8]}],
+            )
+
+    async def test_no_records_with_features(self):
+        with self.assertRaises(NoRecordsWithMatchingFeatures):
+            await self.columns(Sources(self.source), ["x", "not_a_feature"])
@@ -30,7 +30,7 @@ from dffml.cli.ml import Predict, Train
 from dffml.cli.list import List
 from dffml.cli.dataflow import Dataflow
 
-from .test_df import OPERATIONS, OPIMPS
+from .test_df import OPERATIONS, OPIMPS, add
 
 
 class RecordsTestCase(AsyncTestCase):
@@ -376,6 +376,49 @@ class TestDataflowRunSingle(AsyncTestCase):
             self.assertEqual(results[0], {"result": 42})
         shutil.rmtree(tmpdir)
 
+    async def test_profile(self):
+        tmpdir = tempfile.mkdtemp()
+        handle, dataflow_file = tempfile.mkstemp(suffix=".json", dir=tmpdir)
+        os.close(handle)
+        profile_path = Path(tmpdir, "profile.json")
+        with open(dataflow_file, mode="w+b") as dataflow_file:
+            dataflow = io.StringIO()
+            with contextlib.redirect_stdout(dataflow):
+                await Dataflow.cli(
+                    "create",
+                    "-configloader",
+                    "json",
+                    *map(lambda op: op.name, OPERATIONS),
+                )
+            dataflow_file.write(dataflow.getvalue().encode())
+            dataflow_file.seek(0)
+            results = await Dataflow.cli(
+                "run",
+                "single",
+                "-dataflow",
+                dataflow_file.name,
+                "-profile",
+                str(profile_path),
+                "-inputs",
+                '["result"]=get_single_spec',
+                "add 40 and 2=calc_string",
+            )
+            self.assertEqual(results[0], {"result": 42})
+        trace = json.loads(profile_path.read_text())
+        self.assertIn(
+            add.op.name,
+            {
+                event["name"]
+                for event in trace["traceEvents"]
+                if event.get("cat") == "operation"
+            },
+        )
+        self.assertEqual(
+            trace["otherData"]["summary"]["operations"][add.op.name]["count"],
+            1,
+        )
+        shutil.rmtree(tmpdir)
+
 
 class TestDataflowRunContexts(AsyncTestCase):
     async def test_run(self):